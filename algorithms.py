@@ -1,19 +1,44 @@
 """
 algorithms.py:
-Contains the PathfindingAlgorithms class which contains various path finding functions.
+Contains the PathfindingAlgorithms class which visualizes the path finding functions in
+kernels.py.
 
 CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
 """
 
-from queue import PriorityQueue
+import time
+from typing import Callable, Optional
+import numpy as np
 import pygame
+import kernels
+from solver import SearchResult
 from matrix_graph import MatrixGraph
+from metrics import MetricsSink, RunMetrics
 from clock import Timer
+from text_cache import draw_glyphs, get_font, glyphs_width
+
+# The colour of pixels expanded by the forward search, and by the backward search of a
+# bidirectional algorithm
+FORWARD_COLOUR = (255, 0, 0)
+BACKWARD_COLOUR = (0, 0, 255)
+PATH_COLOUR = (0, 255, 0)
+
+# The replay draws at most TARGET_FPS frames per second, and draws every pixel expanded since the
+# previous frame at once. At a speed of 1, NODES_PER_SECOND pixels are drawn per second.
+TARGET_FPS = 60
+NODES_PER_SECOND = 3000
+MIN_SPEED = 1
+MAX_SPEED = 1024
+
+# The (x, y) offsets of the pixels in the dot drawn for each expanded pixel, a disc of radius 3
+DOT_X, DOT_Y = np.nonzero(np.hypot(*np.mgrid[-3:4, -3:4]) <= 3)
+DOT_X, DOT_Y = DOT_X - 3, DOT_Y - 3
 
 
 class PathfindingAlgorithms:
     """
-    A class used to store various path finding pathfinding algorithms
+    A class used to visualize various path finding pathfinding algorithms. The searches
+    themselves run in kernels.py, and the order in which they expanded pixels is replayed here.
 
     Private Instance Attributes:
         - _iteration_text_background: A white pygame surface that acts as a background for the
@@ -26,6 +51,16 @@ class PathfindingAlgorithms:
                          shifted in the x direction inorder to account for the maze being centered
         - _maze_y_offset: An integer that represents how much the drawing of the maze needs to be
                          shifted in the y direction inorder to account for the maze being centered
+        - _speed_text_background: A white pygame surface that acts as a background for the
+                                  text of the speed multiplier
+        - _speed_text_pos: A tuple that represents where to draw the speed multiplier
+
+    Public Instance Attributes:
+        - speed: The speed multiplier of the replay, a power of 2 between MIN_SPEED and
+                 MAX_SPEED
+        - sinks: The MetricsSinks that the RunMetrics of every search are reported to. No
+                 metrics are collected while this is empty.
+
     Sample Usage:
     >>> algorithms = PathfindingAlgorithms((200, 200), 5, 5, (500, 500))
     """
@@ -36,6 +71,10 @@ class PathfindingAlgorithms:
     _timer_text_pos: tuple[int, int]
     _maze_x_offset: int
     _maze_y_offset: int
+    _speed_text_background: pygame.Surface
+    _speed_text_pos: tuple[int, int]
+    speed: int
+    sinks: list[MetricsSink]
 
     def __init__(self, iteration_counter_pos: tuple[int, int], maze_x_offset: int,
                  maze_y_offset: int, timer_text_pos: tuple[int, int]) -> None:
@@ -43,7 +82,8 @@ class PathfindingAlgorithms:
         Initialize a PathfindingAlgorithms Object
         """
         # Max variables are used to generate the largest background
-        max_string = f'Nodes Searched + {1920 * 1080}'
+        # Mazes are resized to 1280 x 720, and bidirectional searches report both frontiers
+        max_string = f'Nodes Searched: {1280 * 720} + {1280 * 720}'
         max_time = 'Timer: 99:99:99'
 
         # Assign instance attributes
@@ -53,6 +93,11 @@ class PathfindingAlgorithms:
         self._timer_text_background = _get_text_surface(max_time)
         self._maze_x_offset = maze_x_offset
         self._maze_y_offset = maze_y_offset
+        self._speed_text_background = _get_text_surface(f'Speed: x{MAX_SPEED}')
+        self._speed_text_pos = (timer_text_pos[0] + self._timer_text_background.get_width() + 20,
+                                timer_text_pos[1])
+        self.speed = MIN_SPEED
+        self.sinks = []
 
     def breadth_first_search(self, graph: MatrixGraph, start: tuple, target: tuple,
                              surface: pygame.Surface, display: pygame.Surface) \
@@ -61,59 +106,9 @@ class PathfindingAlgorithms:
         Return a list of tuples representing the final path if target is found,
         return an empty list otherwise.
 
-        This function is an implementation of the breadth_first_search pathfinding algorithm
+        This function visualizes kernels.breadth_first_search
         """
-        queue = []
-        visited = set()
-        paths = {}  # A dictionary that maps new nodes to the previous node
-        queue.extend(graph.get_valid_neighbours(start[0], start[1]))
-        visited.update(graph.get_valid_neighbours(start[0], start[1]))
-
-        # Update paths with the original visited set
-        for node in graph.get_valid_neighbours(start[0], start[1]):
-            paths[node] = start
-        found = False
-
-        # Counter to store current iteration
-        counter = 0
-
-        # Pygame clock
-        clock = Timer()
-
-        while queue != [] and not found:
-            # Draw and update the loop iteration counter
-            counter += 1
-            iteration_counter = f'Nodes Searched: {counter}'
-            self._draw_loop_iterations(iteration_counter, surface)
-
-            # Pop the current node
-            curr = queue.pop(0)
-
-            # Visualize step
-            _ = pygame.event.get()  # Call event.get to stop program from crashing on clicks
-            curr_x = curr[0] + self._maze_x_offset + 1
-            curr_y = curr[1] + self._maze_y_offset + 1
-            pygame.draw.circle(surface, (255, 0, 0), (curr_x, curr_y), 3)
-            display.blit(surface, (0, 0))
-            pygame.display.flip()
-
-            if curr == target:
-                found = True
-            for node in graph.get_valid_neighbours(curr[0], curr[1]):
-                if node not in visited:
-                    queue.append(node)
-                    visited.add(node)
-
-                    # Add the node as a key with the current node as the value
-                    paths[node] = curr
-
-            clock.update_time()
-            self._draw_timer(clock, surface)
-
-        if found is False:
-            return []
-        else:
-            return self._find_and_draw_final_path(paths, start, target, surface, display)
+        return self._visualize(kernels.breadth_first_search, graph, start, target, surface, display)
 
     def depth_first_search_iterative(self, graph: MatrixGraph, start: tuple, target: tuple,
                                      surface: pygame.Surface, display: pygame.Surface) \
@@ -122,179 +117,292 @@ class PathfindingAlgorithms:
         Return a list of tuples representing the final path if target is found,
         return an empty list otherwise.
 
-        This is an iterative version of depth_first_search, since the recursive version exceeds
-        the maximum recursion depth.
+        This function visualizes kernels.depth_first_search_iterative
         """
-        discovered = set()
-        stack = [start]  # Stack is a reversed list for now. Later we can make a stack class if we
-        # need
+        return self._visualize(kernels.depth_first_search_iterative, graph, start, target, surface,
+                               display)
 
-        paths = {}  # A dictionary that maps new nodes to the previous node
-        found = False
+    def a_star(self, graph: MatrixGraph, start: tuple, target: tuple,
+               surface: pygame.Surface, display: pygame.Surface) -> list[tuple[int, int]]:
+        """
+        Return a list of tuples representing the final path if target is found,
+        return an empty list otherwise.
 
-        # Variables and Surfaces used to display the current iterations
-        counter = 0
+        This function visualizes kernels.a_star
+        """
+        return self._visualize(kernels.a_star, graph, start, target, surface, display)
 
-        # Pygame clock
-        clock = Timer()
+    def bidirectional_breadth_first_search(self, graph: MatrixGraph, start: tuple,
+                                           target: tuple, surface: pygame.Surface,
+                                           display: pygame.Surface) -> list[tuple[int, int]]:
+        """
+        Return a list of tuples representing the final path if target is found,
+        return an empty list otherwise.
 
-        while stack != [] and not found:
-            # Draw and update the loop iteration counter
-            counter += 1
-            iteration_counter = f'Nodes Searched: {counter}'
-            self._draw_loop_iterations(iteration_counter, surface)
-
-            vertex = stack.pop()
-
-            # Visualize step
-            _ = pygame.event.get()  # Call event.get to stop program from crashing on clicks
-            curr_x = vertex[0] + self._maze_x_offset + 1
-            curr_y = vertex[1] + self._maze_y_offset + 1
-            pygame.draw.circle(surface, (255, 0, 0), (curr_x, curr_y), 3)
-            display.blit(surface, (0, 0))
-            pygame.display.flip()
-
-            if vertex == target:
-                found = True
-            elif vertex not in discovered:
-                discovered.add(vertex)
-                neighbors = graph.get_valid_neighbours(vertex[0], vertex[1])
-                for neighbor in neighbors:
-                    if neighbor not in discovered:
-                        # Add the neighbor as a key in the path dictionary with vertex as a parent
-                        stack.append(neighbor)
-                        paths[neighbor] = vertex
+        This function visualizes kernels.bidirectional_breadth_first_search
+        """
+        return self._visualize(kernels.bidirectional_breadth_first_search, graph, start, target,
+                               surface, display)
 
-            clock.update_time()
-            self._draw_timer(clock, surface)
+    def bidirectional_a_star(self, graph: MatrixGraph, start: tuple, target: tuple,
+                             surface: pygame.Surface, display: pygame.Surface) \
+            -> list[tuple[int, int]]:
+        """
+        Return a list of tuples representing the final path if target is found,
+        return an empty list otherwise.
 
-        if found is False:
-            return []
-        else:
-            return self._find_and_draw_final_path(paths, start, target, surface, display)
+        This function visualizes kernels.bidirectional_a_star
+        """
+        return self._visualize(kernels.bidirectional_a_star, graph, start, target, surface, display)
 
-    def a_star(self, graph: MatrixGraph, start: tuple, target: tuple,
-               surface: pygame.Surface, display: pygame.Surface) -> list[tuple[int, int]]:
+    def jump_point_search(self, graph: MatrixGraph, start: tuple, target: tuple,
+                          surface: pygame.Surface, display: pygame.Surface) \
+            -> list[tuple[int, int]]:
         """
-        The heuristic used is the distance from target to the current node
-        if f(n) = 0 we have reached our node, our promising choice is the min(f(n)) for each
-        neighbour
+        Return a list of tuples representing the final path if target is found,
+        return an empty list otherwise.
+
+        This function visualizes kernels.jump_point_search, which only expands jump points
         """
+        return self._visualize(kernels.jump_point_search, graph, start, target, surface, display)
 
-        open_queue = PriorityQueue()
-        open_queue.put((graph.euclidean_distance(start, target), (start, 0)))
+    def jump_point_search_plus(self, graph: MatrixGraph, start: tuple, target: tuple,
+                               surface: pygame.Surface, display: pygame.Surface) \
+            -> list[tuple[int, int]]:
+        """
+        Return a list of tuples representing the final path if target is found,
+        return an empty list otherwise.
 
-        closed = {start}
+        This function visualizes kernels.jump_point_search_plus
+        """
+        return self._visualize(kernels.jump_point_search_plus, graph, start, target, surface,
+                               display)
 
-        paths = {}  # A dictionary that maps new nodes to the previous node
-        found = False
-        # Variables and Surfaces used to display the current iterations
-        counter = 0
+    def update_off_set_values(self, centered_w: int, centered_h: int) -> None:
+        """
+        Update the off set attributes. This method is called when the program swaps mazes.
+        """
+        self._maze_x_offset = centered_w
+        self._maze_y_offset = centered_h
 
-        # Pygame clock
-        clock = Timer()
+    def change_speed(self, factor: float) -> None:
+        """
+        Multiply the speed of the replay by factor, keeping it between MIN_SPEED and MAX_SPEED
+        """
+        self.speed = int(min(MAX_SPEED, max(MIN_SPEED, self.speed * factor)))
 
-        while not open_queue.empty() and not found:
-            # Draw and update iteration counter
-            counter += 1
-            iteration_counter = f'Nodes Searched: {counter}'
-            self._draw_loop_iterations(iteration_counter, surface)
+    def handle_speed_keys(self, events: list) -> None:
+        """
+        Double the speed for every up arrow pressed in events and halve it for every down arrow
+        """
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_UP:
+                self.change_speed(2)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_DOWN:
+                self.change_speed(0.5)
 
-            curr = open_queue.get()
-            closed.add(curr[1][0])
+    def draw_speed(self, surface: pygame.Surface) -> pygame.Rect:
+        """
+        Draw the current speed multiplier next to the timer, and return the area it was drawn on
+        """
+        area = surface.blit(self._speed_text_background, self._speed_text_pos)
+        draw_glyphs(surface, f'Speed: x{self.speed}', self._speed_text_pos)
+        return area
 
-            _ = pygame.event.get()  # Call event.get to stop program from crashing on clicks
-            curr_x = curr[1][0][0] + self._maze_x_offset + 1
-            curr_y = curr[1][0][1] + self._maze_y_offset + 1
-            pygame.draw.circle(surface, (255, 0, 0), (curr_x, curr_y), 3)
-            display.blit(surface, (0, 0))
-            pygame.display.flip()
+    def _visualize(self, search: Callable[..., SearchResult], graph: MatrixGraph, start: tuple,
+                   target: tuple, surface: pygame.Surface,
+                   display: pygame.Surface) -> list[tuple[int, int]]:
+        """
+        Run search on graph from start to target and replay the result, then return the final
+        path.
 
-            if curr[1][0] == target:
-                found = True
+        If there are any sinks, they are told the search is starting before it runs, and are
+        given its RunMetrics once the replay finishes. Otherwise the search does not count
+        anything, since nothing would read the counters.
+        """
+        if not self.sinks:
+            return self._replay(search(graph, start, target, count=False), surface, display)
+
+        for sink in self.sinks:
+            sink.start(search.__name__)
+        begin = time.perf_counter()
+        result = search(graph, start, target)
+        metrics = RunMetrics.from_result(search.__name__, result, time.perf_counter() - begin)
+        path = self._replay(result, surface, display, metrics)
+        for sink in self.sinks:
+            sink.record(metrics)
+        return path
+
+    def _replay(self, result: SearchResult, surface: pygame.Surface, display: pygame.Surface,
+                metrics: Optional[RunMetrics] = None) -> list[tuple[int, int]]:
+        """
+        Draw every pixel the algorithm expanded, in order, then draw the final path.
 
-            neighbours = graph.get_valid_neighbours(curr[1][0][0], curr[1][0][1])
+        Each frame draws every pixel expanded since the previous frame directly into the pixel
+        array of surface, then copies only the areas it drew on to the display and updates those,
+        so the cost of drawing does not limit how fast the search is replayed. The up and down
+        arrows change the speed, and space skips to the end.
 
-            for coord in neighbours:
-                if coord in closed:
-                    # If the neighbor has already been computed, do nothing
-                    continue
-                if not any(tup[1][0] == coord for tup in open_queue.queue):
-                    # If the neighbor is not in the the open queue, add it
+        For bidirectional algorithms, pixels expanded by the backward search are drawn in blue,
+        and the iteration counter reports how many pixels the forward and backward searches
+        expanded as forward + backward.
 
-                    # Compute the heuristic and add it to open
-                    neighbour_f = curr[1][1] + 1 + graph.euclidean_distance(target, coord)
-                    open_queue.put((neighbour_f, (coord, curr[1][1] + 1)))
+        If metrics is not None, the time spent drawing, polling events and waiting for the next
+        frame, and the number of frames, are stored in it.
 
-                    # Track the path
-                    paths[coord] = curr[1][0]
+        Return the final path stored in result.
+        """
+        # Pygame clocks for the timer and for limiting the frame rate
+        clock = Timer()
+        frame_clock = pygame.time.Clock()
+        total = len(result.trace)
+        drawn = 0
+        backward = 0  # The number of drawn pixels the backward search expanded
+        budget = 0.0
+        # The seconds spent drawing, polling events and waiting, and the number of frames
+        times = [0.0, 0.0, 0.0]
+        frames = 0
+        mark = time.perf_counter()
+
+        while drawn < total:
+            events = pygame.event.get()  # Call event.get to stop program from crashing on clicks
+            self.handle_speed_keys(events)
+            if any(event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE
+                   for event in events):
+                budget = total
+            mark = _add_elapsed(times, 1, mark)
+
+            # Draw every pixel expanded since the last frame
+            budget += NODES_PER_SECOND * self.speed / TARGET_FPS
+            end = min(total, drawn + int(budget))
+            budget -= end - drawn
+            dirty = self._draw_batch(result, drawn, end, surface)
+            if result.sides is not None:
+                backward += int(np.count_nonzero(result.sides[drawn:end]))
+            drawn = end
 
-            # Update clock
+            # Draw and update the loop iteration counter
+            if result.sides is None:
+                iteration_counter = f'Nodes Searched: {drawn}'
+            else:
+                iteration_counter = f'Nodes Searched: {drawn - backward} + {backward}'
+            dirty.append(self._draw_loop_iterations(iteration_counter, surface))
             clock.update_time()
-            self._draw_timer(clock, surface)
-
-        if found is False:
-            return []
+            dirty.append(self._draw_timer(clock, surface))
+            dirty.append(self.draw_speed(surface))
+
+            _update_display(dirty, surface, display)
+            mark = _add_elapsed(times, 0, mark)
+            frame_clock.tick(TARGET_FPS)
+            mark = _add_elapsed(times, 2, mark)
+            frames += 1
+
+        if result.found:
+            self._draw_final_path(result.path, surface, display)
+            _add_elapsed(times, 0, mark)
+        if metrics is not None:
+            metrics.render_s, metrics.events_s, metrics.idle_s = times
+            metrics.frames = frames
+        return result.path
+
+    def _draw_batch(self, result: SearchResult, begin: int, end: int,
+                    surface: pygame.Surface) -> list[pygame.Rect]:
+        """
+        Draw the pixels expanded from result.trace[begin] up to result.trace[end], and return
+        a list of the areas of surface that were drawn on
+        """
+        coords = result.trace[begin:end]
+        if result.sides is None:
+            areas = [self._draw_dots(coords, FORWARD_COLOUR, surface)]
         else:
-            return self._find_and_draw_final_path(paths, start, target, surface, display)
+            backward = result.sides[begin:end] == 1
+            areas = [self._draw_dots(coords[~backward], FORWARD_COLOUR, surface),
+                     self._draw_dots(coords[backward], BACKWARD_COLOUR, surface)]
+        return [area for area in areas if area is not None]
 
-    def update_off_set_values(self, centered_w: int, centered_h: int) -> None:
+    def _draw_final_path(self, path: list[tuple[int, int]], surface: pygame.Surface,
+                         display: pygame.Surface) -> None:
         """
-        Update the off set attributes. This method is called when the program swaps mazes.
+        Draw the path found by the algorithm that calls this function
         """
-        self._maze_x_offset = centered_w
-        self._maze_y_offset = centered_h
+        area = self._draw_dots(np.array(path, dtype=np.int32).reshape((-1, 2)), PATH_COLOUR,
+                               surface)
+        if area is not None:
+            _update_display([area], surface, display)
+
+    def _draw_dots(self, coords: np.ndarray, colour: tuple[int, int, int],
+                   surface: pygame.Surface) -> Optional[pygame.Rect]:
+        """
+        Draw a dot of colour at the maze pixel of every (col, row) in coords by writing directly
+        into the pixel array of surface, and return the bounding box of the pixels drawn, or None
+        if nothing was drawn
+        """
+        if len(coords) == 0:
+            return None
+        xs = (coords[:, 0, None] + (self._maze_x_offset + 1) + DOT_X).ravel()
+        ys = (coords[:, 1, None] + (self._maze_y_offset + 1) + DOT_Y).ravel()
+        width, height = surface.get_size()
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        xs, ys = xs[inside], ys[inside]
+        if len(xs) == 0:
+            return None
+
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[xs, ys] = colour
+        del pixels  # The surface stays locked until the pixel array is deleted
+        if surface.get_flags() & pygame.SRCALPHA:
+            alpha = pygame.surfarray.pixels_alpha(surface)
+            alpha[xs, ys] = 255
+            del alpha
+        left, top = int(xs.min()), int(ys.min())
+        return pygame.Rect(left, top, int(xs.max()) - left + 1, int(ys.max()) - top + 1)
+
+    def _draw_loop_iterations(self, loop_iters: str, surface: pygame.Surface) -> pygame.Rect:
+        """
+        Draw the current loop iterations at the specified position, and return the area it was
+        drawn on
+        """
+        area = surface.blit(self._iteration_text_background, self._iteration_text_pos)
+        draw_glyphs(surface, loop_iters, self._iteration_text_pos)
+        return area
 
-    def _find_and_draw_final_path(self, paths: dict[tuple[int, int], tuple[int, int]],
-                                  start: tuple, target: tuple, surface: pygame.Surface,
-                                  display: pygame.Surface) -> list[tuple[int, int]]:
+    def _draw_timer(self, clock: Timer, surface: pygame.Surface) -> pygame.Rect:
         """
-        Return a list of tuples that corresponds to the path found by the algorithm that calls
-        this function
+        Draw the time on clock at the specified position, and return the area it was drawn on
         """
+        area = surface.blit(self._timer_text_background, self._timer_text_pos)
+        draw_glyphs(surface, clock.get_text(), self._timer_text_pos)
+        return area
 
-        final_path_so_far = []
-        current_node = target
-        while current_node != start:
-            final_path_so_far.insert(0, current_node)
-            current_node = paths[current_node]
-            # Draw the final path
-            curr_x = current_node[0] + self._maze_x_offset + 1
-            curr_y = current_node[1] + self._maze_y_offset + 1
-            pygame.draw.circle(surface, (0, 255, 0), (curr_x, curr_y), 3)
 
-        # Insert the first node
-        final_path_so_far.insert(0, start)
+def _update_display(areas: list[pygame.Rect], surface: pygame.Surface,
+                    display: pygame.Surface) -> None:
+    """
+    Copy every area in areas from surface to the display and update only those areas on screen.
 
-        # Draw the final path
-        pygame.draw.circle(surface, (0, 255, 0), (start[0] + self._maze_x_offset + 1,
-                                                  start[1] + self._maze_y_offset + 1), 3)
-        display.blit(surface, (0, 0))
-        pygame.display.flip()
-        return final_path_so_far
+    Every pixel of surface is either transparent or opaque, so copying an area again draws the
+    same pixels and the parts of the display under it do not need to be redrawn first.
+    """
+    for area in areas:
+        display.blit(surface, area, area)
+    pygame.display.update(areas)
 
-    def _draw_loop_iterations(self, loop_iters: str, surface: pygame.Surface) -> None:
-        """
-        Draw the current loop iterations at the specified position
-        """
-        text_surface = pygame.font.SysFont('Arial', 20).render(loop_iters, True, (0, 0, 0))
-        surface.blit(self._iteration_text_background, self._iteration_text_pos)
-        surface.blit(text_surface, self._iteration_text_pos)
 
-    def _draw_timer(self, clock: Timer, surface: pygame.Surface) -> None:
-        text_surface = clock.get_text_surface()
-        surface.blit(self._timer_text_background, self._timer_text_pos)
-        surface.blit(text_surface, self._timer_text_pos)
+def _add_elapsed(times: list[float], index: int, mark: float) -> float:
+    """
+    Add the seconds since mark, a time.perf_counter reading, to times[index], and return the
+    current time.perf_counter reading
+    """
+    now = time.perf_counter()
+    times[index] += now - mark
+    return now
 
 
 def _get_text_surface(longest_text: str) -> pygame.Surface:
     """
     Return a white box that is the size of the maximum possible text being rendered
     """
-    text_surface = pygame.font.SysFont('Arial', 20).render(longest_text, True, (0, 0, 0))
-    text_h = text_surface.get_height()
-    text_w = text_surface.get_width()
-    white = pygame.Surface((text_w, text_h))
+    white = pygame.Surface((glyphs_width(longest_text), get_font().get_height()))
     white.fill((255, 255, 255))
     return white
 
@@ -304,7 +412,8 @@ if __name__ == '__main__':
     import python_ta.contracts
     python_ta.contracts.check_all_contracts()
     python_ta.check_all(config={
-        'extra-imports': ['pygame', 'matrix_graph', 'typing', 'clock', 'queue'],
+        'extra-imports': ['pygame', 'kernels', 'solver', 'matrix_graph', 'typing', 'clock',
+                          'numpy', 'text_cache', 'time', 'metrics'],
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'max-line-length': 100,
         'disable': ['E1136']
@@ -0,0 +1,250 @@
+"""
+batch.py:
+Contains the command line mode of the program, which solves every maze image in a directory
+without a display.
+
+Each image is preprocessed and searched in a pool of worker processes, and the paths, path
+lengths, node expansion counts and timings are written to a JSON or CSV file. For example:
+
+    python batch.py mazes --algorithm a_star --output results.csv
+    python batch.py scans --pairs pairs.json --workers 8 --output results.json
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import argparse
+import csv
+import functools
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Optional
+import cv2
+import numpy as np
+from matrix_graph import MatrixGraph, pick_endpoints
+from packed_graph import pack_graph
+from image_processing import MazePreprocessor, preprocess_maze_tiled
+from maze_cache import MazeCache
+from landmarks import LandmarkIndex
+from solver import path_cost
+from precompile import SEARCHES, precompile
+import kernels
+
+ALGORITHMS = SEARCHES + ['landmark_a_star']
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+CSV_FIELDS = ['image', 'algorithm', 'start', 'target', 'connected', 'found', 'path_length',
+              'path_cost', 'expanded', 'pushed', 'max_frontier', 'neighbour_checks', 'components',
+              'largest_component', 'preprocess_s', 'preprocess_stages', 'search_s', 'error',
+              'path']
+
+# Every maze a worker process preprocesses goes through the same MazePreprocessor, so its
+# intermediate images are only allocated again when the image size changes
+PREPROCESSOR = MazePreprocessor()
+
+
+def find_images(directory: str, full_resolution: bool = False) -> list[str]:
+    """
+    Return the sorted paths of every maze image directly inside directory, including .npy
+    files of images if full_resolution is True, since only preprocess_maze_tiled reads them
+    """
+    extensions = IMAGE_EXTENSIONS + ('.npy',) if full_resolution else IMAGE_EXTENSIONS
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(extensions))
+
+
+def load_pairs(pairs_path: str) -> dict[str, list]:
+    """
+    Return the start and target pairs stored in the JSON file at pairs_path, as a dictionary
+    mapping image file names to lists of [[start col, start row], [target col, target row]].
+
+    The file either contains such a dictionary, or a single list of pairs that is used for every
+    image, which is stored under the key '*'.
+    """
+    with open(pairs_path) as file:
+        pairs = json.load(file)
+    if isinstance(pairs, list):
+        return {'*': pairs}
+    return pairs
+
+
+def solve_maze(task: tuple[str, str, Optional[list], Optional[str], bool, Optional[int]]) \
+        -> list[dict]:
+    """
+    Return one result row per query for the task (image path, algorithm name, list of start and
+    target pairs or None to pick them automatically, cache directory or None, whether to process
+    the image at full resolution, and the halo of its tiles or None to derive it from the image).
+
+    Besides 'expanded', the rows of the kernels in kernels.py include the counters in
+    solver.COUNTERS, which landmark_a_star does not count.
+
+    Full resolution images are preprocessed with preprocess_maze_tiled into a memory mapped grid
+    in a temporary directory, which is deleted once the image is solved, and are not cached.
+    Unless the algorithm is 'landmark_a_star', which needs a MatrixGraph, they are searched as a
+    PackedGraph, which holds the grid in 8 times less memory and has no nearest map.
+
+    For 'landmark_a_star', a LandmarkIndex is built once per image and its build time is
+    included in the preprocessing time, so that every query of the image is answered from it.
+    Likewise for the jump table of 'jump_point_search_plus'.
+
+    If the image cannot be processed, return a single row that records the error instead.
+    """
+    image_path, algorithm, pairs, cache_directory, full_resolution, halo = task
+    if not full_resolution:
+        return _solve_maze(image_path, algorithm, pairs, cache_directory, None, None)
+    with tempfile.TemporaryDirectory() as directory:
+        return _solve_maze(image_path, algorithm, pairs, None, os.path.join(directory, 'grid.npy'),
+                           halo)
+
+
+def _solve_maze(image_path: str, algorithm: str, pairs: Optional[list],
+                cache_directory: Optional[str], grid_path: Optional[str],
+                halo: Optional[int]) -> list[dict]:
+    """
+    Return the result rows of solve_maze, where the grid is preprocessed at full resolution into
+    grid_path with tiles of the given halo if grid_path is not None.
+    """
+    name = os.path.basename(image_path)
+
+    # Following the GUI, file names that start with 'c' are circular mazes and are not cropped
+    rectangular = name[0] != 'c'
+
+    begin = time.perf_counter()
+    PREPROCESSOR.timings = {}
+    try:
+        if grid_path is not None:
+            grid = preprocess_maze_tiled(image_path, rectangular, grid_path, halo=halo)
+        elif cache_directory is None:
+            _, grid = PREPROCESSOR.preprocess(image_path, rectangular)
+        else:
+            _, grid = MazeCache(cache_directory).load_or_preprocess(image_path, rectangular,
+                                                                    preprocessor=PREPROCESSOR)
+        if grid_path is not None and algorithm != 'landmark_a_star':
+            graph = pack_graph(grid)
+        else:
+            graph = MatrixGraph(np.ascontiguousarray(grid, dtype=np.uint8))
+            graph.build_nearest_map()
+        if pairs is None:
+            pairs = [pick_endpoints(graph.graph)]
+        graph.build_components()
+        if algorithm == 'jump_point_search_plus':
+            graph.build_jump_table()
+        if algorithm == 'landmark_a_star':
+            search = LandmarkIndex(graph).a_star
+        else:
+            search = functools.partial(getattr(kernels, algorithm), graph)
+    except (cv2.error, ValueError, IndexError, OSError) as error:
+        # cv2 raises all of these for images that are missing, unreadable or contain no maze
+        return [{'image': name, 'algorithm': algorithm, 'error': str(error)}]
+    preprocess_time = time.perf_counter() - begin
+
+    rows = []
+    for start, target in pairs:
+        row = {'image': name, 'algorithm': algorithm, 'preprocess_s': preprocess_time,
+               'preprocess_stages': dict(PREPROCESSOR.timings),
+               'components': graph.component_count(),
+               'largest_component': int(graph.component_sizes().max(initial=0))}
+        try:
+            start = graph.closest_path((int(start[0]), int(start[1])))
+            target = graph.closest_path((int(target[0]), int(target[1])))
+        except IndexError:
+            row['error'] = 'The maze does not contain a path'
+            rows.append(row)
+            continue
+
+        begin = time.perf_counter()
+        result = search(start, target)
+        row.update({'start': list(start), 'target': list(target),
+                    'connected': graph.same_component(start, target), 'found': result.found,
+                    'path_length': len(result.path), 'path_cost': path_cost(result.path),
+                    **result.counts(), 'search_s': time.perf_counter() - begin,
+                    'path': [list(node) for node in result.path]})
+        rows.append(row)
+    return rows
+
+
+def run_batch(directory: str, algorithm: str = 'a_star',
+              pairs: Optional[dict[str, list]] = None, workers: Optional[int] = None,
+              cache_directory: Optional[str] = None,
+              full_resolution: bool = False, halo: Optional[int] = None) -> list[dict]:
+    """
+    Return the result rows of solving every maze image in directory with algorithm, using a
+    pool of workers processes (one per CPU if workers is None).
+
+    pairs maps image file names (or '*' for every image) to the start and target pairs to
+    solve. Images without pairs have their endpoints picked with pick_endpoints. If
+    full_resolution is True, images are not resized before they are thinned, and .npy files
+    of images are solved too. halo is passed on to preprocess_maze_tiled.
+    """
+    tasks = []
+    for image_path in find_images(directory, full_resolution):
+        name = os.path.basename(image_path)
+        image_pairs = None
+        if pairs is not None:
+            image_pairs = pairs.get(name, pairs.get('*'))
+        tasks.append((image_path, algorithm, image_pairs, cache_directory, full_resolution,
+                      halo))
+
+    # Each worker compiles the jitclass methods it needs once when it starts, instead of while
+    # solving its first image, and loads everything else from the numba cache
+    rows = []
+    with multiprocessing.Pool(workers, initializer=precompile,
+                              initargs=([algorithm], full_resolution)) as pool:
+        for image_rows in pool.imap(solve_maze, tasks):
+            rows.extend(image_rows)
+    return rows
+
+
+def write_results(rows: list[dict], output_path: str) -> None:
+    """
+    Write rows to output_path, as CSV if it ends in .csv and as JSON otherwise.
+
+    In the CSV file, the path of each row is stored as a JSON list of [col, row] pairs, and the
+    preprocessing stage timings as a JSON object.
+    """
+    if output_path.lower().endswith('.csv'):
+        with open(output_path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, CSV_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({key: json.dumps(value) if isinstance(value, (list, dict))
+                                 else value
+                                 for key, value in row.items()})
+    else:
+        with open(output_path, 'w') as file:
+            json.dump(rows, file, indent=2)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """
+    Parse the command line arguments in argv, then solve and write the results
+    """
+    parser = argparse.ArgumentParser(description='Solve every maze image in a directory.')
+    parser.add_argument('directory', help='the directory containing the maze images')
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='a_star')
+    parser.add_argument('--pairs', help='a JSON file of start and target pairs, otherwise the '
+                                        'endpoints are picked automatically')
+    parser.add_argument('--workers', type=int, help='the number of worker processes')
+    parser.add_argument('--cache', help='the directory to cache preprocessed mazes in')
+    parser.add_argument('--full-resolution', action='store_true',
+                        help='thin the images at their full resolution in tiles, instead of '
+                             'resizing them to 1280 x 720')
+    parser.add_argument('--halo', type=int,
+                        help='with --full-resolution, the pixels around every tile that are '
+                             'thinned with it, by default wide enough for the widest corridor')
+    parser.add_argument('--output', default='results.json',
+                        help='the .json or .csv file to write the results to')
+    args = parser.parse_args(argv)
+
+    pairs = load_pairs(args.pairs) if args.pairs is not None else None
+    rows = run_batch(args.directory, args.algorithm, pairs, args.workers, args.cache,
+                     args.full_resolution, args.halo)
+    write_results(rows, args.output)
+
+    solved = sum(1 for row in rows if row.get('found'))
+    print(f'Solved {solved} of {len(rows)} queries, results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
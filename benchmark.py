@@ -0,0 +1,743 @@
+"""
+benchmark.py:
+Contains functions used to time the pathfinding algorithms without a display.
+
+Run this module to compare the interpreted algorithms in solver.py against the numba compiled
+kernels in kernels.py, the one directional kernels against the bidirectional ones, A* against
+jump point search, A* on the pixel grid against A* on the ContractedGraph, and the octile
+heuristic against the landmark heuristics of a LandmarkIndex, on the bundled mazes. It also times
+every stage of preprocessing the bundled mazes, the ways of finding the neighbours of a pixel,
+from Python and from jitted code, and how much the search counters slow breadth first search
+down, checks that breadth first search and path reconstruction scale linearly along corridors
+hundreds of thousands of pixels long, and times how long a new process takes to compile or load
+the numba code, with and without the numba cache.
+
+Run it with --suite to time startup, and every preprocessing stage and search separately on the
+bundled mazes and on synthetic mazes of increasing size, and save the results to a JSON file.
+Passing the file of an earlier run as --baseline reports the stages that became slower:
+
+    python benchmark.py --suite --output before.json
+    python benchmark.py --suite --output after.json --baseline before.json
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Optional
+import cv2
+import numba
+import numpy as np
+from matrix_graph import MatrixGraph, pick_endpoints
+from packed_graph import pack_graph
+from image_processing import MazePreprocessor, PIPELINE_STAGES, preprocess_maze, crop_image, \
+    thin_maze
+import solver
+import kernels
+from contraction import ContractedGraph
+from landmarks import LandmarkIndex
+from precompile import precompile
+import maze_generator
+
+BUNDLED_MAZES = ['mazes/maze.png', 'mazes/maze2.jpg', 'mazes/maze3.png']
+ALGORITHM_NAMES = ['breadth_first_search', 'depth_first_search_iterative', 'a_star']
+BIDIRECTIONAL_NAMES = {'breadth_first_search': 'bidirectional_breadth_first_search',
+                       'a_star': 'bidirectional_a_star'}
+JUMP_POINT_NAMES = ['jump_point_search', 'jump_point_search_plus']
+
+# The side lengths in pixels of the synthetic mazes used by the suite
+SYNTHETIC_SIZES = [1024, 2048, 4096, 8192]
+# The number of closest_path calls timed per maze
+CLOSEST_PATH_QUERIES = 100
+# The number of random start and target pairs timed by compare_landmarks
+LANDMARK_QUERIES = 100
+# The number of pixels benchmark_neighbours calls the neighbour methods on from Python
+NEIGHBOUR_PYTHON_CALLS = 20000
+# The approximate path lengths of the corridors timed by benchmark_corridors
+CORRIDOR_LENGTHS = [25000, 100000, 400000]
+# The program benchmark_startup runs in a new process, which prints the timings of precompile
+STARTUP_SCRIPT = 'import json, precompile; print(json.dumps(precompile.precompile()))'
+# A stage is reported as a regression if its median time grew by more than this factor
+REGRESSION_FACTOR = 1.25
+
+
+def time_search(search: Callable, graph: MatrixGraph, start: tuple, target: tuple,
+                repeats: int = 5) -> tuple[float, solver.SearchResult]:
+    """
+    Return the best wall time in seconds out of repeats runs of search, and its SearchResult.
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        begin = time.perf_counter()
+        result = search(graph, start, target)
+        best = min(best, time.perf_counter() - begin)
+    return best, result
+
+
+def compare_search_backends(maze_path: str, repeats: int = 5) -> list[dict]:
+    """
+    Return one row per algorithm comparing solver.py against kernels.py on the maze at
+    maze_path.
+    """
+    _, grid = preprocess_maze(maze_path)
+    graph = MatrixGraph(grid)
+    start, target = pick_endpoints(grid)
+
+    rows = []
+    for name in ALGORITHM_NAMES:
+        # Run the kernel once so compilation is not included in the timings
+        getattr(kernels, name)(graph, start, target)
+
+        interpreted, result = time_search(getattr(solver, name), graph, start, target, repeats)
+        compiled, compiled_result = time_search(getattr(kernels, name), graph, start, target,
+                                                repeats)
+        rows.append({'maze': maze_path, 'algorithm': name,
+                     'interpreted_s': interpreted, 'compiled_s': compiled,
+                     'speedup': interpreted / compiled,
+                     'expanded': result.expanded, 'compiled_expanded': compiled_result.expanded,
+                     'path_length': len(compiled_result.path)})
+    return rows
+
+
+def compare_bidirectional(maze_path: str, repeats: int = 5) -> list[dict]:
+    """
+    Return one row per algorithm in BIDIRECTIONAL_NAMES comparing the kernel against its
+    bidirectional version on the maze at maze_path.
+    """
+    _, grid = preprocess_maze(maze_path)
+    graph = MatrixGraph(grid)
+    start, target = pick_endpoints(grid)
+
+    rows = []
+    for name, bidirectional_name in BIDIRECTIONAL_NAMES.items():
+        # Run both kernels once so compilation is not included in the timings
+        getattr(kernels, name)(graph, start, target)
+        getattr(kernels, bidirectional_name)(graph, start, target)
+
+        one_way, result = time_search(getattr(kernels, name), graph, start, target, repeats)
+        two_way, bidirectional_result = time_search(getattr(kernels, bidirectional_name), graph,
+                                                    start, target, repeats)
+        rows.append({'maze': maze_path, 'algorithm': name,
+                     'one_way_s': one_way, 'bidirectional_s': two_way,
+                     'expanded': result.expanded,
+                     'bidirectional_expanded': bidirectional_result.expanded})
+    return rows
+
+
+def compare_jump_points(maze_path: str, repeats: int = 5) -> list[dict]:
+    """
+    Return one row per algorithm in JUMP_POINT_NAMES comparing it against the A* kernel on the
+    maze at maze_path. The time to build the JPS+ jump table is reported separately.
+    """
+    _, grid = preprocess_maze(maze_path)
+    graph = MatrixGraph(grid)
+    start, target = pick_endpoints(grid)
+
+    # Run A* once so compilation is not included in the timings
+    kernels.a_star(graph, start, target)
+    a_star_time, a_star_result = time_search(kernels.a_star, graph, start, target, repeats)
+    MatrixGraph(np.ones((3, 3), dtype=np.uint8)).build_jump_table()
+    begin = time.perf_counter()
+    graph.build_jump_table()
+    build = time.perf_counter() - begin
+
+    rows = []
+    for name in JUMP_POINT_NAMES:
+        getattr(kernels, name)(graph, start, target)
+        jump_time, result = time_search(getattr(kernels, name), graph, start, target, repeats)
+        rows.append({'maze': maze_path, 'algorithm': name, 'a_star_s': a_star_time,
+                     'jump_s': jump_time, 'build_s': build if name.endswith('plus') else 0.0,
+                     'a_star_expanded': a_star_result.expanded, 'jump_expanded': result.expanded,
+                     'same_cost': bool(np.isclose(solver.path_cost(a_star_result.path),
+                                                  solver.path_cost(result.path)))})
+    return rows
+
+
+def compare_contraction(maze_path: str, repeats: int = 5) -> dict:
+    """
+    Return a row comparing A* on the full pixel grid against A* on the ContractedGraph of the
+    maze at maze_path.
+    """
+    _, grid = preprocess_maze(maze_path)
+    graph = MatrixGraph(grid)
+    start, target = pick_endpoints(grid)
+
+    begin = time.perf_counter()
+    contracted = ContractedGraph(graph)
+    build = time.perf_counter() - begin
+
+    # Run both searches once so compilation is not included in the timings
+    kernels.a_star(graph, start, target)
+    contracted.a_star(start, target)
+    pixel_time, pixel_result = time_search(kernels.a_star, graph, start, target, repeats)
+    contracted_time, contracted_result = time_search(
+        lambda _, source, sink: contracted.a_star(source, sink), graph, start, target, repeats)
+
+    return {'maze': maze_path, 'pixel_nodes': int(np.count_nonzero(grid)),
+            'contracted_nodes': len(contracted.nodes), 'contracted_edges': contracted.edge_count,
+            'build_s': build, 'pixel_s': pixel_time, 'contracted_s': contracted_time,
+            'pixel_expanded': pixel_result.expanded,
+            'contracted_expanded': contracted_result.expanded}
+
+
+def compare_landmarks(maze_path: str, queries: int = LANDMARK_QUERIES, seed: int = 0) -> dict:
+    """
+    Return a row comparing A* with the octile heuristic against A* with the landmark heuristics
+    of a LandmarkIndex, over queries random start and target pairs in the largest connected part
+    of the maze at maze_path.
+    """
+    _, grid = preprocess_maze(maze_path)
+    graph = MatrixGraph(grid)
+
+    # Build a tiny index first so compilation is not included in the build time
+    LandmarkIndex(MatrixGraph(np.ones((3, 3), dtype=np.uint8)))
+    begin = time.perf_counter()
+    index = LandmarkIndex(graph)
+    build = time.perf_counter() - begin
+
+    pixels = np.argwhere(graph.labels == 1 + int(np.argmax(graph.component_sizes())))
+    rng = np.random.default_rng(seed)
+    pairs = [(tuple(pixels[i].tolist()), tuple(pixels[j].tolist()))
+             for i, j in rng.integers(len(pixels), size=(queries, 2))]
+
+    # Run both searches once so compilation is not included in the timings
+    kernels.a_star(graph, *pairs[0])
+    index.a_star(*pairs[0])
+
+    row = {'maze': maze_path, 'landmarks': len(index.landmarks), 'table_bytes': index.nbytes,
+           'build_s': build}
+    for key, search in [('octile', lambda start, target: kernels.a_star(graph, start, target)),
+                        ('landmark', index.a_star)]:
+        begin = time.perf_counter()
+        row[f'{key}_expanded'] = sum(search(start, target).expanded for start, target in pairs)
+        row[f'{key}_s'] = time.perf_counter() - begin
+    return row
+
+
+def compare_counters(maze_path: str, repeats: int = 20) -> dict:
+    """
+    Return a row comparing breadth_first_search_kernel with counters against the version numba
+    compiles for counters=None, between the ends of the largest connected part of the maze at
+    maze_path. Only the kernel itself is timed, not resetting parent before it.
+
+    Breadth first search does the least work per pixel of the kernels, so it is where keeping
+    the counters of solver.COUNTERS costs the most relative to the search itself.
+    """
+    _, grid = preprocess_maze(maze_path)
+    start, target = pick_endpoints(grid)
+    rows = grid.shape[1]
+    start_id, target_id = start[0] * rows + start[1], target[0] * rows + target[1]
+    parent = np.empty(grid.size, dtype=np.int32)
+    order = np.empty(grid.size, dtype=np.int32)
+
+    row = {'maze': maze_path}
+    for key, counters in [('counted', np.zeros(len(solver.COUNTERS), dtype=np.int64)),
+                          ('uncounted', None)]:
+        times = []
+        # The first run compiles the kernel, so it is not timed
+        for _ in range(repeats + 1):
+            parent.fill(-1)
+            begin = time.perf_counter()
+            row['expanded'] = kernels.breadth_first_search_kernel(grid, start_id, target_id,
+                                                                  parent, order, counters)
+            times.append(time.perf_counter() - begin)
+        row[f'{key}_s'] = timing_stats(times[1:])['median_s']
+    row['overhead'] = row['counted_s'] / row['uncounted_s'] - 1
+    return row
+
+
+@numba.njit
+def _count_listed_neighbours(graph: MatrixGraph, pixels: np.ndarray) -> int:
+    """
+    Return the total number of neighbours of pixels, found with get_valid_neighbours
+    """
+    total = 0
+    for i in range(pixels.shape[0]):
+        total += len(graph.get_valid_neighbours(pixels[i, 0], pixels[i, 1]))
+    return total
+
+
+@numba.njit
+def _count_masked_neighbours(graph: MatrixGraph, pixels: np.ndarray) -> int:
+    """
+    Return the total number of neighbours of pixels, found with neighbour_mask
+    """
+    total = 0
+    for i in range(pixels.shape[0]):
+        mask = graph.neighbour_mask(pixels[i, 0], pixels[i, 1])
+        while mask:
+            mask &= mask - 1
+            total += 1
+    return total
+
+
+@numba.njit
+def _count_filled_neighbours(graph: MatrixGraph, pixels: np.ndarray) -> int:
+    """
+    Return the total number of neighbours of pixels, found with fill_neighbours
+    """
+    out = np.empty(8, dtype=np.int64)
+    total = 0
+    for i in range(pixels.shape[0]):
+        total += graph.fill_neighbours(pixels[i, 0], pixels[i, 1], out)
+    return total
+
+
+def benchmark_neighbours(maze_path: str, repeats: int = 5) -> list[dict]:
+    """
+    Return one row per way of finding the neighbours of a pixel, with the median time per call
+    in nanoseconds over every path pixel of the maze at maze_path.
+
+    Calls from Python are timed on the first NEIGHBOUR_PYTHON_CALLS path pixels only.
+    """
+    _, grid = preprocess_maze(maze_path)
+    graph = MatrixGraph(grid)
+    pixels = np.argwhere(grid == 1)
+    python_pixels = [tuple(pixel) for pixel in pixels[:NEIGHBOUR_PYTHON_CALLS].tolist()]
+
+    # Build a graph with precomputed masks from the same grid, to compare against
+    masked_graph = MatrixGraph(grid)
+    masked_graph.build_neighbour_masks()
+
+    cases = [
+        ('get_valid_neighbours (python)', len(python_pixels),
+         lambda: [graph.get_valid_neighbours(col, row) for col, row in python_pixels]),
+        ('neighbour_mask (python)', len(python_pixels),
+         lambda: [graph.neighbour_mask(col, row) for col, row in python_pixels]),
+        ('get_valid_neighbours (jit)', len(pixels),
+         lambda: _count_listed_neighbours(graph, pixels)),
+        ('fill_neighbours (jit)', len(pixels), lambda: _count_filled_neighbours(graph, pixels)),
+        ('neighbour_mask (jit)', len(pixels), lambda: _count_masked_neighbours(graph, pixels)),
+        ('neighbour_mask, precomputed (jit)', len(pixels),
+         lambda: _count_masked_neighbours(masked_graph, pixels))
+    ]
+    rows = []
+    for method, calls, function in cases:
+        # Call the function once so compilation is not included in the timings
+        function()
+        _, stats = measure(function, repeats)
+        rows.append({'maze': maze_path, 'method': method,
+                     'ns_per_call': stats['median_s'] / calls * 1e9})
+    return rows
+
+
+def corridor_grid(length: int, width: int = 1000) -> np.ndarray:
+    """
+    Return the uint8 grid of a single corridor at least length pixels long that winds back and
+    forth across lanes width pixels wide, starting at (0, 0).
+    """
+    lanes = max(1, -(-length // width))
+    grid = np.zeros((width, 2 * lanes - 1), dtype=np.uint8)
+    grid[:, ::2] = 1
+    # Join every lane to the next one, alternately at its right and left end
+    grid[-1, 1::4] = 1
+    grid[0, 3::4] = 1
+    return grid
+
+
+def benchmark_corridors(lengths: list[int], repeats: int = 3) -> list[dict]:
+    """
+    Return one row per corridor length in lengths, timing breadth first search along the whole
+    of a corridor_grid with solver.py and kernels.py, and reconstructing its path with
+    solver.find_path.
+
+    Every step of these takes constant time, so the time per path pixel should stay about the
+    same as the corridor gets longer.
+    """
+    rows = []
+    for length in lengths:
+        grid = corridor_grid(length)
+        graph = MatrixGraph(grid)
+        target = (grid.shape[0] - 1 if grid.shape[1] % 4 == 1 else 0, grid.shape[1] - 1)
+
+        kernels.breadth_first_search(graph, (0, 0), target)
+        result, solver_stats = measure(
+            lambda: solver.breadth_first_search(graph, (0, 0), target), repeats)
+        _, kernel_stats = measure(lambda: kernels.breadth_first_search(graph, (0, 0), target),
+                                  repeats)
+        parents = dict(zip(result.path[1:], result.path[:-1]))
+        _, path_stats = measure(lambda: solver.find_path(parents, (0, 0), target), repeats)
+
+        pixels = len(result.path)
+        rows.append({'path_length': pixels, 'solver_s': solver_stats['median_s'],
+                     'kernel_s': kernel_stats['median_s'], 'find_path_s': path_stats['median_s'],
+                     'solver_ns_per_pixel': solver_stats['median_s'] / pixels * 1e9,
+                     'kernel_ns_per_pixel': kernel_stats['median_s'] / pixels * 1e9,
+                     'find_path_ns_per_pixel': path_stats['median_s'] / pixels * 1e9})
+    return rows
+
+
+def synthetic_maze_image(size: int, corridor: int = 4, seed: int = 0) -> np.ndarray:
+    """
+    Return a BGR image of a braided recursive backtracker maze, about size x size pixels, with
+    corridors and walls corridor pixels wide.
+    """
+    # render_image draws 2 * cells + 1 blocks plus a margin of 2 blocks on each side
+    cells = max(1, (size // corridor - 5) // 2)
+    return maze_generator.generate_image(cells, cells, 'backtracker', 0.1, seed, corridor)
+
+
+def benchmark_startup(repeats: int = 3) -> list[dict]:
+    """
+    Return rows of how long a new Python process takes to import the program and run
+    precompile.precompile, first once with an empty numba cache and then repeats times with the
+    cache the first run filled.
+
+    The processes use a temporary directory as their NUMBA_CACHE_DIR, so the cache in
+    __pycache__ is neither used nor changed. The 'startup' rows time the whole process, and the
+    'startup/<step>' rows each step of precompile.
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as cache_directory:
+        environment = {**os.environ, 'NUMBA_CACHE_DIR': cache_directory}
+        for cache, runs in [('empty cache', 1), ('cached', repeats)]:
+            times = []
+            step_times = {}
+            for _ in range(runs):
+                begin = time.perf_counter()
+                output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT],
+                                        capture_output=True, text=True, check=True,
+                                        env=environment).stdout
+                times.append(time.perf_counter() - begin)
+                for step, seconds in json.loads(output.splitlines()[-1]).items():
+                    step_times.setdefault(step, []).append(seconds)
+            rows.append({'maze': f'startup ({cache})', 'stage': 'startup', **timing_stats(times)})
+            rows.extend({'maze': f'startup ({cache})', 'stage': f'startup/{step}',
+                         **timing_stats(step_times[step])} for step in step_times)
+    return rows
+
+
+def measure(function: Callable[[], Any], repeats: int, calls: int = 1) -> tuple[Any, dict]:
+    """
+    Return the value of function() and a dictionary of timing statistics in seconds per call
+    over repeats runs, where each run calls function calls times.
+
+    function is called once more with tracemalloc enabled to record the peak memory it allocates,
+    which includes arrays allocated by numpy and inside compiled numba code.
+    """
+    times = []
+    value = None
+    for _ in range(repeats):
+        begin = time.perf_counter()
+        for _ in range(calls):
+            value = function()
+        times.append((time.perf_counter() - begin) / calls)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return value, {**timing_stats(times, calls), 'peak_bytes': peak}
+
+
+def timing_stats(times: list[float], calls: int = 1) -> dict:
+    """
+    Return a dictionary of the median, percentiles and extremes of times, the seconds per call of
+    every run, where each run made calls calls
+    """
+    return {'repeats': len(times), 'calls': calls,
+            'median_s': float(np.median(times)),
+            'p10_s': float(np.percentile(times, 10)),
+            'p90_s': float(np.percentile(times, 90)),
+            'min_s': float(np.min(times)), 'max_s': float(np.max(times))}
+
+
+def preprocessing_stages(image: np.ndarray, rectangular: bool = True,
+                         repeats: int = 5) -> tuple[dict, dict[str, dict]]:
+    """
+    Return the timing statistics of running a MazePreprocessor on the BGR maze image, and the
+    timing statistics of each of its stages, collected through its on_stage hook.
+    """
+    stage_times = {}
+
+    def record(stage: str, seconds: float) -> None:
+        stage_times.setdefault(stage, []).append(seconds)
+
+    preprocessor = MazePreprocessor(record)
+    _, stats = measure(lambda: preprocessor.process(image, rectangular), repeats)
+    # measure runs the pipeline once more to record its memory, which is not timed
+    return stats, {stage: timing_stats(stage_times[stage][:repeats])
+                   for stage in PIPELINE_STAGES if stage in stage_times}
+
+
+def benchmark_stages(name: str, image: np.ndarray, rectangular: bool = True,
+                     repeats: int = 5) -> list[dict]:
+    """
+    Return one row per stage of preprocessing and solving the BGR maze image, labelled with
+    name.
+
+    The stages are crop_image (for rectangular mazes), thin_maze (thresholding plus thinning),
+    the whole MazePreprocessor pipeline and each of its stages, MatrixGraph construction,
+    building the closest path map, closest_path, labelling the connected components, building
+    the JPS+ jump table and every search kernel, followed by packing the grid into a PackedGraph,
+    its closest_path and every search kernel on it, as 'packed/<stage>'.
+
+    The MatrixGraph and pack_graph rows record the bytes of their grid as grid_bytes, and the
+    build_components rows record the bytes of the graph with everything but the jump table built
+    as graph_bytes, which is what batch.py keeps in memory for every search but JPS+.
+    """
+    rows = []
+
+    def add_row(stage: str, stats: dict, **extra: Any) -> None:
+        rows.append({'maze': name, 'width': image.shape[1], 'height': image.shape[0],
+                     'stage': stage, **stats, **extra})
+
+    cropped = image
+    if rectangular:
+        cropped, stats = measure(lambda: crop_image(image), repeats)
+        add_row('crop_image', stats)
+    grid, stats = measure(lambda: thin_maze(cropped, rectangular), repeats)
+    add_row('thin_maze', stats)
+    stats, stage_stats = preprocessing_stages(image, rectangular, repeats)
+    add_row('MazePreprocessor', stats)
+    for stage, stats in stage_stats.items():
+        add_row(f'MazePreprocessor/{stage}', stats)
+    grid = np.ascontiguousarray(grid, dtype=np.uint8)
+    graph, stats = measure(lambda: MatrixGraph(grid), repeats)
+    add_row('MatrixGraph', stats, grid_bytes=grid.nbytes)
+    _, stats = measure(lambda: MatrixGraph(grid).build_nearest_map(), repeats)
+    add_row('build_nearest_map', stats)
+    graph.build_nearest_map()
+
+    # Query points a few pixels away from random path pixels, as if clicked in the GUI
+    rng = np.random.default_rng(0)
+    pixels = np.argwhere(grid == 1)
+    points = pixels[rng.integers(len(pixels), size=CLOSEST_PATH_QUERIES)] \
+        + rng.integers(-3, 4, size=(CLOSEST_PATH_QUERIES, 2))
+    points = [(int(col), int(row)) for col, row in points]
+    queries = iter(points * (repeats + 1))
+    _, stats = measure(lambda: graph.closest_path(next(queries)), repeats,
+                       CLOSEST_PATH_QUERIES)
+    add_row('closest_path', stats)
+    _, stats = measure(lambda: MatrixGraph(grid).build_components(), repeats)
+    add_row('build_components', stats, components=graph.component_count(),
+            graph_bytes=grid.nbytes + graph.nearest.nbytes + graph.labels.nbytes
+            + graph.sizes.nbytes)
+    _, stats = measure(lambda: MatrixGraph(grid).build_jump_table(), repeats)
+    add_row('build_jump_table', stats)
+    graph.build_jump_table()
+
+    start, target = pick_endpoints(grid)
+    algorithms = ALGORITHM_NAMES + list(BIDIRECTIONAL_NAMES.values()) + JUMP_POINT_NAMES
+    for algorithm in algorithms:
+        # Run the kernel once so compilation is not included in the timings
+        search = getattr(kernels, algorithm)
+        search(graph, start, target)
+        result, stats = measure(lambda: search(graph, start, target), repeats)
+        add_row(algorithm, stats, expanded=result.expanded, path_length=len(result.path))
+
+    packed, stats = measure(lambda: pack_graph(grid), repeats)
+    add_row('pack_graph', stats, grid_bytes=packed.graph.nbytes)
+    queries = iter(points * (repeats + 1))
+    _, stats = measure(lambda: packed.closest_path(next(queries)), repeats,
+                       CLOSEST_PATH_QUERIES)
+    add_row('packed/closest_path', stats)
+    _, stats = measure(lambda: pack_graph(grid).build_components(), repeats)
+    packed.build_components()
+    add_row('packed/build_components', stats, graph_bytes=packed.nbytes())
+    packed.build_jump_table()
+    for algorithm in algorithms:
+        search = getattr(kernels, algorithm)
+        search(packed, start, target)
+        result, stats = measure(lambda: search(packed, start, target), repeats)
+        add_row(f'packed/{algorithm}', stats, expanded=result.expanded,
+                path_length=len(result.path))
+    return rows
+
+
+def run_suite(sizes: list[int], repeats: int = 5) -> dict:
+    """
+    Return the metadata and stage rows of benchmarking every maze in the mazes folder and a
+    synthetic maze of each size in sizes.
+    """
+    rows = benchmark_startup(repeats)
+    print('Benchmarked startup')
+
+    # Compile thinning, MatrixGraph and its methods first, so compilation is not included in the
+    # timings
+    thin_maze(np.zeros((3, 3, 3), dtype=np.uint8))
+    precompile()
+
+    for maze_path in sorted(glob.glob('mazes/*')):
+        image = cv2.resize(cv2.imread(maze_path), (1280, 720))
+        # Following the GUI, file names that start with 'c' are circular mazes
+        rectangular = os.path.basename(maze_path)[0] != 'c'
+        rows.extend(benchmark_stages(maze_path, image, rectangular, repeats))
+        print(f'Benchmarked {maze_path}, {_grid_bytes(rows, maze_path)}')
+    for size in sizes:
+        rows.extend(benchmark_stages(f'synthetic {size}', synthetic_maze_image(size), True,
+                                     repeats))
+        print(f'Benchmarked synthetic {size}, {_grid_bytes(rows, f"synthetic {size}")}')
+    return {'metadata': environment_metadata(), 'results': rows}
+
+
+def _grid_bytes(rows: list[dict], name: str) -> str:
+    """
+    Return a description of the memory of the MatrixGraph and the PackedGraph of the maze name in
+    the rows of benchmark_stages
+    """
+    grid = {row['stage']: row['grid_bytes'] for row in rows
+            if row['maze'] == name and 'grid_bytes' in row}
+    graph = {row['stage']: row['graph_bytes'] for row in rows
+             if row['maze'] == name and 'graph_bytes' in row}
+    return f'grid {grid["MatrixGraph"]} B packed {grid["pack_graph"]} B, graph ' \
+           f'{graph["build_components"]} B packed {graph["packed/build_components"]} B'
+
+
+def environment_metadata() -> dict:
+    """
+    Return a dictionary describing the machine, library versions and commit the suite ran on
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': commit, 'python': platform.python_version(),
+            'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count(), 'numpy': np.__version__,
+            'numba': numba.__version__, 'opencv': cv2.__version__}
+
+
+def find_regressions(results: dict, baseline: dict,
+                     factor: float = REGRESSION_FACTOR) -> list[str]:
+    """
+    Return a description of every (maze, stage) whose median time in results is more than
+    factor times its median time in baseline
+    """
+    previous = {(row['maze'], row['stage']): row for row in baseline['results']}
+    regressions = []
+    for row in results['results']:
+        old = previous.get((row['maze'], row['stage']))
+        if old is not None and row['median_s'] > factor * old['median_s']:
+            regressions.append(f'{row["maze"]} {row["stage"]}: {old["median_s"]:.4f}s -> '
+                               f'{row["median_s"]:.4f}s')
+    return regressions
+
+
+def print_comparisons() -> None:
+    """
+    Print the comparisons between the solvers, kernels, ContractedGraph and LandmarkIndex on the
+    bundled mazes
+    """
+    print(f'{"maze":<18}{"algorithm":<30}{"interpreted":>12}{"compiled":>12}{"speedup":>10}')
+    for maze in BUNDLED_MAZES:
+        for row in compare_search_backends(maze):
+            print(f'{row["maze"]:<18}{row["algorithm"]:<30}{row["interpreted_s"]:>12.4f}'
+                  f'{row["compiled_s"]:>12.4f}{row["speedup"]:>10.1f}')
+
+    print()
+    print(f'{"maze":<18}{"algorithm":<30}{"expanded":>10}{"bidirectional":>15}'
+          f'{"time":>10}{"bidirectional":>15}')
+    for maze in BUNDLED_MAZES:
+        for row in compare_bidirectional(maze):
+            print(f'{row["maze"]:<18}{row["algorithm"]:<30}{row["expanded"]:>10}'
+                  f'{row["bidirectional_expanded"]:>15}{row["one_way_s"]:>10.4f}'
+                  f'{row["bidirectional_s"]:>15.4f}')
+
+    print()
+    print(f'{"maze":<18}{"algorithm":<26}{"expanded":>10}{"jump":>8}{"A*":>10}{"jump":>10}'
+          f'{"table":>10}{"same cost":>11}')
+    for maze in BUNDLED_MAZES:
+        for row in compare_jump_points(maze):
+            print(f'{row["maze"]:<18}{row["algorithm"]:<26}{row["a_star_expanded"]:>10}'
+                  f'{row["jump_expanded"]:>8}{row["a_star_s"]:>10.4f}{row["jump_s"]:>10.4f}'
+                  f'{row["build_s"]:>10.4f}{str(row["same_cost"]):>11}')
+
+    print()
+    print(f'{"maze":<18}{"nodes":>10}{"contracted":>12}{"expanded":>10}{"contracted":>12}'
+          f'{"A*":>10}{"contracted":>12}')
+    for maze in BUNDLED_MAZES:
+        row = compare_contraction(maze)
+        print(f'{row["maze"]:<18}{row["pixel_nodes"]:>10}{row["contracted_nodes"]:>12}'
+              f'{row["pixel_expanded"]:>10}{row["contracted_expanded"]:>12}'
+              f'{row["pixel_s"]:>10.4f}{row["contracted_s"]:>12.4f}')
+
+    print()
+    print(f'{"maze":<18}{"landmarks":>10}{"build":>10}{"expanded":>12}{"landmark":>12}'
+          f'{"A*":>10}{"landmark":>10}')
+    for maze in BUNDLED_MAZES:
+        row = compare_landmarks(maze)
+        print(f'{row["maze"]:<18}{row["landmarks"]:>10}{row["build_s"]:>10.4f}'
+              f'{row["octile_expanded"]:>12}{row["landmark_expanded"]:>12}'
+              f'{row["octile_s"]:>10.4f}{row["landmark_s"]:>10.4f}')
+
+    print()
+    print(f'{"maze":<18}{"expanded":>10}{"BFS ms":>10}{"uncounted ms":>14}{"overhead":>10}')
+    for maze in BUNDLED_MAZES:
+        row = compare_counters(maze)
+        print(f'{row["maze"]:<18}{row["expanded"]:>10}{row["counted_s"] * 1000:>10.3f}'
+              f'{row["uncounted_s"] * 1000:>14.3f}{row["overhead"]:>10.1%}')
+
+    print()
+    print(f'{"maze":<18}{"preprocessing stage":<20}{"median ms":>10}')
+    for maze in BUNDLED_MAZES:
+        stats, stage_stats = preprocessing_stages(cv2.resize(cv2.imread(maze), (1280, 720)))
+        for stage, row in stage_stats.items():
+            print(f'{maze:<18}{stage:<20}{row["median_s"] * 1000:>10.2f}')
+        print(f'{maze:<18}{"total":<20}{stats["median_s"] * 1000:>10.2f}')
+
+    print()
+    print(f'{"maze":<18}{"neighbours of one pixel":<36}{"ns / call":>10}')
+    for row in benchmark_neighbours(BUNDLED_MAZES[0]):
+        print(f'{row["maze"]:<18}{row["method"]:<36}{row["ns_per_call"]:>10.1f}')
+
+    print()
+    print(f'{"corridor length":<18}{"ns / pixel:":<12}{"solver BFS":>12}{"kernel BFS":>12}'
+          f'{"find_path":>12}')
+    for row in benchmark_corridors(CORRIDOR_LENGTHS):
+        print(f'{row["path_length"]:<30}{row["solver_ns_per_pixel"]:>12.1f}'
+              f'{row["kernel_ns_per_pixel"]:>12.1f}{row["find_path_ns_per_pixel"]:>12.1f}')
+
+    print()
+    print(f'{"new process":<24}{"stage":<40}{"median s":>10}')
+    for row in benchmark_startup():
+        print(f'{row["maze"]:<24}{row["stage"]:<40}{row["median_s"]:>10.3f}')
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """
+    Parse the command line arguments in argv, then run the comparisons or the suite
+    """
+    parser = argparse.ArgumentParser(description='Benchmark preprocessing and search.')
+    parser.add_argument('--suite', action='store_true',
+                        help='time every stage separately and save the results')
+    parser.add_argument('--sizes', type=int, nargs='*', default=SYNTHETIC_SIZES,
+                        help='the side lengths of the synthetic mazes')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='the results of an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    if not args.suite:
+        print_comparisons()
+        return
+
+    results = run_suite(args.sizes, args.repeats)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f'Results written to {args.output}')
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file))
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        if not regressions:
+            print('No regressions')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,7 @@ CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
 from typing import Union
 import pygame
 from matrix_graph import MatrixGraph
+from text_cache import render_text
 
 
 class Button:
@@ -38,7 +39,7 @@ class Button:
         self._rect = rect
         self._text = text
         self._color = color
-        self._text_surface = pygame.font.SysFont('Arial', 20).render(self._text, True, (0, 0, 0))
+        self._text_surface = render_text(self._text)
         self._text_pos = self._compute_text_location()
 
     def _compute_text_location(self) -> tuple[int, int]:
@@ -59,6 +60,12 @@ class Button:
         pygame.draw.rect(display, self._color, self._rect)
         display.blit(self._text_surface, self._text_pos)
 
+    def get_rect(self) -> pygame.Rect:
+        """
+        Return the area of the display the button is drawn on
+        """
+        return pygame.Rect(self._rect)
+
     def check_pressed(self, posx: int, posy: int) -> bool:
         """
         Return True if the button has been pressed, return False otherwise
@@ -117,14 +124,17 @@ class ToggleButton(Button):
 
     def set_pos(self, graph: MatrixGraph, posx: int, posy: int) -> Union[None, tuple[int, int]]:
         """
-        Set the position of the button to be the closest on the path. If the point is too far
-        print an error message
+        Set the position of the button to be the closest on the path. If the point is not on
+        the maze, or the maze has no path, print an error message
         """
         if self.active:
+            if not (0 <= posx < graph.cols and 0 <= posy < graph.rows):
+                print('Select point on the maze')
+                return None
             try:
-                return graph.closest_path((posx, posy), 5)
+                return graph.closest_path((posx, posy))
             except IndexError:
-                print('Select point closer to path')
+                print('The maze does not contain a path')
                 return None
         else:
             return None
@@ -135,7 +145,7 @@ if __name__ == '__main__':
     import python_ta.contracts
     python_ta.contracts.check_all_contracts()
     python_ta.check_all(config={
-        'extra-imports': ['pygame', 'matrix_graph'],
+        'extra-imports': ['pygame', 'matrix_graph', 'text_cache'],
         'allowed-io': ['set_pos'],  # the names (strs) of functions that call print/open/input
         'max-line-length': 100,
         'disable': ['E1136']
@@ -51,9 +51,9 @@ class Timer:
         """
         return (self._milliseconds, self._seconds, self._minutes)
 
-    def get_text_surface(self) -> pygame.Surface:
+    def get_text(self) -> str:
         """
-        Get the python surface with the current time
+        Return the current time formatted as 'Timer: minutes:seconds:centiseconds'
         """
         mi = self._milliseconds % 1000 // 10
         s = self._seconds % 60
@@ -64,9 +64,7 @@ class Timer:
             s = f'0{s}'
         if m < 10:
             m = f'0{m}'
-        string = f'Timer: {m}:{s}:{mi}'
-        text_surface = pygame.font.SysFont('Arial', 20).render(string, True, (0, 0, 0))
-        return text_surface
+        return f'Timer: {m}:{s}:{mi}'
 
 
 if __name__ == '__main__':
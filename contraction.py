@@ -0,0 +1,380 @@
+"""
+contraction.py:
+Contains the ContractedGraph class which compresses the thinned maze into a small weighted graph.
+
+After thinning, almost every pixel of the maze is on a one pixel wide corridor and has exactly
+two neighbours. A ContractedGraph only keeps the junctions and dead ends (every path pixel that
+does not have exactly two neighbours) as nodes, and replaces every corridor between them with a
+single weighted edge. The pixels of each corridor are stored, so paths found on the contracted
+graph can be expanded back into pixels.
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import numba
+import numpy as np
+from matrix_graph import MatrixGraph
+from indexed_heap import IndexedMinHeap
+from solver import SearchResult, unreachable_result
+from kernels import NEIGHBOUR_COLS, NEIGHBOUR_ROWS, NEIGHBOUR_COSTS, ids_to_coords, \
+    octile_distance
+
+
+@numba.njit(cache=True)
+def count_neighbours(grid: np.ndarray) -> np.ndarray:
+    """
+    Return a uint8 array with the same shape as grid containing the number of path neighbours of
+    every pixel.
+    """
+    cols, rows = grid.shape
+    degrees = np.zeros(grid.shape, dtype=np.uint8)
+    for col in range(cols):
+        for row in range(rows):
+            if grid[col, row] == 1:
+                for k in range(8):
+                    n_col = col + NEIGHBOUR_COLS[k]
+                    n_row = row + NEIGHBOUR_ROWS[k]
+                    if 0 <= n_col < cols and 0 <= n_row < rows and grid[n_col, n_row] == 1:
+                        degrees[col, row] += 1
+    return degrees
+
+
+@numba.njit(cache=True)
+def walk_corridor(grid: np.ndarray, is_node: np.ndarray, origin: int, first: int, stop: int,
+                  interior: np.ndarray) -> tuple[int, float, int]:
+    """
+    Walk along the corridor that leaves the pixel id origin through its neighbour first, until
+    reaching a node, the pixel id stop or origin again.
+
+    Return a tuple of (the pixel id the walk ended on, the length of the walk, the number of
+    interior pixels), where the interior pixels are written into interior in walking order.
+    """
+    cols, rows = grid.shape
+    prev = origin
+    curr = first
+    length = _step_cost(prev, curr, rows)
+    count = 0
+
+    while not is_node[curr] and curr != stop and curr != origin:
+        interior[count] = curr
+        count += 1
+
+        # Every pixel that is not a node has exactly two neighbours, one of which is prev
+        col = curr // rows
+        row = curr % rows
+        following = -1
+        for k in range(8):
+            n_col = col + NEIGHBOUR_COLS[k]
+            n_row = row + NEIGHBOUR_ROWS[k]
+            if 0 <= n_col < cols and 0 <= n_row < rows and grid[n_col, n_row] == 1:
+                node = n_col * rows + n_row
+                if node != prev:
+                    following = node
+                    break
+        length += _step_cost(curr, following, rows)
+        prev = curr
+        curr = following
+
+    return curr, length, count
+
+
+@numba.njit(cache=True)
+def trace_corridors(grid: np.ndarray, is_node: np.ndarray, nodes: np.ndarray) \
+        -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Walk every corridor leaving every node in nodes.
+
+    Return the directed edges as a tuple of (source pixel ids, target pixel ids, lengths, offsets,
+    interior pixel ids), where the interior of edge i is interior[offsets[i]:offsets[i + 1]].
+    Corridors that lead back to the node they started from are dropped.
+    """
+    cols, rows = grid.shape
+    capacity = 8 * len(nodes)
+    sources = np.empty(capacity, dtype=np.int32)
+    targets = np.empty(capacity, dtype=np.int32)
+    lengths = np.empty(capacity, dtype=np.float64)
+    offsets = np.zeros(capacity + 1, dtype=np.int64)
+
+    # Every corridor pixel is walked over once from each end of its corridor
+    interior = np.empty(2 * np.count_nonzero(grid) + 1, dtype=np.int32)
+    edge_count = 0
+
+    for node in nodes:
+        col = node // rows
+        row = node % rows
+        for k in range(8):
+            n_col = col + NEIGHBOUR_COLS[k]
+            n_row = row + NEIGHBOUR_ROWS[k]
+            if 0 <= n_col < cols and 0 <= n_row < rows and grid[n_col, n_row] == 1:
+                offset = offsets[edge_count]
+                end, length, count = walk_corridor(grid, is_node, node, n_col * rows + n_row,
+                                                   -1, interior[offset:])
+                if end != node:
+                    sources[edge_count] = node
+                    targets[edge_count] = end
+                    lengths[edge_count] = length
+                    offsets[edge_count + 1] = offset + count
+                    edge_count += 1
+
+    return (sources[:edge_count], targets[:edge_count], lengths[:edge_count],
+            offsets[:edge_count + 1], interior[:offsets[edge_count]].copy())
+
+
+@numba.njit(cache=True)
+def _step_cost(node1: int, node2: int, rows: int) -> float:
+    """
+    Return the cost of moving between the adjacent pixel ids node1 and node2.
+    """
+    if node1 // rows != node2 // rows and node1 % rows != node2 % rows:
+        return NEIGHBOUR_COSTS[4]
+    else:
+        return NEIGHBOUR_COSTS[0]
+
+
+@numba.njit(cache=True)
+def contracted_a_star_kernel(node_pixels: np.ndarray, rows: int, first_edge: np.ndarray,
+                             edge_ends: np.ndarray, lengths: np.ndarray,
+                             extra_sources: np.ndarray, extra_ends: np.ndarray,
+                             extra_lengths: np.ndarray, start: int, target: int,
+                             parent: np.ndarray, parent_edge: np.ndarray,
+                             order: np.ndarray) -> int:
+    """
+    Run A* over the nodes of a contracted graph from the node index start to the node index
+    target, using the octile distance between the node pixels as the heuristic.
+
+    The edges leaving node i are edge_ends[first_edge[i]:first_edge[i + 1]], and the extra_*
+    arrays hold any temporary edges, whose edge ids continue on from the regular edges. parent
+    must be filled with -1. Return the number of nodes expanded, which are stored in order[:n]
+    in the order they were expanded. The previous node and the edge id used to reach every
+    visited node are stored in parent and parent_edge.
+    """
+    node_count = len(node_pixels)
+    base_count = len(first_edge) - 1
+    edge_count = len(edge_ends)
+    target_col = node_pixels[target] // rows
+    target_row = node_pixels[target] % rows
+    closed = np.zeros(node_count, dtype=np.bool_)
+    costs = np.empty(node_count, dtype=np.float64)
+
+    open_heap = IndexedMinHeap(node_count)
+    open_heap.push(start, 0.0)
+    costs[start] = 0.0
+    parent[start] = start
+    expanded = 0
+
+    while not open_heap.is_empty():
+        curr = open_heap.pop()
+        closed[curr] = True
+        order[expanded] = curr
+        expanded += 1
+        if curr == target:
+            break
+
+        if curr < base_count:
+            first = first_edge[curr]
+            last = first_edge[curr + 1]
+        else:
+            first = last = 0
+        for edge in range(first, last + len(extra_sources)):
+            if edge < last:
+                end = edge_ends[edge]
+                cost = costs[curr] + lengths[edge]
+                edge_id = edge
+            elif extra_sources[edge - last] == curr:
+                end = extra_ends[edge - last]
+                cost = costs[curr] + extra_lengths[edge - last]
+                edge_id = edge_count + edge - last
+            else:
+                continue
+
+            if not closed[end] and (parent[end] == -1 or cost < costs[end]):
+                costs[end] = cost
+                parent[end] = curr
+                parent_edge[end] = edge_id
+                pixel = node_pixels[end]
+                open_heap.push_or_decrease(
+                    end, cost + octile_distance(pixel // rows, pixel % rows,
+                                                target_col, target_row))
+
+    return expanded
+
+
+class ContractedGraph:
+    """
+    A weighted graph whose nodes are the junctions and dead ends of a thinned maze, and whose
+    edges are the corridors between them, weighted by their length in pixels (diagonal steps
+    cost sqrt(2)).
+
+    Instance Attributes:
+        - rows: The number of rows of the grid the graph was built from
+        - nodes: An array of the pixel ids of every node, in increasing order
+        - sources: An array of the pixel id of the node every directed edge starts at. Edges are
+                   sorted by their source.
+        - targets: An array of the pixel id of the node every directed edge ends at
+        - lengths: An array of the length of every directed edge
+        - offsets: An array where the interior pixels of edge i are
+                   interior[offsets[i]:offsets[i + 1]]
+        - interior: An array of the pixel ids of the corridors, in walking order
+
+    Private Instance Attributes:
+        - _graph: The MatrixGraph the graph was built from
+        - _grid: The uint8 grid of _graph
+        - _path_count: The number of path pixels in _grid
+        - _is_node: A bool array that marks which pixel ids are nodes
+        - _node_index: An array mapping each pixel id to its index in nodes, or -1
+        - _first_edge: An array where the edges leaving nodes[i] are
+                       range(_first_edge[i], _first_edge[i + 1])
+        - _edge_ends: An array of the index in nodes of the end of every directed edge
+
+    Sample Usage:
+    >>> grid = np.ones((5, 1), dtype=np.uint8)
+    >>> contracted = ContractedGraph(MatrixGraph(grid))
+    >>> len(contracted.nodes)
+    2
+    >>> contracted.a_star((0, 0), (4, 0)).path
+    [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0)]
+    """
+
+    rows: int
+    nodes: np.ndarray
+    sources: np.ndarray
+    targets: np.ndarray
+    lengths: np.ndarray
+    offsets: np.ndarray
+    interior: np.ndarray
+    _graph: MatrixGraph
+    _grid: np.ndarray
+    _path_count: int
+    _is_node: np.ndarray
+    _node_index: np.ndarray
+    _first_edge: np.ndarray
+    _edge_ends: np.ndarray
+
+    def __init__(self, graph: MatrixGraph) -> None:
+        """
+        Build the contracted graph of graph
+        """
+        self._graph = graph
+        self._grid = graph.graph
+        self.rows = self._grid.shape[1]
+
+        path_pixels = self._grid.ravel() == 1
+        self._path_count = int(np.count_nonzero(path_pixels))
+        self._is_node = path_pixels & (count_neighbours(self._grid).ravel() != 2)
+        self.nodes = np.flatnonzero(self._is_node).astype(np.int32)
+
+        # trace_corridors visits the nodes in increasing order, so the edges come out sorted by
+        # their source
+        self.sources, self.targets, self.lengths, self.offsets, self.interior = \
+            trace_corridors(self._grid, self._is_node, self.nodes)
+
+        self._node_index = np.full(self._grid.size, -1, dtype=np.int32)
+        self._node_index[self.nodes] = np.arange(len(self.nodes), dtype=np.int32)
+        self._first_edge = np.searchsorted(self.sources, np.append(self.nodes, self._grid.size))
+        self._edge_ends = self._node_index[self.targets]
+
+    @property
+    def edge_count(self) -> int:
+        """
+        Return the number of undirected edges (corridors) in the graph
+        """
+        return len(self.sources) // 2
+
+    def a_star(self, start: tuple, target: tuple) -> SearchResult:
+        """
+        Return the SearchResult of running A* on the contracted graph from start to target.
+
+        start and target do not need to be nodes; if they lie on a corridor they are attached to
+        the nodes at both ends of it for this search only. The trace of the result contains the
+        nodes that were expanded, and its path is expanded back into pixels.
+        """
+        rows = self.rows
+        start_id = start[0] * rows + start[1]
+        target_id = target[0] * rows + target[1]
+        if not self._graph.same_component(start, target):
+            return unreachable_result()
+        if start_id == target_id:
+            return SearchResult([start], np.array([start], dtype=np.int32))
+
+        # Pixels that are not nodes get temporary node indices after the regular nodes
+        node_pixels = np.append(self.nodes, [start_id, target_id]).astype(np.int32)
+        start_index = self._index_of(start_id, len(self.nodes))
+        target_index = self._index_of(target_id, len(self.nodes) + 1)
+
+        # Temporary edges are stored as (source index, end index, length, interior pixel ids)
+        extra_edges = []
+        for end, length, pixels in self._attach(start_id, target_id):
+            end_index = target_index if end == target_id else self._node_index[end]
+            extra_edges.append((start_index, end_index, length, pixels))
+        for end, length, pixels in self._attach(target_id, -1):
+            extra_edges.append((self._node_index[end], target_index, length, pixels[::-1]))
+
+        parent = np.full(len(node_pixels), -1, dtype=np.int32)
+        parent_edge = np.full(len(node_pixels), -1, dtype=np.int32)
+        order = np.empty(len(node_pixels), dtype=np.int32)
+        expanded = contracted_a_star_kernel(
+            node_pixels, rows, self._first_edge, self._edge_ends, self.lengths,
+            np.array([edge[0] for edge in extra_edges], dtype=np.int32),
+            np.array([edge[1] for edge in extra_edges], dtype=np.int32),
+            np.array([edge[2] for edge in extra_edges], dtype=np.float64),
+            start_index, target_index, parent, parent_edge, order)
+
+        trace = ids_to_coords(node_pixels[order[:expanded]], rows)
+        if parent[target_index] == -1:
+            return SearchResult([], trace)
+
+        # Walk back over the edges used, adding each node and the corridor leading to it
+        reversed_path = [target_id]
+        current = target_index
+        while current != start_index:
+            edge = parent_edge[current]
+            if edge < len(self.sources):
+                pixels = self.interior[self.offsets[edge]:self.offsets[edge + 1]]
+            else:
+                pixels = extra_edges[edge - len(self.sources)][3]
+            current = parent[current]
+            reversed_path.extend(pixels[::-1].tolist())
+            reversed_path.append(int(node_pixels[current]))
+
+        path = ids_to_coords(np.array(reversed_path[::-1], dtype=np.int32), rows)
+        return SearchResult([(col, row) for col, row in path.tolist()], trace)
+
+    def _index_of(self, pixel: int, temporary_index: int) -> int:
+        """
+        Return the node index of pixel, or temporary_index if pixel is not a node
+        """
+        if self._is_node[pixel]:
+            return int(self._node_index[pixel])
+        else:
+            return temporary_index
+
+    def _attach(self, pixel: int, stop: int) -> list[tuple[int, float, np.ndarray]]:
+        """
+        Return a list of (end, length, interior pixel ids) for the corridors leading from pixel
+        to the closest nodes (or to stop) on either side of it. If pixel is a node, return an
+        empty list since it is already part of the graph.
+        """
+        if self._is_node[pixel]:
+            return []
+
+        col, row = divmod(pixel, self.rows)
+        interior = np.empty(self._path_count, dtype=np.int32)
+        edges = []
+        for n_col, n_row in self._graph.get_valid_neighbours(col, row):
+            end, length, count = walk_corridor(self._grid, self._is_node, pixel,
+                                               n_col * self.rows + n_row, stop, interior)
+            if end != pixel:
+                edges.append((int(end), float(length), interior[:count].copy()))
+        return edges
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['numba', 'numpy', 'matrix_graph', 'indexed_heap', 'solver', 'kernels'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
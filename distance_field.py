@@ -0,0 +1,174 @@
+"""
+distance_field.py:
+Contains the DistanceField class, the lengths of the shortest paths from one source pixel to
+every pixel of a maze along with the shortest path tree, computed with a single search.
+
+Once a DistanceField is computed, the shortest path from its source to any number of targets
+is read off the tree in time proportional to the length of the path, and the field can be saved
+as a .npy file or a heatmap image. For example:
+
+    python distance_field.py mazes/maze.png --source 0 449 --heatmap field.png --npy field.npy
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import Optional
+import cv2
+import numpy as np
+from matrix_graph import MatrixGraph
+from image_processing import preprocess_maze
+from kernels import distance_field_kernel, ids_to_coords, walk_parents
+
+# The colours of the heatmap pixels that are walls or cannot be reached from the source (BGR)
+WALL_COLOUR = (0, 0, 0)
+UNREACHABLE_COLOUR = (128, 128, 128)
+
+
+@dataclass
+class DistanceField:
+    """
+    The shortest paths from source to every pixel of a MatrixGraph, where straight moves cost 1
+    and diagonal moves cost sqrt(2).
+
+    Instance Attributes:
+        - source: The (col, row) the paths start from
+        - distances: A (cols, rows) float array of the length of the shortest path from source to
+                     every pixel, or inf for pixels that cannot be reached
+        - parents: A (cols, rows) int32 array of the pixel id before every pixel on its shortest
+                   path, where the pixel id of (col, row) is col * rows + row. The parent of
+                   source is itself and the parent of pixels that cannot be reached is -1.
+        - reached: The number of pixels that can be reached from source, including itself
+
+    Representation Invariants:
+        - self.distances.shape == self.parents.shape
+
+    Sample Usage:
+    >>> field = distance_field(MatrixGraph(np.ones((3, 1), dtype=np.uint8)), (0, 0))
+    >>> field.path_to((2, 0))
+    [(0, 0), (1, 0), (2, 0)]
+    >>> field.farthest()
+    (2, 0)
+    """
+
+    source: tuple[int, int]
+    distances: np.ndarray
+    parents: np.ndarray
+    reached: int
+
+    def distance_to(self, target: tuple[int, int]) -> float:
+        """
+        Return the length of the shortest path from source to target, or inf if there is none
+        """
+        return float(self.distances[target[0], target[1]])
+
+    def path_to(self, target: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Return the shortest path from source to target as a list of (col, row) tuples, or an
+        empty list if target cannot be reached
+        """
+        rows = self.parents.shape[1]
+        if self.parents[target[0], target[1]] == -1:
+            return []
+        ids = walk_parents(self.parents.ravel(), self.source[0] * rows + self.source[1],
+                           target[0] * rows + target[1])
+        return [(col, row) for col, row in ids_to_coords(ids, rows).tolist()]
+
+    def paths_to(self, targets: list[tuple[int, int]]) -> list[list[tuple[int, int]]]:
+        """
+        Return the shortest path from source to every target in targets, as in path_to
+        """
+        return [self.path_to(target) for target in targets]
+
+    def farthest(self) -> tuple[int, int]:
+        """
+        Return the (col, row) of a pixel whose shortest path from source is the longest
+        """
+        finite = np.where(np.isfinite(self.distances), self.distances, -1.0)
+        col, row = np.unravel_index(np.argmax(finite), finite.shape)
+        return int(col), int(row)
+
+    def save_npy(self, path: str) -> None:
+        """
+        Save distances to the .npy file at path, with unreachable pixels stored as inf
+        """
+        np.save(path, self.distances)
+
+    def heatmap(self) -> np.ndarray:
+        """
+        Return a BGR image, in the same [row, col] layout as the maze images, where every pixel
+        that can be reached is coloured from blue (close to source) to red (farthest from it)
+        """
+        reachable = np.isfinite(self.distances.T)
+        longest = max(float(self.distances.T[reachable].max(initial=0.0)), 1.0)
+        scaled = np.zeros(reachable.shape, dtype=np.uint8)
+        scaled[reachable] = np.round(self.distances.T[reachable] * (255 / longest))
+        image = cv2.applyColorMap(scaled, cv2.COLORMAP_JET)
+        image[~reachable] = UNREACHABLE_COLOUR
+        return image
+
+    def save_heatmap(self, path: str, grid: Optional[np.ndarray] = None) -> None:
+        """
+        Save heatmap() as an image at path. If grid is given, its walls are drawn in WALL_COLOUR
+        instead of UNREACHABLE_COLOUR.
+        """
+        image = self.heatmap()
+        if grid is not None:
+            image[grid.T == 0] = WALL_COLOUR
+        cv2.imwrite(path, image)
+
+
+def distance_field(graph: MatrixGraph, source: tuple[int, int]) -> DistanceField:
+    """
+    Return the DistanceField of graph from source, computed with one run of Dijkstra's algorithm
+    over every pixel connected to source.
+
+    Raise a ValueError if source is not a path pixel of graph.
+    """
+    grid = graph.graph
+    if grid[source[0], source[1]] != 1:
+        raise ValueError(f'{source} is not a path pixel')
+    costs = np.full(grid.size, np.inf)
+    parents = np.full(grid.size, -1, dtype=np.int32)
+    order = np.empty(grid.size, dtype=np.int32)
+    reached = distance_field_kernel(grid, source[0] * grid.shape[1] + source[1], costs, parents,
+                                    order)
+    return DistanceField((int(source[0]), int(source[1])), costs.reshape(grid.shape),
+                         parents.reshape(grid.shape), reached)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """
+    Parse the command line arguments in argv, then compute the distance field of the maze and
+    save it
+    """
+    parser = argparse.ArgumentParser(description='Compute the distances from one point of a '
+                                                 'maze to every other point.')
+    parser.add_argument('maze', help='the maze image, or a .npy file of a MatrixGraph grid')
+    parser.add_argument('--source', type=int, nargs=2, metavar=('COL', 'ROW'), required=True,
+                        help='the point to measure from, moved to the closest path pixel')
+    parser.add_argument('--heatmap', help='the image file to save the heatmap to')
+    parser.add_argument('--npy', help='the .npy file to save the distances to')
+    parser.add_argument('--circular', action='store_true',
+                        help='skip cropping, for circular / non-rectangular mazes')
+    args = parser.parse_args(argv)
+
+    if args.maze.lower().endswith('.npy'):
+        grid = np.load(args.maze)
+    else:
+        _, grid = preprocess_maze(args.maze, not args.circular)
+    graph = MatrixGraph(np.ascontiguousarray(grid, dtype=np.uint8))
+    field = distance_field(graph, graph.closest_path(tuple(args.source)))
+
+    if args.heatmap is not None:
+        field.save_heatmap(args.heatmap, graph.graph)
+    if args.npy is not None:
+        field.save_npy(args.npy)
+    farthest = field.farthest()
+    print(f'Reached {field.reached} pixels from {field.source}, the farthest is {farthest} at '
+          f'a distance of {field.distance_to(farthest):.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,7 @@ CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
 
 from typing import Any, Union
 import pygame
+from text_cache import render_text
 
 
 class DropDown:
@@ -52,8 +53,7 @@ class DropDown:
 
         # Draw the rectangle and the text
         pygame.draw.rect(self._surface, self._active, menu_rectangle)
-        text_surface = pygame.font.SysFont('Arial', 20).render(self._items[0],
-                                                               True, (0, 0, 0))
+        text_surface = render_text(self._items[0])
         self._surface.blit(text_surface, text_surface.get_rect(center=menu_rectangle.center))
 
         # If the list is dropped down, draw the other items as well
@@ -62,8 +62,7 @@ class DropDown:
                 new_y = y + (i * h)
                 new_rect = pygame.Rect(x, new_y, w, h)
                 pygame.draw.rect(self._surface, self._not_active, new_rect)
-                new_text_surface = pygame.font.SysFont('Arial', 20).render(self._items[i],
-                                                                           True, (0, 0, 0))
+                new_text_surface = render_text(self._items[i])
                 self._surface.blit(new_text_surface,
                                    new_text_surface.get_rect(center=new_rect.center))
 
@@ -109,6 +108,16 @@ class DropDown:
         """
         self._items[0], self._items[swap] = self._items[swap], self._items[0]
 
+    def get_rect(self) -> pygame.Rect:
+        """
+        Return the area of the surface the menu is drawn on, which includes the other items
+        while the list is dropped down
+        """
+        x, y, w, h = self._rectangle
+        if self._dropped:
+            return pygame.Rect(x, y, w, h * len(self._items))
+        return pygame.Rect(x, y, w, h)
+
     def get_first(self) -> Any:
         """
         Return the first item in the item list
@@ -121,7 +130,7 @@ if __name__ == '__main__':
     import python_ta.contracts
     python_ta.contracts.check_all_contracts()
     python_ta.check_all(config={
-        'extra-imports': ['pygame', 'typing'],
+        'extra-imports': ['pygame', 'typing', 'text_cache'],
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'max-line-length': 100,
         'disable': ['E1136']
@@ -1,12 +1,285 @@
 """
 image_processing.py:
-Contains a method used to handle processing the input images
+Contains the methods used to handle processing the input images
 
 CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
 """
+import heapq
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
 import cv2
+import numba
 import numpy as np
 
+# The side length in pixels of the tiles preprocess_maze_tiled thresholds and thins at a time
+TILE_SIZE = 2048
+# The smallest number of pixels of every tile's surroundings that are thinned along with it.
+# preprocess_maze_tiled widens it to what tile_halo finds the widest corridor needs.
+TILE_HALO = 64
+# The factor preprocess_maze_tiled shrinks the image by to find its crop
+PREVIEW_SCALE = 8
+# The stages of MazePreprocessor, in the order they run. The crop stages (blur, crop_threshold
+# and contours) only run for rectangular mazes, and read and resize only run in preprocess.
+PIPELINE_STAGES = ['read', 'resize', 'grayscale', 'blur', 'crop_threshold', 'contours',
+                   'threshold', 'thinning']
+
+
+def _thinning_table() -> np.ndarray:
+    """
+    Return a (2, 256) bool array where [step, code] is whether sub-iteration step of Zhang-Suen
+    thinning removes a path pixel whose neighbours are the bits of code, starting from bit 0 for
+    the pixel above it and going clockwise
+    """
+    code = np.arange(256)
+    p2, p3, p4, p5, p6, p7, p8, p9 = ((code >> bit) & 1 for bit in range(8))
+    ring = [p2, p3, p4, p5, p6, p7, p8, p9, p2]
+    transitions = sum((ring[k] == 0) & (ring[k + 1] == 1) for k in range(8))
+    neighbours = p2 + p3 + p4 + p5 + p6 + p7 + p8 + p9
+    removable = (transitions == 1) & (neighbours >= 2) & (neighbours <= 6)
+    return np.stack([removable & (p2 * p4 * p6 == 0) & (p4 * p6 * p8 == 0),
+                     removable & (p2 * p4 * p8 == 0) & (p2 * p6 * p8 == 0)])
+
+
+# The removable pixels of each sub-iteration of Zhang-Suen thinning, as returned by
+# _thinning_table, which thin_binary looks up instead of testing them one condition at a time
+THINNING_TABLE = _thinning_table()
+
+
+@numba.njit(nogil=True, cache=True)
+def thin_binary(binary: np.ndarray) -> np.ndarray:
+    """
+    Return the Zhang-Suen thinning of the binary image (0 or 255), with 1 marking the pixels of
+    the 1 pixel wide paths and 0 every other pixel. This is the same thinning as
+    cv2.ximgproc.thinning, which returns 255 instead of 1.
+
+    Like cv2.ximgproc.thinning, every iteration first marks every pixel that is removable, by
+    looking up its neighbours in THINNING_TABLE, and then removes them all at once, and the
+    pixels on the border of the image are never removed.
+    A pixel with 8 path neighbours is never removable, so instead of testing every pixel in every
+    iteration, only the path pixels next to a background pixel are kept in a list and tested,
+    and the path pixels next to the removed pixels are added to it. This makes the cost depend
+    on the number of path pixels instead of the size of the image times the number of
+    iterations.
+    """
+    rows, cols = binary.shape
+    image = np.zeros((rows, cols), dtype=np.uint8)
+    path_pixels = 0
+    for i in range(rows):
+        for j in range(cols):
+            if binary[i, j] >= 128:
+                image[i, j] = 1
+                path_pixels += 1
+
+    # The rows and columns of the path pixels that might be removed. listed is 0 for the pixels
+    # that are not in the list, and otherwise 1 plus the number of times in a row the pixel was
+    # tested and kept without any of its neighbours being removed. Every path pixel is added at
+    # most once before it is removed, so the list always fits.
+    candidate_rows = np.empty(path_pixels, dtype=np.int32)
+    candidate_cols = np.empty(path_pixels, dtype=np.int32)
+    listed = np.zeros((rows, cols), dtype=np.uint8)
+    count = 0
+    for i in range(1, rows - 1):
+        for j in range(1, cols - 1):
+            if image[i, j] == 1 and (
+                    image[i - 1, j - 1] == 0 or image[i - 1, j] == 0 or image[i - 1, j + 1] == 0
+                    or image[i, j - 1] == 0 or image[i, j + 1] == 0
+                    or image[i + 1, j - 1] == 0 or image[i + 1, j] == 0
+                    or image[i + 1, j + 1] == 0):
+                candidate_rows[count] = i
+                candidate_cols[count] = j
+                listed[i, j] = 1
+                count += 1
+
+    changed = True
+    while changed:
+        changed = False
+        for step in range(2):
+            # Mark the removable pixels by setting bit 1, so the other tests still see them.
+            # Pixels that were removed, or kept by both sub-iterations with the same neighbours,
+            # which they will be until a neighbour is removed, are taken off the list.
+            kept = 0
+            for k in range(count):
+                i = candidate_rows[k]
+                j = candidate_cols[k]
+                if image[i, j] == 0 or listed[i, j] == 3:
+                    listed[i, j] = 0
+                    continue
+                candidate_rows[kept] = i
+                candidate_cols[kept] = j
+                kept += 1
+                code = (image[i - 1, j] & 1) | (image[i - 1, j + 1] & 1) << 1 \
+                    | (image[i, j + 1] & 1) << 2 | (image[i + 1, j + 1] & 1) << 3 \
+                    | (image[i + 1, j] & 1) << 4 | (image[i + 1, j - 1] & 1) << 5 \
+                    | (image[i, j - 1] & 1) << 6 | (image[i - 1, j - 1] & 1) << 7
+                if THINNING_TABLE[step, code]:
+                    image[i, j] = 3
+                else:
+                    listed[i, j] += 1
+            count = kept
+
+            # Remove the marked pixels and list their path neighbours again
+            for k in range(kept):
+                i = candidate_rows[k]
+                j = candidate_cols[k]
+                if image[i, j] != 3:
+                    continue
+                image[i, j] = 0
+                changed = True
+                for n_i in range(max(i - 1, 1), min(i + 2, rows - 1)):
+                    for n_j in range(max(j - 1, 1), min(j + 2, cols - 1)):
+                        if image[n_i, n_j] != 0:
+                            if listed[n_i, n_j] == 0:
+                                candidate_rows[count] = n_i
+                                candidate_cols[count] = n_j
+                                count += 1
+                            listed[n_i, n_j] = 1
+    return image
+
+
+class MazePreprocessor:
+    """
+    The pipeline that turns a maze image into the cropped image and the thinned grid returned by
+    preprocess_maze.
+
+    Every step runs once per maze: the image is converted to grayscale once and both the crop
+    and the thinning read that, the walls used to find the crop are inverted in place instead
+    of thresholded a second time, and only the two longest contours are kept instead of sorting
+    all of them. The intermediate images are kept between mazes of the same size, so running
+    one MazePreprocessor over many mazes does not allocate them again. A MazePreprocessor is not
+    safe to share between threads.
+
+    Instance Attributes:
+        - timings: Maps the name of every stage (see PIPELINE_STAGES) run on the last maze to the
+                   seconds it took
+        - on_stage: A function called with the name of every stage and the seconds it took as
+                    soon as the stage finishes, or None
+
+    Private Instance Attributes:
+        - _buffers: Maps the name of every intermediate image to the array it is stored in
+
+    Sample Usage:
+    >>> preprocessor = MazePreprocessor()
+    >>> cropped, grid = preprocessor.preprocess('mazes/maze.png')
+    >>> list(preprocessor.timings) == PIPELINE_STAGES
+    True
+    """
+
+    timings: dict[str, float]
+    on_stage: Optional[Callable[[str, float], None]]
+    _buffers: dict[str, np.ndarray]
+
+    def __init__(self, on_stage: Optional[Callable[[str, float], None]] = None) -> None:
+        """
+        Initialize a MazePreprocessor that reports the time of every stage to on_stage
+        """
+        self.timings = {}
+        self.on_stage = on_stage
+        self._buffers = {}
+
+    def preprocess(self, maze_path: str, rectangular: bool = True,
+                   size: tuple[int, int] = (1280, 720)) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the same tuple as preprocess_maze(maze_path, rectangular, size)
+        """
+        self.timings = {}
+        with self._stage('read'):
+            image = cv2.imread(maze_path)
+        with self._stage('resize'):
+            image = cv2.resize(image, size)
+        return self._process(image, rectangular)
+
+    def process(self, image: np.ndarray, rectangular: bool = True) \
+            -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the same tuple as preprocess_maze for the maze image, which has already been read
+        and resized. The cropped image is a view of image.
+        """
+        self.timings = {}
+        return self._process(image, rectangular)
+
+    def gray_crop_bounds(self, gray: np.ndarray) -> tuple[int, int, int, int]:
+        """
+        Return the bounds crop_bounds finds for the grayscale maze image gray
+        """
+        with self._stage('blur'):
+            blurred = cv2.GaussianBlur(gray, (3, 3), 0, dst=self._buffer('blurred', gray.shape))
+
+        # global threshold using Otsu, then invert it so the walls are white
+        # Note: Although unpacking like this results in one of the variables to be unused and makes
+        # PyTA heavily depressed, this is standard OpenCV notation.
+        # For reference, you may check docs.opencv.org/master/d7/d4d/tutorial_py_thresholding.html
+        with self._stage('crop_threshold'):
+            walls = self._buffer('walls', gray.shape)
+            ret_val, walls = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU,
+                                           dst=walls)
+            cv2.bitwise_not(walls, dst=walls)
+
+        with self._stage('contours'):
+            return _wall_bounds(walls)
+
+    def thin(self, gray: np.ndarray, rectangular: bool = True) -> np.ndarray:
+        """
+        Return the thinned maze grid of the cropped grayscale maze image gray, as described in
+        preprocess_maze.
+
+        The image is binarized with Otsu's method and then thinned to 1 pixel wide paths with
+        thin_binary.
+        """
+        # Global thresholding using Otsu's binarization
+        with self._stage('threshold'):
+            ret_val, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU,
+                                            dst=self._buffer('threshold', gray.shape))
+
+        with self._stage('thinning'):
+            thinned = thin_binary(thresh)
+
+        # cut borders
+        if not rectangular:
+            thinned = thinned[1: -1]
+        return np.swapaxes(thinned, 0, 1)
+
+    def _process(self, image: np.ndarray, rectangular: bool) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the tuple of process without resetting timings
+        """
+        with self._stage('grayscale'):
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY,
+                                dst=self._buffer('gray', image.shape[:2]))
+
+        # crop only works for rectangular mazes
+        if rectangular:
+            min_x, min_y, max_x, max_y = self.gray_crop_bounds(gray)
+            cropped = image[min_y: max_y, min_x: max_x]
+            gray = gray[min_y: max_y, min_x: max_x]
+        else:
+            cropped = image
+
+        return cropped, self.thin(gray, rectangular)
+
+    def _buffer(self, name: str, shape: tuple[int, ...]) -> np.ndarray:
+        """
+        Return the uint8 array of the given shape stored under name, allocating it if there is
+        none or it has a different shape
+        """
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self._buffers[name] = buffer
+        return buffer
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        """
+        Time the body of the with statement as the stage called name
+        """
+        begin = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - begin
+        self.timings[name] = seconds
+        if self.on_stage is not None:
+            self.on_stage(name, seconds)
+
 
 def crop_image(image: np.ndarray) -> np.ndarray:
     """
@@ -15,27 +288,26 @@ def crop_image(image: np.ndarray) -> np.ndarray:
     This function is used to find the two longest contours (edges) and trims the unnecessary parts
     of the image
     """
-    # convert image to grayscale and apply blur to reduce noise
-    image_gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-    blurred = cv2.GaussianBlur(image_gray, (3, 3), 0)
+    min_x, min_y, max_x, max_y = crop_bounds(image)
+    return image[min_y: max_y, min_x: max_x]
 
-    # global threshold using Otsu
-    # Note: Although unpacking like this results in one of the variables to be unused and makes
-    # PyTA heavily depressed, this is standard OpenCV notation.
-    # For reference, you may check docs.opencv.org/master/d7/d4d/tutorial_py_thresholding.html
 
-    ret1, thresh1 = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+def crop_bounds(image: np.ndarray) -> tuple[int, int, int, int]:
+    """
+    Return the (min x, min y, max x, max y) of the part of the maze image that crop_image keeps
+    """
+    return MazePreprocessor().gray_crop_bounds(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY))
 
-    # invert image color and find contours
-    ret2, thresh2 = cv2.threshold(thresh1, 150, 255, cv2.THRESH_BINARY_INV)
-    contours, hierarchy = cv2.findContours(thresh2, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
 
-    # create list of tuples with the contour itself and its arc length
-    # then sort by arc length and take the two longest
-    cont_len = [(cont, cv2.arcLength(cont, True)) for cont in contours]
-    cont_len.sort(key=lambda x: -x[1])
-    longest_2 = cont_len[0:2]
-    rects = [cv2.boundingRect(tup[0]) for tup in longest_2]
+def _wall_bounds(walls: np.ndarray) -> tuple[int, int, int, int]:
+    """
+    Return the bounds of crop_bounds, given the binary image walls where the walls are white
+    """
+    contours, hierarchy = cv2.findContours(walls, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+
+    # take the two contours with the longest arc length
+    longest_2 = heapq.nlargest(2, contours, key=lambda cont: cv2.arcLength(cont, True))
+    rects = [cv2.boundingRect(cont) for cont in longest_2]
 
     # take the smallest coordinates for the top left corner of rect
     # and largest for the bottom right corner
@@ -50,8 +322,153 @@ def crop_image(image: np.ndarray) -> np.ndarray:
     max_x = max(max_x0, max_x1) - 1
     max_y = max(max_y0, max_y1) - 1
 
-    cropped_img = image[min_y: max_y, min_x: max_x]
-    return cropped_img
+    return min_x, min_y, max_x, max_y
+
+
+def preprocess_maze(maze_path: str, rectangular: bool = True,
+                    size: tuple[int, int] = (1280, 720)) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return a tuple containing the cropped maze image and the thinned maze grid for the maze
+    found at maze_path, after resizing it to size (width, height).
+
+    The grid is a uint8 array indexed by [col, row], where 1 marks a pixel on the path, so it can
+    be passed directly into MatrixGraph. This function does not depend on pygame, so it can be
+    used without a display. Use a MazePreprocessor directly to time the stages, or to reuse its
+    buffers across many mazes.
+    """
+    return MazePreprocessor().preprocess(maze_path, rectangular, size)
+
+
+def thin_maze(cropped: np.ndarray, rectangular: bool = True) -> np.ndarray:
+    """
+    Return the thinned maze grid of the cropped maze image, as described in preprocess_maze.
+
+    The image is binarized with Otsu's method and then thinned to 1 pixel wide paths.
+    """
+    return MazePreprocessor().thin(cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY), rectangular)
+
+
+def preprocess_maze_tiled(maze_path: str, rectangular: bool = True,
+                          output_path: Optional[str] = None, tile_size: int = TILE_SIZE,
+                          halo: Optional[int] = None) -> np.ndarray:
+    """
+    Return the thinned maze grid of the maze found at maze_path at its full resolution, in the
+    same layout as preprocess_maze.
+
+    The image is thresholded and thinned in tiles of tile_size x tile_size pixels, each thinned
+    together with halo pixels of its surroundings so that paths stay connected across tiles, and
+    the Otsu threshold is computed from the histogram of the whole image first so every tile is
+    binarized the same way. If halo is None, it is the larger of TILE_HALO and tile_halo of the
+    image, which is wide enough for the grid to be the same as thinning the whole image at once.
+    If output_path is given, the grid is written to a .npy file there and returned as a memory
+    map of it, which can be passed into MatrixGraph without copying.
+
+    maze_path is either an image or a .npy file of a grayscale or BGR image. Only .npy files are
+    read one tile at a time, through a memory map. cv2.imread cannot decode part of an image, so
+    images are loaded fully into memory: they take 3 bytes per pixel while they are decoded, and
+    1 byte per pixel once they are converted to grayscale right after. Scans too large for that
+    should be saved as .npy files first. Either way the colours are converted to grayscale with
+    the same channel order as preprocess_maze, so both threshold the same gray values. Rectangular
+    mazes are cropped with crop_bounds on a copy shrunk by PREVIEW_SCALE.
+    """
+    if maze_path.lower().endswith('.npy'):
+        image = np.load(maze_path, mmap_mode='r')
+    else:
+        image = cv2.imread(maze_path)
+        if image is None:
+            raise ValueError(f'{maze_path} could not be read as an image')
+        image = _to_gray(image)
+
+    if rectangular:
+        preview = _to_bgr(np.ascontiguousarray(image[::PREVIEW_SCALE, ::PREVIEW_SCALE]))
+        min_x, min_y, max_x, max_y = crop_bounds(preview)
+        min_x, min_y = min_x * PREVIEW_SCALE, min_y * PREVIEW_SCALE
+        max_x = min(max_x * PREVIEW_SCALE, image.shape[1])
+        max_y = min(max_y * PREVIEW_SCALE, image.shape[0])
+    else:
+        min_x, min_y, max_x, max_y = 0, 0, image.shape[1], image.shape[0]
+
+    tiles = [(x, y) for y in range(min_y, max_y, tile_size) for x in range(min_x, max_x, tile_size)]
+    histogram = np.zeros(256, dtype=np.int64)
+    for x, y in tiles:
+        tile = _to_gray(image[y: min(y + tile_size, max_y), x: min(x + tile_size, max_x)])
+        histogram += np.bincount(tile.ravel(), minlength=256)
+    threshold = otsu_threshold(histogram)
+    if halo is None:
+        preview = image[min_y: max_y: PREVIEW_SCALE, min_x: max_x: PREVIEW_SCALE]
+        halo = max(TILE_HALO, tile_halo(_to_gray(preview), threshold, PREVIEW_SCALE))
+
+    shape = (max_x - min_x, max_y - min_y)
+    if output_path is None:
+        grid = np.zeros(shape, dtype=np.uint8)
+    else:
+        grid = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.uint8, shape=shape)
+    for x, y in tiles:
+        # Thin the tile together with its halo, then keep only the tile itself
+        left, top = max(x - halo, min_x), max(y - halo, min_y)
+        right, bottom = min(x + tile_size + halo, max_x), min(y + tile_size + halo, max_y)
+        region = _to_gray(image[top: bottom, left: right])
+        ret_val, thresh = cv2.threshold(region, threshold, 255, cv2.THRESH_BINARY)
+        thinned = thin_binary(thresh)
+        tile = thinned[y - top: min(y + tile_size, max_y) - top,
+                       x - left: min(x + tile_size, max_x) - left]
+        grid[x - min_x: x - min_x + tile.shape[1], y - min_y: y - min_y + tile.shape[0]] = tile.T
+
+    if output_path is not None:
+        grid.flush()
+    return grid
+
+
+def tile_halo(preview: np.ndarray, threshold: int, scale: int) -> int:
+    """
+    Return the halo preprocess_maze_tiled needs for every tile to be thinned exactly as in the
+    whole image, where preview is the grayscale image shrunk by scale and threshold is the
+    largest gray value of a wall.
+
+    Each iteration of thinning only removes the outer layer of the paths, so it takes at most
+    d + 1 iterations, where d is the largest chessboard distance from a path pixel to a wall.
+    Every iteration looks at the 8 neighbours of a pixel twice, so a pixel of the tile can only
+    depend on pixels up to 2 (d + 1) pixels away. d is measured on the preview, and rounded up
+    by one preview pixel to make up for the detail the preview loses.
+    """
+    ret_val, paths = cv2.threshold(preview, threshold, 255, cv2.THRESH_BINARY)
+    distances = cv2.distanceTransform(paths, cv2.DIST_C, 3)
+    widest = (int(distances.max(initial=0)) + 1) * scale
+    # A halo wider than the image already covers all of it
+    return min(2 * (widest + 1), max(preview.shape) * scale)
+
+
+def otsu_threshold(histogram: np.ndarray) -> int:
+    """
+    Return the threshold Otsu's method picks for the 256 bin histogram of a grayscale image,
+    the largest value that is marked as a wall, as in cv2.threshold with cv2.THRESH_OTSU
+    """
+    values = np.arange(256)
+    weight = np.cumsum(histogram).astype(np.float64)
+    total = weight[-1]
+    mass = np.cumsum(histogram * values).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (mass[-1] * weight - total * mass) ** 2 / (weight * (total - weight))
+    return int(np.argmax(np.nan_to_num(between, nan=-1.0, posinf=-1.0)))
+
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    """
+    Return image as a grayscale array, converting it with the same channel order as
+    MazePreprocessor if it is BGR
+    """
+    if image.ndim == 3:
+        return cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGB2GRAY)
+    return np.ascontiguousarray(image)
+
+
+def _to_bgr(image: np.ndarray) -> np.ndarray:
+    """
+    Return image as a BGR array, converting it if it is grayscale
+    """
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    return image
 
 
 if __name__ == '__main__':
@@ -59,7 +476,7 @@ if __name__ == '__main__':
     import python_ta.contracts
     python_ta.contracts.check_all_contracts()
     python_ta.check_all(config={
-        'extra-imports': ['cv2', 'numpy'],
+        'extra-imports': ['cv2', 'numba', 'numpy', 'typing', 'heapq', 'time', 'contextlib'],
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'max-line-length': 100,
         'disable': ['E1136']
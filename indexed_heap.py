@@ -0,0 +1,179 @@
+"""
+indexed_heap.py:
+Contains the IndexedMinHeap class which is used as the open set of the A* algorithms
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import numba
+import numpy as np
+
+# Numba requirements
+spec = [
+    ('heap', numba.int32[:]),
+    ('positions', numba.int32[:]),
+    ('keys', numba.float64[:]),
+    ('size', numba.int64)
+]
+
+
+@numba.experimental.jitclass(spec)
+class IndexedMinHeap:
+    """An array backed binary min heap of integer ids (pixel ids) ordered by a float key.
+
+    Each id in range(capacity) can be in the heap at most once. The position of every id in the
+    heap is tracked, so membership tests are O(1) and push, pop and decrease_key are O(log n).
+
+    Instance Attributes:
+        - heap: The ids in the heap, where heap[:size] is a binary heap ordered by keys
+        - positions: positions[i] is the index of id i in heap, or -1 if i is not in the heap
+        - keys: keys[i] is the key of id i
+        - size: The number of ids in the heap
+
+    Note: This is a jitclass so type of inputs is very sensitive.
+
+    Sample Usage:
+    >>> heap = IndexedMinHeap(10)
+    >>> heap.push(3, 2.0)
+    >>> heap.push(7, 1.0)
+    >>> heap.pop()
+    7
+    """
+
+    heap: np.ndarray
+    positions: np.ndarray
+    keys: np.ndarray
+    size: int
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Initialize an empty heap that can hold the ids in range(capacity)
+        """
+        self.heap = np.empty(capacity, dtype=np.int32)
+        self.positions = np.full(capacity, -1, dtype=np.int32)
+        self.keys = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+
+    def is_empty(self) -> bool:
+        """
+        Return whether the heap is empty
+        """
+        return self.size == 0
+
+    def contains(self, item: int) -> bool:
+        """
+        Return whether item is in the heap
+        """
+        return self.positions[item] != -1
+
+    def peek_key(self) -> float:
+        """
+        Return the smallest key in the heap. The heap must not be empty.
+        """
+        return self.keys[self.heap[0]]
+
+    def push(self, item: int, key: float) -> None:
+        """
+        Add item to the heap with the given key. item must not already be in the heap.
+        """
+        self.heap[self.size] = item
+        self.positions[item] = self.size
+        self.keys[item] = key
+        self.size += 1
+        self._sift_up(self.size - 1)
+
+    def pop(self) -> int:
+        """
+        Remove and return the item with the smallest key. The heap must not be empty.
+        """
+        item = self.heap[0]
+        self.size -= 1
+        last = self.heap[self.size]
+        self.positions[item] = -1
+        if self.size > 0:
+            self.heap[0] = last
+            self.positions[last] = 0
+            self._sift_down(0)
+        return item
+
+    def clear(self) -> None:
+        """
+        Remove every item from the heap, in time proportional to the number of items in it
+        """
+        for index in range(self.size):
+            self.positions[self.heap[index]] = -1
+        self.size = 0
+
+    def decrease_key(self, item: int, key: float) -> None:
+        """
+        Lower the key of item, which must already be in the heap, to key.
+        """
+        self.keys[item] = key
+        self._sift_up(self.positions[item])
+
+    def push_or_decrease(self, item: int, key: float) -> bool:
+        """
+        Add item to the heap, or lower its key if it is already in the heap and key is smaller.
+
+        Return whether the heap was changed.
+        """
+        if self.positions[item] == -1:
+            self.push(item, key)
+            return True
+        elif key < self.keys[item]:
+            self.decrease_key(item, key)
+            return True
+        else:
+            return False
+
+    def _sift_up(self, index: int) -> None:
+        """
+        Move the item at index up the heap until its parent has a smaller key
+        """
+        item = self.heap[index]
+        key = self.keys[item]
+        while index > 0:
+            parent_index = (index - 1) // 2
+            parent = self.heap[parent_index]
+            if self.keys[parent] <= key:
+                break
+            self.heap[index] = parent
+            self.positions[parent] = index
+            index = parent_index
+        self.heap[index] = item
+        self.positions[item] = index
+
+    def _sift_down(self, index: int) -> None:
+        """
+        Move the item at index down the heap until both of its children have larger keys
+        """
+        item = self.heap[index]
+        key = self.keys[item]
+        while True:
+            child_index = 2 * index + 1
+            if child_index >= self.size:
+                break
+            child = self.heap[child_index]
+            if child_index + 1 < self.size and \
+                    self.keys[self.heap[child_index + 1]] < self.keys[child]:
+                child_index += 1
+                child = self.heap[child_index]
+            if key <= self.keys[child]:
+                break
+            self.heap[index] = child
+            self.positions[child] = index
+            index = child_index
+        self.heap[index] = item
+        self.positions[item] = index
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['numba', 'numpy'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,811 @@
+"""
+kernels.py:
+Contains numba compiled versions of the pathfinding algorithms in solver.py.
+
+The kernels work directly on the grid stored in a MatrixGraph, or on the packed bits stored in a
+packed_graph.PackedGraph, since they read the grid through matrix_graph.grid_shape, on_path and
+count_path, which numba compiles once for each kind of grid. Every function here that takes a
+MatrixGraph takes a PackedGraph too, and returns the same result for it. Each pixel (col, row) is
+identified by the integer col * rows + row, and all of the search state (visited pixels, parents
+and the expansion order) lives in preallocated int32 arrays indexed by that id. The 8 neighbour
+scan is written inline, so no lists or tuples are created while searching.
+
+Every search kernel fills in the counters array it is given as described by solver.COUNTERS.
+counters can also be None, in which case numba compiles a separate version of the kernel where
+the counting is removed entirely, so searches that are not measured do not pay for it. The
+functions that run the kernels take count, and only pass them an array when it is True.
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+from typing import Optional
+import numba
+import numpy as np
+from matrix_graph import MatrixGraph, NEIGHBOUR_COLS, NEIGHBOUR_ROWS, grid_shape, on_path, \
+    count_path, is_path, is_forced
+from indexed_heap import IndexedMinHeap
+from solver import SearchResult, COUNTERS, DIAGONAL_COST, unreachable_result
+
+# The cost of moving to each of the 8 neighbours of a pixel, in the order of NEIGHBOUR_COLS
+NEIGHBOUR_COSTS = np.array([1, 1, 1, 1, DIAGONAL_COST, DIAGONAL_COST, DIAGONAL_COST,
+                            DIAGONAL_COST], dtype=np.float64)
+
+
+@numba.njit(cache=True)
+def breadth_first_search_kernel(grid: np.ndarray, start: int, target: int,
+                                parent: np.ndarray, order: np.ndarray,
+                                counters: Optional[np.ndarray]) -> int:
+    """
+    Run breadth first search on grid from the pixel id start to the pixel id target.
+
+    parent must be filled with -1 and order must have room for every pixel in grid. Return the
+    number of pixels expanded, which are stored in order[:n] in the order they were expanded.
+    The parent of every visited pixel is stored in parent. order doubles as the queue, since
+    every pixel is enqueued at most once. counters is filled in as described by
+    solver.COUNTERS.
+    """
+    cols, rows = grid_shape(grid)
+    head = 0
+    tail = 1
+    order[0] = start
+    parent[start] = start
+    max_frontier = 1
+    checks = 0
+
+    while head < tail:
+        curr = order[head]
+        head += 1
+        if curr == target:
+            break
+
+        col = curr // rows
+        row = curr % rows
+        for k in range(8):
+            n_col = col + NEIGHBOUR_COLS[k]
+            n_row = row + NEIGHBOUR_ROWS[k]
+            if 0 <= n_col < cols and 0 <= n_row < rows and on_path(grid, n_col, n_row):
+                checks += 1
+                node = n_col * rows + n_row
+                if parent[node] == -1:
+                    parent[node] = curr
+                    order[tail] = node
+                    tail += 1
+        max_frontier = max(max_frontier, tail - head)
+
+    if counters is not None:
+        counters[0] = tail
+        counters[1] = max_frontier
+        counters[2] = checks
+    return head
+
+
+@numba.njit(cache=True)
+def depth_first_search_kernel(grid: np.ndarray, start: int, target: int,
+                              parent: np.ndarray, order: np.ndarray,
+                              counters: Optional[np.ndarray]) -> int:
+    """
+    Run iterative depth first search on grid from the pixel id start to the pixel id target.
+
+    parent must be filled with -1 and order must have room for every pixel in grid. Return the
+    number of pixels expanded, which are stored in order[:n] in the order they were expanded.
+    counters is filled in as described by solver.COUNTERS, where every push onto the stack
+    counts, even for a pixel that is already on it.
+    """
+    cols, rows = grid_shape(grid)
+    discovered = np.zeros(cols * rows, dtype=np.bool_)
+
+    # A pixel is pushed at most once per neighbour, so 8 slots per path pixel is always enough
+    stack = np.empty(8 * count_path(grid) + 1, dtype=np.int32)
+    stack[0] = start
+    top = 1
+    parent[start] = start
+    expanded = 0
+    pushed = 1
+    max_frontier = 1
+    checks = 0
+
+    while top > 0:
+        top -= 1
+        vertex = stack[top]
+        if discovered[vertex]:
+            continue
+        discovered[vertex] = True
+        order[expanded] = vertex
+        expanded += 1
+        if vertex == target:
+            break
+
+        col = vertex // rows
+        row = vertex % rows
+        for k in range(8):
+            n_col = col + NEIGHBOUR_COLS[k]
+            n_row = row + NEIGHBOUR_ROWS[k]
+            if 0 <= n_col < cols and 0 <= n_row < rows and on_path(grid, n_col, n_row):
+                checks += 1
+                node = n_col * rows + n_row
+                if not discovered[node]:
+                    stack[top] = node
+                    top += 1
+                    pushed += 1
+                    parent[node] = vertex
+        max_frontier = max(max_frontier, top)
+
+    if counters is not None:
+        counters[0] = pushed
+        counters[1] = max_frontier
+        counters[2] = checks
+    return expanded
+
+
+@numba.njit(cache=True)
+def octile_distance(col1: int, row1: int, col2: int, row2: int) -> float:
+    """
+    Return the octile distance between (col1, row1) and (col2, row2).
+    """
+    d_col = abs(col1 - col2)
+    d_row = abs(row1 - row2)
+    return max(d_col, d_row) + (DIAGONAL_COST - 1) * min(d_col, d_row)
+
+
+@numba.njit(cache=True)
+def a_star_kernel(grid: np.ndarray, start: int, target: int,
+                  parent: np.ndarray, order: np.ndarray,
+                  counters: Optional[np.ndarray]) -> int:
+    """
+    Run A* on grid from the pixel id start to the pixel id target. Straight moves cost 1,
+    diagonal moves cost sqrt(2) and the heuristic is the octile distance to the target.
+
+    parent must be filled with -1 and order must have room for every pixel in grid. Return the
+    number of pixels expanded, which are stored in order[:n] in the order they were expanded.
+    counters is filled in as described by solver.COUNTERS, where lowering the key of a pixel
+    that is already in the open heap does not count as a push.
+    """
+    cols, rows = grid_shape(grid)
+    target_col = target // rows
+    target_row = target % rows
+    closed = np.zeros(cols * rows, dtype=np.bool_)
+    costs = np.empty(cols * rows, dtype=np.float64)
+
+    open_heap = IndexedMinHeap(cols * rows)
+    open_heap.push(start, octile_distance(start // rows, start % rows, target_col, target_row))
+    costs[start] = 0.0
+    parent[start] = start
+    expanded = 0
+    pushed = 1
+    max_frontier = 1
+    checks = 0
+
+    while not open_heap.is_empty():
+        curr = open_heap.pop()
+        closed[curr] = True
+        order[expanded] = curr
+        expanded += 1
+        if curr == target:
+            break
+
+        col = curr // rows
+        row = curr % rows
+        for k in range(8):
+            n_col = col + NEIGHBOUR_COLS[k]
+            n_row = row + NEIGHBOUR_ROWS[k]
+            if 0 <= n_col < cols and 0 <= n_row < rows and on_path(grid, n_col, n_row):
+                checks += 1
+                node = n_col * rows + n_row
+                if closed[node]:
+                    continue
+                cost = costs[curr] + NEIGHBOUR_COSTS[k]
+                # A pixel without a parent has not been reached yet
+                if parent[node] == -1 or cost < costs[node]:
+                    if parent[node] == -1:
+                        pushed += 1
+                    costs[node] = cost
+                    parent[node] = curr
+                    open_heap.push_or_decrease(
+                        node, cost + octile_distance(n_col, n_row, target_col, target_row))
+        max_frontier = max(max_frontier, open_heap.size)
+
+    if counters is not None:
+        counters[0] = pushed
+        counters[1] = max_frontier
+        counters[2] = checks
+    return expanded
+
+
+@numba.njit(cache=True)
+def bidirectional_breadth_first_search_kernel(grid: np.ndarray, start: int, target: int,
+                                              parents: np.ndarray, order: np.ndarray,
+                                              sides: np.ndarray,
+                                              counters: Optional[np.ndarray]) \
+        -> tuple[int, int, int]:
+    """
+    Run breadth first search on grid from both the pixel id start and the pixel id target
+    until the two searches meet.
+
+    parents must be a (2, n) array filled with -1, where row 0 holds the parents of the forward
+    search and row 1 the parents of the backward search. order and sides must have room for two
+    entries per pixel in grid. Return a tuple of (the number of pixels expanded, the pixel id on
+    the forward side of the meeting point, the pixel id on the backward side of it), where the
+    meeting pixels are -1 if the searches never met. The expanded pixels are stored in order[:n]
+    and sides[:n] records which search (0 forward, 1 backward) expanded each of them. counters
+    is filled in as described by solver.COUNTERS, where the frontier is both queues together.
+
+    The searches expand one whole level at a time, always choosing the smaller frontier. Once a
+    level connects the two searches it is still finished, and the shortest connection is kept,
+    which makes the result a path with the fewest steps.
+    """
+    cols, rows = grid_shape(grid)
+    distances = np.zeros((2, cols * rows), dtype=np.int32)
+    queues = np.empty((2, cols * rows), dtype=np.int32)
+    heads = np.zeros(2, dtype=np.int64)
+    tails = np.ones(2, dtype=np.int64)
+    queues[0, 0] = start
+    queues[1, 0] = target
+    parents[0, start] = start
+    parents[1, target] = target
+    expanded = 0
+
+    best = np.iinfo(np.int32).max
+    meet_forward = -1
+    meet_backward = -1
+    if start == target:
+        best = 0
+        meet_forward = meet_backward = start
+    max_frontier = 2
+    checks = 0
+
+    while meet_forward == -1 and heads[0] < tails[0] and heads[1] < tails[1]:
+        if tails[0] - heads[0] <= tails[1] - heads[1]:
+            side = 0
+        else:
+            side = 1
+        other = 1 - side
+
+        level_end = tails[side]
+        while heads[side] < level_end:
+            curr = queues[side, heads[side]]
+            heads[side] += 1
+            order[expanded] = curr
+            sides[expanded] = side
+            expanded += 1
+
+            col = curr // rows
+            row = curr % rows
+            for k in range(8):
+                n_col = col + NEIGHBOUR_COLS[k]
+                n_row = row + NEIGHBOUR_ROWS[k]
+                if 0 <= n_col < cols and 0 <= n_row < rows and on_path(grid, n_col, n_row):
+                    checks += 1
+                    node = n_col * rows + n_row
+                    if parents[side, node] == -1:
+                        parents[side, node] = curr
+                        distances[side, node] = distances[side, curr] + 1
+                        queues[side, tails[side]] = node
+                        tails[side] += 1
+                    if parents[other, node] != -1:
+                        total = distances[side, curr] + 1 + distances[other, node]
+                        if total < best:
+                            best = total
+                            if side == 0:
+                                meet_forward, meet_backward = curr, node
+                            else:
+                                meet_forward, meet_backward = node, curr
+            max_frontier = max(max_frontier, tails[0] - heads[0] + tails[1] - heads[1])
+
+    if counters is not None:
+        counters[0] = tails[0] + tails[1]
+        counters[1] = max_frontier
+        counters[2] = checks
+    return expanded, meet_forward, meet_backward
+
+
+@numba.njit(cache=True)
+def bidirectional_a_star_kernel(grid: np.ndarray, start: int, target: int,
+                                parents: np.ndarray, order: np.ndarray,
+                                sides: np.ndarray, counters: Optional[np.ndarray]) \
+        -> tuple[int, int, int]:
+    """
+    Run A* on grid from both the pixel id start towards target and from target towards start,
+    with octile costs.
+
+    The arguments and return value are the same as bidirectional_breadth_first_search_kernel,
+    and both meeting pixels are the same pixel.
+
+    Both searches use the average of the two octile distance heuristics: the forward key of a
+    pixel v is g_forward(v) + p(v) and its backward key is g_backward(v) - p(v), where
+    p(v) = (octile(v, target) - octile(v, start)) / 2. This is consistent in both directions,
+    and the sum of the smallest forward and backward keys is a lower bound on every path that has
+    not been found yet. Each step expands the side with the smaller key, and the search stops
+    once that sum reaches the length of the best connection found so far.
+    """
+    cols, rows = grid_shape(grid)
+    costs = np.full((2, cols * rows), np.inf)
+    closed = np.zeros((2, cols * rows), dtype=np.bool_)
+    heaps = [IndexedMinHeap(cols * rows), IndexedMinHeap(cols * rows)]
+    start_col, start_row = start // rows, start % rows
+    target_col, target_row = target // rows, target % rows
+    potential = octile_distance(start_col, start_row, target_col, target_row) / 2
+    heaps[0].push(start, potential)
+    heaps[1].push(target, potential)
+    costs[0, start] = 0.0
+    costs[1, target] = 0.0
+    parents[0, start] = start
+    parents[1, target] = target
+    expanded = 0
+
+    best = np.inf
+    meet = -1
+    if start == target:
+        best = 0.0
+        meet = start
+    pushed = 2
+    max_frontier = 2
+    checks = 0
+
+    while not heaps[0].is_empty() and not heaps[1].is_empty():
+        if heaps[0].peek_key() + heaps[1].peek_key() >= best:
+            break
+        if heaps[0].peek_key() <= heaps[1].peek_key():
+            side = 0
+            sign = 1.0
+        else:
+            side = 1
+            sign = -1.0
+        other = 1 - side
+
+        curr = heaps[side].pop()
+        closed[side, curr] = True
+        order[expanded] = curr
+        sides[expanded] = side
+        expanded += 1
+
+        col = curr // rows
+        row = curr % rows
+        for k in range(8):
+            n_col = col + NEIGHBOUR_COLS[k]
+            n_row = row + NEIGHBOUR_ROWS[k]
+            if 0 <= n_col < cols and 0 <= n_row < rows and on_path(grid, n_col, n_row):
+                node = n_col * rows + n_row
+                checks += 1
+                if closed[side, node]:
+                    continue
+                cost = costs[side, curr] + NEIGHBOUR_COSTS[k]
+                if cost < costs[side, node]:
+                    if costs[side, node] == np.inf:
+                        pushed += 1
+                    costs[side, node] = cost
+                    parents[side, node] = curr
+                    potential = (octile_distance(n_col, n_row, target_col, target_row)
+                                 - octile_distance(n_col, n_row, start_col, start_row)) / 2
+                    heaps[side].push_or_decrease(node, cost + sign * potential)
+                    if cost + costs[other, node] < best:
+                        best = cost + costs[other, node]
+                        meet = node
+        max_frontier = max(max_frontier, heaps[0].size + heaps[1].size)
+
+    if counters is not None:
+        counters[0] = pushed
+        counters[1] = max_frontier
+        counters[2] = checks
+    return expanded, meet, meet
+
+
+@numba.njit(cache=True)
+def distance_field_kernel(grid: np.ndarray, source: int, costs: np.ndarray,
+                          parent: np.ndarray, order: np.ndarray) -> int:
+    """
+    Run Dijkstra's algorithm on grid from the pixel id source to every pixel it can reach, with
+    octile costs.
+
+    costs must be filled with inf, parent with -1, and order must have room for every pixel in
+    grid. Afterwards costs holds the length of the shortest path from source to every pixel (inf
+    if it cannot be reached) and parent the previous pixel on it. Return the number of pixels
+    expanded, which are stored in order[:n] in the order they were expanded, so in increasing
+    distance from source.
+    """
+    cols, rows = grid_shape(grid)
+    closed = np.zeros(cols * rows, dtype=np.bool_)
+    open_heap = IndexedMinHeap(cols * rows)
+    open_heap.push(source, 0.0)
+    costs[source] = 0.0
+    parent[source] = source
+    expanded = 0
+
+    while not open_heap.is_empty():
+        curr = open_heap.pop()
+        closed[curr] = True
+        order[expanded] = curr
+        expanded += 1
+
+        col = curr // rows
+        row = curr % rows
+        for k in range(8):
+            n_col = col + NEIGHBOUR_COLS[k]
+            n_row = row + NEIGHBOUR_ROWS[k]
+            if 0 <= n_col < cols and 0 <= n_row < rows and on_path(grid, n_col, n_row):
+                node = n_col * rows + n_row
+                cost = costs[curr] + NEIGHBOUR_COSTS[k]
+                if not closed[node] and cost < costs[node]:
+                    costs[node] = cost
+                    parent[node] = curr
+                    open_heap.push_or_decrease(node, cost)
+
+    return expanded
+
+
+@numba.njit(cache=True)
+def straight_jump(grid: np.ndarray, col: int, row: int, d_col: int, d_row: int, target: int,
+                  jumps: np.ndarray) -> int:
+    """
+    Return the pixel id of the jump point found by moving from (col, row) in the straight
+    direction (d_col, d_row): target, or the first pixel with a forced neighbour. Return -1 if
+    the path ends first.
+
+    If jumps is a jump table from matrix_graph.jump_table, it is used instead of scanning, so this
+    takes constant time. Otherwise jumps must be empty.
+    """
+    rows = grid.shape[1]
+    target_col = target // rows
+    target_row = target % rows
+    if jumps.shape[0] != 0:
+        k = 0 if d_row == -1 else 1 if d_row == 1 else 2 if d_col == -1 else 3
+        steps = jumps[k, col, row]
+        # The target is a jump point if it lies on the ray before the path ends or the jump point
+        if d_col == 0 and target_col == col and 0 < (target_row - row) * d_row <= abs(steps):
+            return target
+        if d_row == 0 and target_row == row and 0 < (target_col - col) * d_col <= abs(steps):
+            return target
+        if steps > 0:
+            return (col + steps * d_col) * rows + row + steps * d_row
+        return -1
+
+    while True:
+        col += d_col
+        row += d_row
+        if not is_path(grid, col, row):
+            return -1
+        node = col * rows + row
+        if node == target or is_forced(grid, col, row, d_col, d_row):
+            return node
+
+
+@numba.njit(cache=True)
+def diagonal_jump(grid: np.ndarray, col: int, row: int, d_col: int, d_row: int, target: int,
+                  jumps: np.ndarray) -> int:
+    """
+    Return the pixel id of the jump point found by moving from (col, row) in the diagonal
+    direction (d_col, d_row), or -1 if the path ends first. A pixel is a jump point if it is
+    target, has a forced neighbour, or a straight jump from it along either component of the
+    direction finds a jump point.
+    """
+    rows = grid.shape[1]
+    while True:
+        col += d_col
+        row += d_row
+        if not is_path(grid, col, row):
+            return -1
+        node = col * rows + row
+        if node == target or is_forced(grid, col, row, d_col, d_row) \
+                or straight_jump(grid, col, row, d_col, 0, target, jumps) != -1 \
+                or straight_jump(grid, col, row, 0, d_row, target, jumps) != -1:
+            return node
+
+
+@numba.njit(cache=True)
+def jump_point_search_kernel(grid: np.ndarray, start: int, target: int, jumps: np.ndarray,
+                             parent: np.ndarray, order: np.ndarray,
+                             counters: Optional[np.ndarray]) -> int:
+    """
+    Run jump point search on grid from the pixel id start to the pixel id target.
+
+    This is A* with octile costs and the octile distance heuristic, except that from every
+    expanded pixel, only the directions that are not pruned by the jump point search rules are
+    followed, and each one is followed in a straight or diagonal line to the next jump point
+    instead of one pixel at a time. Only jump points are added to the open heap, so the returned
+    path costs the same as the one found by a_star_kernel, while far fewer pixels are expanded.
+
+    jumps is either a jump table from matrix_graph.jump_table (JPS+), or an empty array. parent
+    must be filled with -1. Afterwards parent links every jump point to the previous one, and
+    the number of jump points expanded is returned, which are stored in order[:n]. counters is
+    filled in as described by solver.COUNTERS, where every jump counts as one neighbour check.
+    """
+    cols, rows = grid_shape(grid)
+    target_col = target // rows
+    target_row = target % rows
+    costs = np.full(cols * rows, np.inf)
+    closed = np.zeros(cols * rows, dtype=np.bool_)
+    open_heap = IndexedMinHeap(cols * rows)
+    directions = np.empty((8, 2), dtype=np.int64)
+    open_heap.push(start, octile_distance(start // rows, start % rows, target_col, target_row))
+    costs[start] = 0.0
+    parent[start] = start
+    expanded = 0
+    pushed = 1
+    max_frontier = 1
+    checks = 0
+
+    while not open_heap.is_empty():
+        curr = open_heap.pop()
+        closed[curr] = True
+        order[expanded] = curr
+        expanded += 1
+        if curr == target:
+            break
+
+        col = curr // rows
+        row = curr % rows
+        count = 0
+        if curr == start:
+            for k in range(8):
+                directions[count, 0] = NEIGHBOUR_COLS[k]
+                directions[count, 1] = NEIGHBOUR_ROWS[k]
+                count += 1
+        else:
+            # The direction of the jump that reached curr
+            d_col = np.sign(col - parent[curr] // rows)
+            d_row = np.sign(row - parent[curr] % rows)
+            directions[0, 0], directions[0, 1] = d_col, d_row
+            count = 1
+            if d_col != 0 and d_row != 0:
+                directions[1, 0], directions[1, 1] = d_col, 0
+                directions[2, 0], directions[2, 1] = 0, d_row
+                count = 3
+                if not is_path(grid, col - d_col, row):
+                    directions[count, 0], directions[count, 1] = -d_col, d_row
+                    count += 1
+                if not is_path(grid, col, row - d_row):
+                    directions[count, 0], directions[count, 1] = d_col, -d_row
+                    count += 1
+            else:
+                # The pixels beside a straight move are perpendicular to it
+                side_col = abs(d_row)
+                side_row = abs(d_col)
+                if not is_path(grid, col + side_col, row + side_row):
+                    directions[count, 0] = d_col + side_col
+                    directions[count, 1] = d_row + side_row
+                    count += 1
+                if not is_path(grid, col - side_col, row - side_row):
+                    directions[count, 0] = d_col - side_col
+                    directions[count, 1] = d_row - side_row
+                    count += 1
+
+        checks += count
+        for i in range(count):
+            d_col = directions[i, 0]
+            d_row = directions[i, 1]
+            if d_col != 0 and d_row != 0:
+                node = diagonal_jump(grid, col, row, d_col, d_row, target, jumps)
+            else:
+                node = straight_jump(grid, col, row, d_col, d_row, target, jumps)
+            if node == -1 or closed[node]:
+                continue
+            n_col = node // rows
+            n_row = node % rows
+            cost = costs[curr] + octile_distance(col, row, n_col, n_row)
+            if cost < costs[node]:
+                if costs[node] == np.inf:
+                    pushed += 1
+                costs[node] = cost
+                parent[node] = curr
+                open_heap.push_or_decrease(node, cost + octile_distance(n_col, n_row, target_col,
+                                                                       target_row))
+        max_frontier = max(max_frontier, open_heap.size)
+
+    if counters is not None:
+        counters[0] = pushed
+        counters[1] = max_frontier
+        counters[2] = checks
+    return expanded
+
+
+@numba.njit(cache=True)
+def fill_jumps(jump_points: np.ndarray, rows: int) -> np.ndarray:
+    """
+    Return an array of the pixel ids on the path through jump_points, an array of pixel ids
+    where each one is reached from the previous one by a straight or diagonal line.
+    """
+    length = 1
+    for i in range(1, len(jump_points)):
+        length += max(abs(jump_points[i] // rows - jump_points[i - 1] // rows),
+                      abs(jump_points[i] % rows - jump_points[i - 1] % rows))
+
+    path = np.empty(length, dtype=np.int32)
+    path[0] = jump_points[0]
+    index = 1
+    for i in range(1, len(jump_points)):
+        col = jump_points[i - 1] // rows
+        row = jump_points[i - 1] % rows
+        d_col = np.sign(jump_points[i] // rows - col)
+        d_row = np.sign(jump_points[i] % rows - row)
+        while col * rows + row != jump_points[i]:
+            col += d_col
+            row += d_row
+            path[index] = col * rows + row
+            index += 1
+    return path
+
+
+@numba.njit(cache=True)
+def walk_parents(parent: np.ndarray, start: int, target: int) -> np.ndarray:
+    """
+    Return an array of the pixel ids on the path from start to target, following parent.
+    """
+    length = 1
+    current = target
+    while current != start:
+        current = parent[current]
+        length += 1
+
+    path = np.empty(length, dtype=np.int32)
+    current = target
+    for i in range(length - 1, -1, -1):
+        path[i] = current
+        current = parent[current]
+    return path
+
+
+def breadth_first_search(graph: MatrixGraph, start: tuple, target: tuple,
+                         count: bool = True) -> SearchResult:
+    """
+    Return the SearchResult of running breadth_first_search_kernel from start to target.
+    """
+    return _run_kernel(breadth_first_search_kernel, graph, start, target, count)
+
+
+def depth_first_search_iterative(graph: MatrixGraph, start: tuple, target: tuple,
+                                 count: bool = True) -> SearchResult:
+    """
+    Return the SearchResult of running depth_first_search_kernel from start to target.
+    """
+    return _run_kernel(depth_first_search_kernel, graph, start, target, count)
+
+
+def a_star(graph: MatrixGraph, start: tuple, target: tuple,
+           count: bool = True) -> SearchResult:
+    """
+    Return the SearchResult of running a_star_kernel from start to target.
+    """
+    return _run_kernel(a_star_kernel, graph, start, target, count)
+
+
+def bidirectional_breadth_first_search(graph: MatrixGraph, start: tuple, target: tuple,
+                                       count: bool = True) -> SearchResult:
+    """
+    Return the SearchResult of running bidirectional_breadth_first_search_kernel from start
+    to target.
+    """
+    return _run_bidirectional_kernel(bidirectional_breadth_first_search_kernel, graph, start,
+                                     target, count)
+
+
+def bidirectional_a_star(graph: MatrixGraph, start: tuple, target: tuple,
+                         count: bool = True) -> SearchResult:
+    """
+    Return the SearchResult of running bidirectional_a_star_kernel from start to target.
+    """
+    return _run_bidirectional_kernel(bidirectional_a_star_kernel, graph, start, target,
+                                     count)
+
+
+def jump_point_search(graph: MatrixGraph, start: tuple, target: tuple,
+                      count: bool = True) -> SearchResult:
+    """
+    Return the SearchResult of running jump_point_search_kernel from start to target, where
+    the trace only contains the jump points that were expanded.
+    """
+    return _run_jump_point_search(graph, start, target, np.empty((0, 0, 0), dtype=np.int32),
+                                  count)
+
+
+def jump_point_search_plus(graph: MatrixGraph, start: tuple, target: tuple,
+                           count: bool = True) -> SearchResult:
+    """
+    Return the SearchResult of running jump_point_search_kernel from start to target with the
+    precomputed straight jumps of graph (JPS+), which are built the first time they are needed.
+    """
+    graph.build_jump_table()
+    return _run_jump_point_search(graph, start, target, graph.jumps, count)
+
+
+def ids_to_coords(ids: np.ndarray, rows: int) -> np.ndarray:
+    """
+    Return an (n, 2) int32 array of the (col, row) of every pixel id in ids.
+    """
+    return np.stack(np.divmod(ids, rows), axis=1).astype(np.int32)
+
+
+def _run_kernel(kernel: numba.core.registry.CPUDispatcher, graph: MatrixGraph, start: tuple,
+                target: tuple, count: bool) -> SearchResult:
+    """
+    Return the SearchResult of running kernel on graph from start to target, with counters
+    if count is True.
+    """
+    if not graph.same_component(start, target):
+        return unreachable_result()
+    grid = graph.graph
+    rows = grid.shape[1]
+    start_id = start[0] * rows + start[1]
+    target_id = target[0] * rows + target[1]
+    parent = np.full(graph.cols * graph.rows, -1, dtype=np.int32)
+    order = np.empty(graph.cols * graph.rows, dtype=np.int32)
+    counters = np.zeros(len(COUNTERS), dtype=np.int64) if count else None
+
+    expanded = kernel(grid, start_id, target_id, parent, order, counters)
+    trace = ids_to_coords(order[:expanded], rows)
+
+    if parent[target_id] == -1:
+        return SearchResult([], trace, counters=counters)
+    path = ids_to_coords(walk_parents(parent, start_id, target_id), rows)
+    return SearchResult([(col, row) for col, row in path.tolist()], trace, counters=counters)
+
+
+def _run_bidirectional_kernel(kernel: numba.core.registry.CPUDispatcher, graph: MatrixGraph,
+                              start: tuple, target: tuple, count: bool) -> SearchResult:
+    """
+    Return the SearchResult of running the bidirectional kernel on graph from start to target,
+    with counters if count is True.
+    """
+    if not graph.same_component(start, target):
+        return unreachable_result()
+    grid = graph.graph
+    rows = grid.shape[1]
+    start_id = start[0] * rows + start[1]
+    target_id = target[0] * rows + target[1]
+    parents = np.full((2, graph.cols * graph.rows), -1, dtype=np.int32)
+    order = np.empty(2 * graph.cols * graph.rows, dtype=np.int32)
+    sides = np.empty(2 * graph.cols * graph.rows, dtype=np.int8)
+    counters = np.zeros(len(COUNTERS), dtype=np.int64) if count else None
+
+    expanded, meet_forward, meet_backward = kernel(grid, start_id, target_id, parents, order,
+                                                   sides, counters)
+    trace = ids_to_coords(order[:expanded], rows)
+    if meet_forward == -1:
+        return SearchResult([], trace, sides[:expanded], counters)
+
+    # Join the forward path to the meeting point with the reversed backward path from it
+    forward = walk_parents(parents[0], start_id, meet_forward)
+    backward = walk_parents(parents[1], target_id, meet_backward)[::-1]
+    if meet_forward == meet_backward:
+        backward = backward[1:]
+    path = ids_to_coords(np.concatenate((forward, backward)), rows)
+    return SearchResult([(col, row) for col, row in path.tolist()], trace, sides[:expanded],
+                        counters)
+
+
+def _run_jump_point_search(graph: MatrixGraph, start: tuple, target: tuple,
+                           jumps: np.ndarray, count: bool) -> SearchResult:
+    """
+    Return the SearchResult of running jump_point_search_kernel on graph from start to target
+    with jumps, with the path between jump points filled in and with counters if count is True.
+    """
+    if not graph.same_component(start, target):
+        return unreachable_result()
+    grid = graph.graph
+    rows = grid.shape[1]
+    start_id = start[0] * rows + start[1]
+    target_id = target[0] * rows + target[1]
+    parent = np.full(graph.cols * graph.rows, -1, dtype=np.int32)
+    order = np.empty(graph.cols * graph.rows, dtype=np.int32)
+    counters = np.zeros(len(COUNTERS), dtype=np.int64) if count else None
+
+    expanded = jump_point_search_kernel(grid, start_id, target_id, jumps, parent, order,
+                                        counters)
+    trace = ids_to_coords(order[:expanded], rows)
+
+    if parent[target_id] == -1:
+        return SearchResult([], trace, counters=counters)
+    jump_points = walk_parents(parent, start_id, target_id)
+    path = ids_to_coords(fill_jumps(jump_points, rows), rows)
+    return SearchResult([(col, row) for col, row in path.tolist()], trace, counters=counters)
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['typing', 'numba', 'numpy', 'matrix_graph', 'indexed_heap',
+                          'solver'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,258 @@
+"""
+landmarks.py:
+Contains the LandmarkIndex class which speeds up repeated A* queries on the same maze with
+landmark (ALT) heuristics.
+
+The octile distance heuristic ignores the walls of the maze, so on winding mazes A* expands
+almost as many pixels as Dijkstra's algorithm. A LandmarkIndex stores the exact length of the
+shortest path from a few landmark pixels to every pixel. By the triangle inequality, for every
+landmark L, |d(L, target) - d(L, v)| is a lower bound on d(v, target) that follows the corridors
+of the maze, so A* can use the largest of these bounds as its heuristic.
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import numba
+import numpy as np
+from matrix_graph import MatrixGraph
+from indexed_heap import IndexedMinHeap
+from solver import SearchResult, unreachable_result
+from kernels import NEIGHBOUR_COLS, NEIGHBOUR_ROWS, NEIGHBOUR_COSTS, ids_to_coords, \
+    octile_distance, walk_parents
+from distance_field import distance_field
+
+# Distances are stored as uint32 in units of 1 / DISTANCE_SCALE pixels (or coarser for mazes
+# whose paths are too long to fit), and UNREACHABLE marks pixels a landmark cannot reach
+DISTANCE_SCALE = 16
+UNREACHABLE = np.iinfo(np.uint32).max
+DEFAULT_LANDMARKS = 8
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@numba.njit(cache=True)
+def landmark_a_star_kernel(grid: np.ndarray, start: int, target: int, tables: np.ndarray,
+                           scales: np.ndarray, costs: np.ndarray, parent: np.ndarray,
+                           closed: np.ndarray, open_heap: IndexedMinHeap, order: np.ndarray,
+                           touched: np.ndarray) -> tuple[int, int]:
+    """
+    Run A* on grid from the pixel id start to the pixel id target with octile costs, where the
+    heuristic is the largest of the octile distance and the landmark bounds from tables.
+
+    tables[k] holds the distances from landmark k in units of 1 / scales[k] pixels. Since they
+    are rounded down, the bound of landmark k is lowered by one unit, so that it stays a lower
+    bound. The rounding can make the heuristic slightly inconsistent, so closed pixels are
+    reopened when a shorter path to them is found, which keeps the returned path a shortest path.
+
+    costs must be filled with inf, parent with -1, closed with False and open_heap must be empty.
+    Return a tuple of (the number of pixels expanded, the number of pixels whose cost was set),
+    where the pixels expanded for the first time are stored in order, and the pixels whose cost
+    was set are stored in touched, so the caller can reset only those entries afterwards.
+    """
+    cols, rows = grid.shape
+    target_col = target // rows
+    target_row = target % rows
+
+    # Landmarks that cannot reach the target do not give a bound
+    active = np.empty(len(scales), dtype=np.int64)
+    active_count = 0
+    for k in range(len(scales)):
+        if tables[k, target] != UNREACHABLE:
+            active[active_count] = k
+            active_count += 1
+
+    open_heap.push(start, 0.0)
+    costs[start] = 0.0
+    parent[start] = start
+    touched[0] = start
+    touched_count = 1
+    expanded = 0
+
+    while not open_heap.is_empty():
+        curr = open_heap.pop()
+        if not closed[curr]:
+            closed[curr] = True
+            order[expanded] = curr
+            expanded += 1
+        if curr == target:
+            break
+
+        col = curr // rows
+        row = curr % rows
+        for k in range(8):
+            n_col = col + NEIGHBOUR_COLS[k]
+            n_row = row + NEIGHBOUR_ROWS[k]
+            if 0 <= n_col < cols and 0 <= n_row < rows and grid[n_col, n_row] == 1:
+                node = n_col * rows + n_row
+                cost = costs[curr] + NEIGHBOUR_COSTS[k]
+                if cost < costs[node]:
+                    if parent[node] == -1:
+                        touched[touched_count] = node
+                        touched_count += 1
+                    costs[node] = cost
+                    parent[node] = curr
+
+                    heuristic = octile_distance(n_col, n_row, target_col, target_row)
+                    for i in range(active_count):
+                        landmark = active[i]
+                        bound = (abs(np.int64(tables[landmark, target])
+                                     - np.int64(tables[landmark, node])) - 1) / scales[landmark]
+                        heuristic = max(heuristic, bound)
+                    open_heap.push_or_decrease(node, cost + heuristic)
+
+    return expanded, touched_count
+
+
+class LandmarkIndex:
+    """
+    Precomputed landmark distances of a MatrixGraph, used to answer many A* queries on it.
+
+    The landmarks are picked in the largest connected component of the path, each one as far as
+    possible from the ones picked before it, which spreads them around the edges of the maze.
+
+    Instance Attributes:
+        - landmarks: An (k, 2) int32 array of the (col, row) of every landmark
+        - distances: A (k, cols, rows) uint32 array where distances[i] holds the distance from
+                     landmarks[i] to every pixel, in units of 1 / scales[i] pixels, or
+                     UNREACHABLE
+        - scales: An array of the number of units per pixel of every landmark
+
+    Private Instance Attributes:
+        - _graph: The MatrixGraph the index was built for
+        - _tables: distances, reshaped to be indexed by [landmark, pixel id]
+        - _costs, _parent, _closed, _heap, _order, _touched: Search state reused by every query
+
+    Sample Usage:
+    >>> grid = np.ones((5, 1), dtype=np.uint8)
+    >>> index = LandmarkIndex(MatrixGraph(grid), 2)
+    >>> index.a_star((0, 0), (4, 0)).path
+    [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0)]
+    """
+
+    landmarks: np.ndarray
+    distances: np.ndarray
+    scales: np.ndarray
+    _graph: MatrixGraph
+    _tables: np.ndarray
+    _costs: np.ndarray
+    _parent: np.ndarray
+    _closed: np.ndarray
+    _heap: IndexedMinHeap
+    _order: np.ndarray
+    _touched: np.ndarray
+
+    def __init__(self, graph: MatrixGraph, count: int = DEFAULT_LANDMARKS,
+                 max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Build the index of graph with count landmarks, or fewer if their distance tables would
+        take more than max_bytes, or the largest component has fewer pixels.
+        """
+        self._graph = graph
+        grid = graph.graph
+        size = grid.size
+        count = min(count, max_bytes // (4 * size))
+
+        self._costs = np.full(size, np.inf)
+        self._parent = np.full(size, -1, dtype=np.int32)
+        self._closed = np.zeros(size, dtype=np.bool_)
+        self._heap = IndexedMinHeap(size)
+        self._order = np.empty(size, dtype=np.int32)
+        self._touched = np.empty(size, dtype=np.int32)
+
+        landmarks = []
+        fields = []
+        component_sizes = graph.component_sizes()
+        if count > 0 and len(component_sizes) > 0:
+            label = int(np.argmax(component_sizes)) + 1
+            component = np.flatnonzero(graph.labels.ravel() == label)
+            count = min(count, len(component))
+
+            # Start from the pixel farthest from an arbitrary pixel of the component, then keep
+            # adding the pixel farthest from every landmark picked so far
+            closest = self._distance_field(int(component[0]))
+            for _ in range(count):
+                landmark = int(component[np.argmax(closest[component])])
+                field = self._distance_field(landmark)
+                landmarks.append(landmark)
+                fields.append(field)
+                closest = field if len(fields) == 1 else np.minimum(closest, field)
+
+        self.landmarks = ids_to_coords(np.array(landmarks, dtype=np.int32), grid.shape[1])
+        self.distances = np.empty((len(fields),) + grid.shape, dtype=np.uint32)
+        self.scales = np.empty(len(fields), dtype=np.float64)
+        for i, field in enumerate(fields):
+            reachable = np.isfinite(field)
+            self.scales[i] = min(DISTANCE_SCALE, (UNREACHABLE - 1) / max(field[reachable].max(), 1))
+            table = np.full(size, UNREACHABLE, dtype=np.uint32)
+            table[reachable] = np.floor(field[reachable] * self.scales[i])
+            self.distances[i] = table.reshape(grid.shape)
+        self._tables = self.distances.reshape((len(fields), size))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the number of bytes used by the distance tables
+        """
+        return self.distances.nbytes
+
+    def heuristic(self, node: tuple, target: tuple) -> float:
+        """
+        Return the lower bound on the length of the shortest path from node to target that
+        a_star uses
+        """
+        rows = self._graph.rows
+        node_id = node[0] * rows + node[1]
+        target_id = target[0] * rows + target[1]
+        bound = self._graph.octile_distance(node, target)
+        for k in range(len(self.scales)):
+            if self._tables[k, target_id] != UNREACHABLE:
+                difference = abs(int(self._tables[k, target_id]) - int(self._tables[k, node_id]))
+                bound = max(bound, (difference - 1) / self.scales[k])
+        return bound
+
+    def a_star(self, start: tuple, target: tuple) -> SearchResult:
+        """
+        Return the SearchResult of running A* with landmark heuristics from start to target.
+
+        The search state is allocated once per index and only the entries a query touched are
+        reset after it, so the cost of a query depends on how many pixels it reaches instead of
+        the size of the maze.
+        """
+        if not self._graph.same_component(start, target):
+            return unreachable_result()
+        rows = self._graph.rows
+        start_id = start[0] * rows + start[1]
+        target_id = target[0] * rows + target[1]
+
+        expanded, touched_count = landmark_a_star_kernel(
+            self._graph.graph, start_id, target_id, self._tables, self.scales, self._costs,
+            self._parent, self._closed, self._heap, self._order, self._touched)
+        trace = ids_to_coords(self._order[:expanded], rows)
+        path = ids_to_coords(walk_parents(self._parent, start_id, target_id), rows)
+
+        touched = self._touched[:touched_count]
+        self._costs[touched] = np.inf
+        self._parent[touched] = -1
+        self._closed[touched] = False
+        self._heap.clear()
+        return SearchResult([(col, row) for col, row in path.tolist()], trace)
+
+    def _distance_field(self, source: int) -> np.ndarray:
+        """
+        Return the flat float array of the length of the shortest path from the pixel id source
+        to every pixel, or inf for pixels it cannot reach
+        """
+        rows = self._graph.rows
+        return distance_field(self._graph, (source // rows, source % rows)).distances.ravel()
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['numba', 'numpy', 'matrix_graph', 'indexed_heap', 'solver', 'kernels',
+                          'distance_field'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -5,68 +5,59 @@ Contains the main method of the program
 CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
 """
 
-import cv2
+import argparse
+import os
+import threading
+from typing import Optional
 import numpy as np
-from typing import Tuple
 import pygame
 from matrix_graph import MatrixGraph
 from algorithms import PathfindingAlgorithms
 from drop_down import DropDown
 from button import Button, ToggleButton
 from text_box import TextBox
-from image_processing import crop_image
+from maze_cache import MazeCache
+from maze_loader import LoadedMaze, MazeLoader
+from metrics import JsonLinesSink, MetricsSink, ProfilerSink
+from precompile import precompile
+from text_cache import render_text
 
 # Constants
 GUI_Y_OFFSET = 50  # The offset used for the GUI at the top of the program
 PADDING_Y = round(.3 * 720)
 PADDING_X = round(.10 * 1280)
+LOADING_TEXT_POS = (10, 65)  # Where the progress indicator is drawn while a maze loads
+LOADING_FRAME_MS = 300  # How often the dots of the progress indicator change
+START_COLOUR = (0, 255, 0)
+END_COLOUR = (255, 0, 0)
 
+# The mazes listed in the maze drop down menu, which are preloaded in the background at startup
+MAZE_OPTIONS = {'Maze 1': 'mazes/maze.png', 'Maze 2': 'mazes/maze2.jpg',
+                'Maze 3': 'mazes/maze3.png'}
 
-def initialize_maze(maze_path: str, rectangular: bool = True) -> tuple[
-                                                                    pygame.Surface, pygame.Surface,
-                                                                    MatrixGraph, pygame.Surface,
-                                                                    int, int, None, None, bool]:
+# Preprocessed mazes are cached on disk, so switching back to a maze does not redo the pipeline,
+# and mazes are loaded in a background thread, so the window keeps responding while they load
+MAZE_CACHE = MazeCache()
+MAZE_LOADER = MazeLoader(MAZE_CACHE)
+
+
+def initialize_maze(display_surface: pygame.Surface, maze: LoadedMaze) -> tuple[
+                                                                    pygame.Surface, MatrixGraph,
+                                                                    pygame.Surface, int, int,
+                                                                    None, None, bool]:
 
     """
-    Initialize the program variables with respect to the maze found at maze_path.
+    Initialize the program variables with respect to the loaded maze, centered on
+    display_surface. Nothing is drawn, the caller redraws the whole display afterwards.
 
-    Return a tuple containing: (The Pygame Display, The Surface to draw on, The MatrixGraph for the
-    maze, The MatrixGraph Surface layer, The amount of pixels used to center the width, The amount
-    of pixels used to center the height, A None value representing the start of the maze, A None
-    value representing the end of the maze, and a bool representing if we can run the program once)
+    Return a tuple containing: (The Surface to draw on, The MatrixGraph for the maze, The
+    MatrixGraph Surface layer, The amount of pixels used to center the width, The amount of pixels
+    used to center the height, A None value representing the start of the maze, A None value
+    representing the end of the maze, and a bool representing if we can run the program once)
     """
 
-    # Initialize pygame and the read the maze image
-    pygame.init()
-    maze = maze_path
-    image = cv2.resize(cv2.imread(maze), (1280, 720))
-
-    # crop only works for rectangular mazes
-    if rectangular:
-        cropped = crop_image(image)
-    else:
-        cropped = image
-
-    # Global thresholding using Otsu's binarization
-    # Note: Although unpacking like this results in one of the variables to be unused and makes
-    # PyTA heavily depressed, this is standard OpenCV notation.
-    # For reference, you may check docs.opencv.org/master/d7/d4d/tutorial_py_thresholding.html
-    retVal, thresh = cv2.threshold(cv2.cvtColor(cropped, cv2.COLOR_RGB2GRAY), 0, 255,
-                                   cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-
-    thinned = np.array(cv2.ximgproc.thinning(thresh)) // 255
-
-    # cut borders
-    if not rectangular:
-        temp = np.delete(thinned, [0, thinned.shape[1] - 1], axis=1)
-        temp = np.delete(thinned, [0, thinned.shape[0] - 1], axis=0)
-        graph = MatrixGraph(np.swapaxes(temp, 0, 1))
-    else:
-        graph = MatrixGraph(np.swapaxes(thinned, 0, 1))
-
-    # Create pygame surfaces for the display, and the maze
-    display_surface = pygame.display.set_mode((1280 + PADDING_X, 720 + GUI_Y_OFFSET + PADDING_Y))
-    maze_surface = pygame.surfarray.make_surface(np.swapaxes(cropped, 0, 1))
+    # Create a pygame surface for the maze
+    maze_surface = pygame.surfarray.make_surface(np.swapaxes(maze.cropped, 0, 1))
 
     # Center the maze image
     maze_img_w = maze_surface.get_width()
@@ -76,29 +67,102 @@ def initialize_maze(maze_path: str, rectangular: bool = True) -> tuple[
     maze_centered_width = ((surface_w - maze_img_w) // 2)
     maze_centered_height = ((surface_h - maze_img_h) // 2) + 2 * GUI_Y_OFFSET
 
-    # Draw the maze at the centered location
-    display_surface.blit(maze_surface, (maze_centered_width, maze_centered_height))
-
     # Create the surface to draw the pathing on
     surface = pygame.Surface((1280 + PADDING_X, 720 + GUI_Y_OFFSET + PADDING_Y), pygame.SRCALPHA,
                              32)
     surface = surface.convert_alpha()
 
-    display_surface.blit(surface, (0, 0))
-
     # Initialize starting variables
     start_vertex = None
     end_vertex = None
     run_once = True
 
-    return (
-        display_surface, surface, graph, maze_surface, maze_centered_width, maze_centered_height,
-        start_vertex, end_vertex, run_once)
+    return (surface, maze.graph, maze_surface, maze_centered_width, maze_centered_height,
+            start_vertex, end_vertex, run_once)
+
+
+def draw_loading(display_surface: pygame.Surface, maze_path: str) -> None:
+    """
+    Draw the progress indicator shown while the maze at maze_path is loading, a message with
+    between 0 and 3 dots that cycle over time
+    """
+    dots = '.' * (pygame.time.get_ticks() // LOADING_FRAME_MS % 4)
+    display_surface.blit(render_text(f'Loading {os.path.basename(maze_path)}{dots}'),
+                         LOADING_TEXT_POS)
+
+
+def loading_rect(maze_path: str) -> pygame.Rect:
+    """
+    Return the area draw_loading draws on for the maze at maze_path, with any number of dots
+    """
+    text_surface = render_text(f'Loading {os.path.basename(maze_path)}...')
+    return text_surface.get_rect(topleft=LOADING_TEXT_POS)
+
 
+def draw_point(surface: pygame.Surface, point: tuple[int, int], colour: tuple[int, int, int],
+               maze_x_offset: int, maze_y_offset: int) -> pygame.Rect:
+    """
+    Draw the start or end point at the maze pixel point on surface, and return the area it was
+    drawn on
+    """
+    return pygame.draw.circle(surface, colour, (point[0] + maze_x_offset,
+                                                point[1] + maze_y_offset), 3)
 
-# Initialize variables from the initialize_maze call with the specified maze
-display, surf, graph1, maze_img, \
-    centered_w, centered_h, start, end, once = initialize_maze('mazes/maze.png')
+
+def wait_for_events(timeout: int) -> list:
+    """
+    Return the pending pygame events. If there are none, wait for one for up to timeout
+    milliseconds, or forever if timeout is 0, so an idle window does not use the CPU.
+    """
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return pygame.event.get()
+    return [event] + pygame.event.get()
+
+
+def metrics_sinks(argv: Optional[list[str]] = None) -> list[MetricsSink]:
+    """
+    Parse the command line arguments in argv and return the MetricsSinks they ask for, so that
+
+        python main.py --metrics runs.jsonl --profile runs.prof
+
+    appends the metrics of every search to runs.jsonl and profiles every search and its replay
+    into runs.prof. No sinks are returned by default.
+    """
+    parser = argparse.ArgumentParser(description='Visualize pathfinding algorithms on mazes.')
+    parser.add_argument('--metrics', help='a JSON lines file to append the metrics of every '
+                                          'search to')
+    parser.add_argument('--profile', help='the file to write a profile of every search and its '
+                                          'replay to when the window is closed')
+    parser.add_argument('--profiler', choices=['cprofile', 'pyinstrument'], default='cprofile')
+    args = parser.parse_args(argv)
+
+    sinks = []
+    if args.metrics is not None:
+        sinks.append(JsonLinesSink(args.metrics))
+    if args.profile is not None:
+        sinks.append(ProfilerSink(args.profiler, args.profile))
+    return sinks
+
+
+# Parse the command line before opening the window, so --help does not open it
+sinks = metrics_sinks()
+
+# Create the display once, then load the first maze and preload the others in the background
+pygame.init()
+display = pygame.display.set_mode((1280 + PADDING_X, 720 + GUI_Y_OFFSET + PADDING_Y))
+MAZE_LOADER.request(MAZE_OPTIONS['Maze 1'])
+for preload_path in MAZE_OPTIONS.values():
+    MAZE_LOADER.preload(preload_path)
+
+# Initialize variables from the initialize_maze call with the first maze
+surf, graph1, maze_img, \
+    centered_w, centered_h, start, end, once = initialize_maze(display, MAZE_LOADER.wait())
+
+# Compile the MatrixGraph methods and search kernels the first click needs while the user looks
+# at the maze, since numba cannot cache jitclasses. The thread is a daemon, so closing the
+# window does not wait for it.
+threading.Thread(target=precompile, name='precompile', daemon=True).start()
 
 # Initialize the GUI. This includes buttons, text boxes, drop down menus, timers, and counters.
 start_button = ToggleButton((10, 10, 100, 50), 'Start', (0, 170, 0))
@@ -106,7 +170,8 @@ end_button = ToggleButton((110, 10, 100, 50), 'End', (170, 0, 0))
 restart_button = Button((720, 10, 100, 50), 'Restart', (255, 0, 0))
 iteration_counter_pos = (210, 10)
 timer_pos = (210, 30)
-algo_drop_down = DropDown(['Breadth First Search', 'Depth First Search', 'A*'],
+algo_drop_down = DropDown(['Breadth First Search', 'Depth First Search', 'A*',
+                           'Bidirectional BFS', 'Bidirectional A*', 'JPS', 'JPS+'],
                           (520, 10, 200, 50), display)
 maze_drop_down = DropDown(['Maze 1', 'Maze 2', 'Maze 3', 'Other'], (820, 10, 200, 50), display)
 maze_drop_down_text_box = TextBox('', 'Enter File Name', (1025, 10, 150, 50), display)
@@ -114,50 +179,88 @@ draw_text_box = False
 
 # Initialize the algorithm object
 alg = PathfindingAlgorithms(iteration_counter_pos, centered_w, centered_h, timer_pos)
+alg.sinks = sinks
+alg.draw_speed(surf)
 
-while True:
-    # Draw the start and end points
-    if start is not None:
-        pygame.draw.circle(surf, (0, 255, 0), (start[0] + centered_w, start[1] + centered_h), 3)
-    if end is not None:
-        pygame.draw.circle(surf, (255, 0, 0), (end[0] + centered_w, end[1] + centered_h), 3)
+# The areas of the display that changed since the last frame. Only these are redrawn and
+# updated on screen, so the cost of a frame depends on what changed instead of the window size.
+dirty = [display.get_rect()]
+loading_path = None
 
+while True:
     # If the start and end are selected, run the program
     if start is not None and end is not None and once:
+        if not graph1.same_component(start, end):
+            print('The start and end points are not connected')
         if algo_drop_down.get_first() == 'Breadth First Search':
             alg.breadth_first_search(graph1, start, end, surf, display)
         elif algo_drop_down.get_first() == 'Depth First Search':
             alg.depth_first_search_iterative(graph1, start, end, surf, display)
+        elif algo_drop_down.get_first() == 'Bidirectional BFS':
+            alg.bidirectional_breadth_first_search(graph1, start, end, surf, display)
+        elif algo_drop_down.get_first() == 'Bidirectional A*':
+            alg.bidirectional_a_star(graph1, start, end, surf, display)
+        elif algo_drop_down.get_first() == 'JPS':
+            alg.jump_point_search(graph1, start, end, surf, display)
+        elif algo_drop_down.get_first() == 'JPS+':
+            alg.jump_point_search_plus(graph1, start, end, surf, display)
         else:
             alg.a_star(graph1, start, end, surf, display)  # A STAR
         once = False
 
-    # Redraw the background and maze, then draw the buttons
-    display.fill((255, 255, 255, 0))
-    display.blit(maze_img, (centered_w, centered_h))
-    start_button.draw(display)
-    end_button.draw(display)
-    restart_button.draw(display)
-    algo_drop_down.draw_list()
-    maze_drop_down.draw_list()
-    if draw_text_box:
-        maze_drop_down_text_box.draw_text_box()
-
-    # Check pygame events
-    events = pygame.event.get()
+        # Draw the start and end points again on top of the search
+        dirty.append(draw_point(surf, start, START_COLOUR, centered_w, centered_h))
+        dirty.append(draw_point(surf, end, END_COLOUR, centered_w, centered_h))
+
+    # Redraw the changed areas from the background up: the maze, the buttons, the pathing
+    # surface and the progress indicator, then update only those areas on screen
+    for area in dirty:
+        display.set_clip(area)
+        display.fill((255, 255, 255, 0))
+        display.blit(maze_img, (centered_w, centered_h))
+        start_button.draw(display)
+        end_button.draw(display)
+        restart_button.draw(display)
+        algo_drop_down.draw_list()
+        maze_drop_down.draw_list()
+        if draw_text_box:
+            maze_drop_down_text_box.draw_text_box()
+        display.blit(surf, (0, 0))
+        if loading_path is not None:
+            draw_loading(display, loading_path)
+    display.set_clip(None)
+    pygame.display.update(dirty)
+    dirty = []
+
+    # Check pygame events. While a maze loads, wake up to animate the progress indicator and to
+    # check if it is ready, otherwise sleep until there is an event.
+    events = wait_for_events(LOADING_FRAME_MS if loading_path is not None else 0)
+    speed = alg.speed
+    alg.handle_speed_keys(events)
+    if alg.speed != speed:
+        dirty.append(alg.draw_speed(surf))
     for event in events:
         if event.type == pygame.QUIT:
+            MAZE_LOADER.shutdown()
+            for sink in alg.sinks:
+                if isinstance(sink, ProfilerSink):
+                    sink.save()
             pygame.quit()
         if event.type == pygame.MOUSEBUTTONDOWN:
             posx, posy = pygame.mouse.get_pos()
 
             if start_button.active:
                 start = start_button.set_pos(graph1, posx - centered_w, posy - centered_h)
+                if start is not None:
+                    dirty.append(draw_point(surf, start, START_COLOUR, centered_w, centered_h))
             start_button.check_pressed(posx, posy)
 
             if end_button.active:
                 end = end_button.set_pos(graph1, posx - centered_w, posy - centered_h)
+                if end is not None:
+                    dirty.append(draw_point(surf, end, END_COLOUR, centered_w, centered_h))
             end_button.check_pressed(posx, posy)
+            dirty.extend([start_button.get_rect(), end_button.get_rect()])
 
             if restart_button.check_pressed(posx, posy):
                 once = True
@@ -165,64 +268,64 @@ while True:
                 end = None
                 start_button.active = False
                 end_button.active = False
-                display.blit(maze_img, (centered_w, centered_h))
                 surf.fill((255, 255, 255, 0))
+                alg.draw_speed(surf)
+                dirty.append(display.get_rect())
 
-    # Update the algorithm drop down list
+    # Update the algorithm drop down list, redrawing it if it was dropped down or closed
+    algo_drop_down_area = algo_drop_down.get_rect()
     algo_drop_down_selected = algo_drop_down.update(events)
     if algo_drop_down_selected != -1:
         algo_drop_down.update_list(algo_drop_down_selected)
+    if algo_drop_down_selected != -1 or algo_drop_down.get_rect() != algo_drop_down_area:
+        dirty.append(algo_drop_down_area.union(algo_drop_down.get_rect()))
 
     # Update the selected maze drop down list
+    maze_drop_down_area = maze_drop_down.get_rect()
     maze_drop_down_selected = maze_drop_down.update(events)
     if maze_drop_down_selected != -1:
         maze_drop_down.update_list(maze_drop_down_selected)
+        dirty.append(maze_drop_down_text_box.get_rect())
 
-        # Check the selected option
-        if maze_drop_down.get_first() == 'Maze 1':
-            # Reassign variables with respect to the new maze
-            display, surf, graph1, maze_img, \
-                centered_w, centered_h, start, end, once = initialize_maze('mazes/maze.png')
-            alg.update_off_set_values(centered_w, centered_h)
-            draw_text_box = False
-        elif maze_drop_down.get_first() == 'Maze 2':
-            # Reassign variables with respect to the new maze
-            display, surf, graph1, maze_img, \
-                centered_w, centered_h, start, end, once = initialize_maze('mazes/maze2.jpg')
-            alg.update_off_set_values(centered_w, centered_h)
-            draw_text_box = False
-        elif maze_drop_down.get_first() == 'Maze 3':
-            # Reassign variables with respect to the new maze
-            display, surf, graph1, maze_img, \
-                centered_w, centered_h, start, end, once = initialize_maze('mazes/maze3.png')
-            alg.update_off_set_values(centered_w, centered_h)
+        # Start loading the selected maze, which is swapped in once it is ready
+        if maze_drop_down.get_first() in MAZE_OPTIONS:
+            MAZE_LOADER.request(MAZE_OPTIONS[maze_drop_down.get_first()])
             draw_text_box = False
         elif maze_drop_down.get_first() == 'Other':
             # If other is selected, allow the text box to be drawn
             draw_text_box = True
+    if maze_drop_down_selected != -1 or maze_drop_down.get_rect() != maze_drop_down_area:
+        dirty.append(maze_drop_down_area.union(maze_drop_down.get_rect()))
 
     # If the textbox is active, update it
     if draw_text_box:
         # Update and get the returned text
         returned_text = maze_drop_down_text_box.update(events)
+        if any(event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN) for event in events):
+            dirty.append(maze_drop_down_text_box.get_rect())
         if returned_text is not None:
             try:
-                # If there is a valid input, switch to that maze.
-
+                # If there is a valid input, start loading that maze.
                 # If the maze is circular, do not run the crop.
-                if returned_text[6] == 'c':
-                    display, surf, graph1, maze_img, \
-                        centered_w, centered_h, start, end, once = initialize_maze(returned_text,
-                                                                                   False)
-                else:
-                    display, surf, graph1, maze_img, \
-                        centered_w, centered_h, start, end, once = initialize_maze(returned_text)
-                alg.update_off_set_values(centered_w, centered_h)
-            except Exception:  # Exception is broad here because Cv2 does not give good error
-                print('Path does not exist')  # messages, however the error is caused by the path
-                # location not existing
-
-    # Pygame
-    display.blit(surf, (0, 0))
-    pygame.time.wait(1)
-    pygame.display.flip()
+                MAZE_LOADER.request(returned_text, returned_text[6] != 'c')
+            except IndexError:
+                print('Path does not exist')
+
+    # Swap in the requested maze once it has loaded, or animate the progress indicator
+    if loading_path is not None:
+        dirty.append(loading_rect(loading_path))
+    try:
+        loaded_maze = MAZE_LOADER.poll()
+    except Exception:  # Exception is broad here because Cv2 does not give good error
+        loaded_maze = None
+        print('Path does not exist')  # messages, however the error is caused by the path
+        # location not existing
+    if loaded_maze is not None:
+        surf, graph1, maze_img, \
+            centered_w, centered_h, start, end, once = initialize_maze(display, loaded_maze)
+        alg.update_off_set_values(centered_w, centered_h)
+        alg.draw_speed(surf)
+        dirty.append(display.get_rect())
+    loading_path = MAZE_LOADER.loading()
+    if loading_path is not None:
+        dirty.append(loading_rect(loading_path))
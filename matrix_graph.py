@@ -6,16 +6,330 @@ CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
 """
 
 import math
+from typing import Callable
 import numba
+import numba.extending
 import numpy as np
 
 # Numba requirements
 spec = [
     ('graph', numba.uint8[:, :]),
-    ('rows', numba.uint16),
-    ('cols', numba.uint16)
+    ('rows', numba.int64),
+    ('cols', numba.int64),
+    ('nearest', numba.int32[:, :]),
+    ('labels', numba.int32[:, :]),
+    ('sizes', numba.int64[:]),
+    ('masks', numba.uint8[:, :]),
+    ('jumps', numba.int32[:, :, :])
 ]
 
+# The (col, row) offsets of the 8 neighbours of a pixel, in the same order as
+# MatrixGraph.get_valid_neighbours. Bit k of a neighbour mask is set if neighbour k is on the path.
+NEIGHBOUR_COLS = np.array([0, 0, -1, 1, -1, 1, -1, 1], dtype=np.int64)
+NEIGHBOUR_ROWS = np.array([-1, 1, 0, 0, -1, -1, 1, 1], dtype=np.int64)
+
+# The number of pixels stored in every word of a packed grid. Pixel (col, row) of a packed grid
+# is bit col % PACK_BITS of the uint64 word [col // PACK_BITS, row], so a packed grid keeps the
+# rows of the grid it was packed from, and its columns are padded with empty ones to a multiple
+# of PACK_BITS. See packed_graph.pack_grid.
+PACK_BITS = 64
+
+
+def grid_shape(grid: np.ndarray) -> tuple[int, int]:
+    """
+    Return the (cols, rows) of grid, which is either a uint8 grid or a packed grid. The cols of a
+    packed grid include the empty columns that pad it to a multiple of PACK_BITS.
+
+    The functions in this module and kernels.py read grids through grid_shape, on_path and
+    count_path, which numba compiles separately for uint8 and packed grids, so they accept either
+    one.
+    """
+    if grid.dtype == np.uint64:
+        return grid.shape[0] * PACK_BITS, grid.shape[1]
+    return grid.shape
+
+
+def on_path(grid: np.ndarray, col: int, row: int) -> bool:
+    """
+    Return whether the pixel (col, row), which must be inside grid, is on the path, where grid is
+    either a uint8 grid or a packed grid
+    """
+    if grid.dtype == np.uint64:
+        return (int(grid[col // PACK_BITS, row]) >> (col % PACK_BITS)) & 1 == 1
+    return grid[col, row] == 1
+
+
+def count_path(grid: np.ndarray) -> int:
+    """
+    Return the number of path pixels in grid, which is either a uint8 grid or a packed grid
+    """
+    if grid.dtype == np.uint64:
+        return int(np.unpackbits(np.ascontiguousarray(grid).view(np.uint8)).sum())
+    return int(np.count_nonzero(grid))
+
+
+@numba.extending.overload(grid_shape, inline='always')
+def _grid_shape_overload(grid: numba.types.Array) -> Callable:
+    """
+    Return the implementation of grid_shape that numba compiles for grids of the type of grid
+    """
+    if grid.dtype == numba.uint64:
+        def packed_grid_shape(grid: numba.types.Array) -> tuple[int, int]:
+            return grid.shape[0] * PACK_BITS, grid.shape[1]
+        return packed_grid_shape
+
+    def uint8_grid_shape(grid: numba.types.Array) -> tuple[int, int]:
+        return grid.shape
+    return uint8_grid_shape
+
+
+@numba.extending.overload(on_path, inline='always')
+def _on_path_overload(grid: numba.types.Array, col: numba.types.Integer,
+                      row: numba.types.Integer) -> Callable:
+    """
+    Return the implementation of on_path that numba compiles for grids of the type of grid
+    """
+    if grid.dtype == numba.uint64:
+        def packed_on_path(grid: numba.types.Array, col: numba.types.Integer,
+                           row: numba.types.Integer) -> bool:
+            word = grid[col // PACK_BITS, row]
+            return (word >> numba.uint64(col % PACK_BITS)) & numba.uint64(1) == 1
+        return packed_on_path
+
+    def uint8_on_path(grid: numba.types.Array, col: numba.types.Integer,
+                      row: numba.types.Integer) -> bool:
+        return grid[col, row] == 1
+    return uint8_on_path
+
+
+@numba.extending.overload(count_path)
+def _count_path_overload(grid: numba.types.Array) -> Callable:
+    """
+    Return the implementation of count_path that numba compiles for grids of the type of grid
+    """
+    if grid.dtype == numba.uint64:
+        def packed_count_path(grid: numba.types.Array) -> int:
+            count = 0
+            for col in range(grid.shape[0]):
+                for row in range(grid.shape[1]):
+                    word = grid[col, row]
+                    while word != 0:
+                        # Clear the lowest set bit
+                        word &= word - numba.uint64(1)
+                        count += 1
+            return count
+        return packed_count_path
+
+    def uint8_count_path(grid: numba.types.Array) -> int:
+        return np.count_nonzero(grid)
+    return uint8_count_path
+
+
+@numba.njit(nogil=True, cache=True)
+def nearest_path_map(grid: np.ndarray) -> np.ndarray:
+    """
+    Return an int32 array with the same shape as grid, that stores for every pixel the pixel id
+    (col * rows + row) of the closest pixel on the path by euclidean distance, or -1 if grid does
+    not contain any path pixels.
+
+    This is the exact euclidean distance transform of Felzenszwalb and Huttenlocher, keeping track
+    of which pixel is closest instead of the distance to it. The closest path pixel in the same
+    column is found for every pixel first, then for every row the lower envelope of the parabolas
+    (col - q) ** 2 + (row - closest row in column q) ** 2 picks the closest column q.
+    """
+    cols, rows = grid_shape(grid)
+    nearest = np.full((cols, rows), -1, dtype=np.int32)
+
+    # Scan every column down and up to find the closest path row in the same column
+    column_nearest = np.full((cols, rows), -1, dtype=np.int32)
+    for col in range(cols):
+        last = -1
+        for row in range(rows):
+            if on_path(grid, col, row):
+                last = row
+            column_nearest[col, row] = last
+        last = -1
+        for row in range(rows - 1, -1, -1):
+            if on_path(grid, col, row):
+                last = row
+            if last != -1 and (column_nearest[col, row] == -1
+                               or last - row < row - column_nearest[col, row]):
+                column_nearest[col, row] = last
+
+    envelope = np.empty(cols, dtype=np.int64)  # The columns whose parabolas form the envelope
+    bounds = np.empty(cols + 1, dtype=np.float64)  # Where each parabola starts being the lowest
+    heights = np.empty(cols, dtype=np.float64)
+    for row in range(rows):
+        k = -1
+        for q in range(cols):
+            if column_nearest[q, row] == -1:
+                continue
+            heights[q] = (column_nearest[q, row] - row) ** 2
+
+            # Remove the parabolas that the parabola of q is lower than everywhere they are lowest
+            start = -np.inf
+            while k >= 0:
+                p = envelope[k]
+                start = ((heights[q] + q * q) - (heights[p] + p * p)) / (2.0 * (q - p))
+                if start > bounds[k]:
+                    break
+                k -= 1
+            k += 1
+            envelope[k] = q
+            bounds[k] = start
+
+        if k == -1:
+            # No column contains a path pixel, so the grid has no path pixels at all
+            return nearest
+        bounds[k + 1] = np.inf
+
+        j = 0
+        for col in range(cols):
+            while bounds[j + 1] < col:
+                j += 1
+            q = envelope[j]
+            nearest[col, row] = q * rows + column_nearest[q, row]
+    return nearest
+
+
+@numba.njit(nogil=True, cache=True)
+def label_components(grid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return a tuple of (an int32 array with the same shape as grid that labels every path pixel
+    with the number of its 8-connected component, starting from 1, and 0 for every other pixel,
+    an int64 array where index i is the number of pixels in component i).
+
+    Every unlabelled path pixel starts a breadth first flood fill of its component.
+    """
+    cols, rows = grid_shape(grid)
+    labels = np.zeros((cols, rows), dtype=np.int32)
+    sizes = [0]
+    queue = np.empty(cols * rows, dtype=np.int64)
+
+    for col in range(cols):
+        for row in range(rows):
+            if not on_path(grid, col, row) or labels[col, row] != 0:
+                continue
+            label = len(sizes)
+            labels[col, row] = label
+            queue[0] = col * rows + row
+            head = 0
+            tail = 1
+            while head < tail:
+                curr_col, curr_row = divmod(queue[head], rows)
+                head += 1
+                for d_col in range(-1, 2):
+                    for d_row in range(-1, 2):
+                        n_col = curr_col + d_col
+                        n_row = curr_row + d_row
+                        if 0 <= n_col < cols and 0 <= n_row < rows \
+                                and on_path(grid, n_col, n_row) and labels[n_col, n_row] == 0:
+                            labels[n_col, n_row] = label
+                            queue[tail] = n_col * rows + n_row
+                            tail += 1
+            sizes.append(tail)
+    return labels, np.array(sizes, dtype=np.int64)
+
+
+def pick_endpoints(grid: np.ndarray) -> tuple[tuple[int, int], tuple[int, int]]:
+    """
+    Return the first and last path pixels (in [col, row] order) of the largest connected
+    component of grid, which is either a uint8 grid or a packed grid, and which batch.py and
+    benchmark.py use as the start and target when none are given. Of several largest
+    components, the one labelled first by label_components is used.
+
+    Raise ValueError if grid does not contain any path pixels.
+    """
+    if grid.dtype != np.uint64:
+        grid = np.ascontiguousarray(grid, dtype=np.uint8)
+    labels, sizes = label_components(grid)
+    if len(sizes) < 2:
+        raise ValueError('grid does not contain any path pixels')
+    pixels = np.argwhere(labels == 1 + int(np.argmax(sizes[1:])))
+    return (int(pixels[0][0]), int(pixels[0][1])), (int(pixels[-1][0]), int(pixels[-1][1]))
+
+
+@numba.njit(cache=True)
+def neighbour_masks(grid: np.ndarray) -> np.ndarray:
+    """
+    Return a uint8 array with the same shape as grid, where bit k of every pixel is set if its
+    neighbour at (NEIGHBOUR_COLS[k], NEIGHBOUR_ROWS[k]) is on the path.
+    """
+    cols, rows = grid_shape(grid)
+    masks = np.zeros((cols, rows), dtype=np.uint8)
+    for col in range(cols):
+        for row in range(rows):
+            mask = 0
+            for k in range(8):
+                n_col = col + NEIGHBOUR_COLS[k]
+                n_row = row + NEIGHBOUR_ROWS[k]
+                if 0 <= n_col < cols and 0 <= n_row < rows and on_path(grid, n_col, n_row):
+                    mask |= 1 << k
+            masks[col, row] = mask
+    return masks
+
+
+@numba.njit(cache=True)
+def is_path(grid: np.ndarray, col: int, row: int) -> bool:
+    """
+    Return whether (col, row) is inside grid and on the path
+    """
+    cols, rows = grid_shape(grid)
+    return 0 <= col < cols and 0 <= row < rows and on_path(grid, col, row)
+
+
+@numba.njit(cache=True)
+def is_forced(grid: np.ndarray, col: int, row: int, d_col: int, d_row: int) -> bool:
+    """
+    Return whether the path pixel (col, row), reached by a move in the direction (d_col, d_row),
+    has a forced neighbour in the sense of jump point search: a neighbour that can only be
+    reached optimally through (col, row), because the pixel beside (col, row) that would give
+    an equally short path around it is a wall.
+    """
+    if d_col != 0 and d_row != 0:
+        return (is_path(grid, col - d_col, row + d_row) and not is_path(grid, col - d_col, row)) \
+            or (is_path(grid, col + d_col, row - d_row) and not is_path(grid, col, row - d_row))
+    # The two pixels beside a straight move are perpendicular to it
+    side_col = abs(d_row)
+    side_row = abs(d_col)
+    return (is_path(grid, col + d_col + side_col, row + d_row + side_row)
+            and not is_path(grid, col + side_col, row + side_row)) \
+        or (is_path(grid, col + d_col - side_col, row + d_row - side_row)
+            and not is_path(grid, col - side_col, row - side_row))
+
+
+@numba.njit(cache=True)
+def jump_table(grid: np.ndarray) -> np.ndarray:
+    """
+    Return an int32 array of shape (4, cols, rows), where for every pixel and each of the 4
+    straight directions (NEIGHBOUR_COLS[k], NEIGHBOUR_ROWS[k]) for k < 4, entry [k, col, row] is
+    the number of steps n > 0 to the first pixel in that direction with a forced neighbour, or
+    -n if the path ends n steps in that direction before such a pixel is reached.
+
+    These are the precomputed straight jumps of JPS+, so a straight jump takes constant time.
+    """
+    cols, rows = grid_shape(grid)
+    jumps = np.zeros((4, cols, rows), dtype=np.int32)
+    for k in range(4):
+        d_col = NEIGHBOUR_COLS[k]
+        d_row = NEIGHBOUR_ROWS[k]
+        # Visit the pixels so that the next pixel in the direction is always visited first
+        col_start, col_stop, col_step = (cols - 1, -1, -1) if d_col == 1 else (0, cols, 1)
+        row_start, row_stop, row_step = (rows - 1, -1, -1) if d_row == 1 else (0, rows, 1)
+        for col in range(col_start, col_stop, col_step):
+            for row in range(row_start, row_stop, row_step):
+                n_col = col + d_col
+                n_row = row + d_row
+                if not is_path(grid, n_col, n_row):
+                    jumps[k, col, row] = 0
+                elif is_forced(grid, n_col, n_row, d_col, d_row):
+                    jumps[k, col, row] = 1
+                elif jumps[k, n_col, n_row] > 0:
+                    jumps[k, col, row] = jumps[k, n_col, n_row] + 1
+                else:
+                    jumps[k, col, row] = jumps[k, n_col, n_row] - 1
+    return jumps
+
 
 @numba.experimental.jitclass(spec)
 class MatrixGraph:
@@ -23,12 +337,27 @@ class MatrixGraph:
     the graph with a value of either 0 or 1. Edges are implicitly stored as the
     8 nodes (pixels) around each node.
 
+    The closest path pixel of every pixel is precomputed with nearest_path_map the first time it
+    is needed, so closest_path takes constant time. Likewise, the connected components of the
+    path are labelled with label_components the first time they are needed, so same_component
+    takes constant time. build_neighbour_masks stores which of the 8 neighbours of every pixel are
+    on the path in one byte per pixel, after which get_valid_neighbours reads that byte instead of
+    checking the 8 neighbours one at a time. get_valid_neighbours returns a new list on every
+    call, so jitted code should use neighbour_mask or fill_neighbours instead, which allocate
+    nothing. build_jump_table precomputes the straight jumps used by JPS+ in
+    kernels.jump_point_search_plus.
+
     Note: This is a jitclass so type of inputs is very sensitive.
     """
 
     graph: np.ndarray
     rows: int
     cols: int
+    nearest: np.ndarray
+    labels: np.ndarray
+    sizes: np.ndarray
+    masks: np.ndarray
+    jumps: np.ndarray
 
     def __init__(self, matrix: np.ndarray) -> None:
         """
@@ -36,12 +365,23 @@ class MatrixGraph:
         """
         self.graph = matrix
         self.cols, self.rows = matrix.shape
+        self.nearest = np.empty((0, 0), dtype=np.int32)
+        self.labels = np.empty((0, 0), dtype=np.int32)
+        self.sizes = np.empty(0, dtype=np.int64)
+        self.masks = np.empty((0, 0), dtype=np.uint8)
+        self.jumps = np.empty((0, 0, 0), dtype=np.int32)
 
     def get_valid_neighbours(self, col: int, row: int) -> list[tuple]:
         """
         Return a list of pixels that are adjacent to (col, row)
         """
         neighbours = []
+        if self.masks.shape[0] != 0:
+            mask = self.masks[col, row]
+            for k in range(8):
+                if mask & (1 << k):
+                    neighbours.append((col + NEIGHBOUR_COLS[k], row + NEIGHBOUR_ROWS[k]))
+            return neighbours
 
         if row - 1 >= 0 and self.graph[col, row - 1] == 1:
             neighbours.append((col, row - 1))
@@ -70,26 +410,125 @@ class MatrixGraph:
 
         return math.sqrt((node1[0] - node2[0]) ** 2 + (node1[1] - node2[1]) ** 2)
 
-    def closest_path(self, point: tuple[int, int], radius: int) -> tuple[int, int]:
+    @staticmethod
+    def octile_distance(node1: tuple[int, int], node2: tuple[int, int]) -> float:
         """
-        Return a tuple of ints that represents the closest path to point within a certain radius
+        Return a float that represents the length of the shortest path between two points on an
+        empty 8-connected grid, where straight moves cost 1 and diagonal moves cost sqrt(2)
         """
-        temp = []
+        d_col = abs(node1[0] - node2[0])
+        d_row = abs(node1[1] - node2[1])
+        return max(d_col, d_row) + (math.sqrt(2) - 1) * min(d_col, d_row)
 
-        for y in range(point[1] - radius - 1, point[1] + radius):
-            for x in range(point[0] - radius - 1, point[0] + radius):
+    def build_jump_table(self) -> None:
+        """
+        Precompute the straight jumps of every pixel with jump_table, if they have not been
+        computed yet
+        """
+        if self.jumps.shape[0] == 0:
+            self.jumps = jump_table(self.graph)
+
+    def build_neighbour_masks(self) -> None:
+        """
+        Precompute the neighbour mask of every pixel, if it has not been computed yet
+        """
+        if self.masks.shape[0] == 0:
+            self.masks = neighbour_masks(self.graph)
 
-                if 0 <= y < self.rows and 0 <= x < self.cols and self.graph[x, y] == 1:
-                    temp.append((x, y))
-        index = 0
-        min_so_far = self.euclidean_distance(temp[0], point)
+    def neighbour_mask(self, col: int, row: int) -> int:
+        """
+        Return the neighbour mask of (col, row), as described in neighbour_masks.
 
-        for i in range(len(temp)):
-            if self.euclidean_distance(temp[i], point) < min_so_far:
-                min_so_far = self.euclidean_distance(temp[i], point)
-                index = i
+        Unlike get_valid_neighbours, this does not allocate anything, so jitted code can call it
+        once per expansion. If build_neighbour_masks has been called, this is a single lookup.
+        """
+        if self.masks.shape[0] != 0:
+            return self.masks[col, row]
+        mask = 0
+        for k in range(8):
+            n_col = col + NEIGHBOUR_COLS[k]
+            n_row = row + NEIGHBOUR_ROWS[k]
+            if 0 <= n_col < self.cols and 0 <= n_row < self.rows and self.graph[n_col, n_row] == 1:
+                mask |= 1 << k
+        return mask
 
-        return temp[index]
+    def fill_neighbours(self, col: int, row: int, out: np.ndarray) -> int:
+        """
+        Write the pixel ids (col * rows + row) of the pixels adjacent to (col, row) into out, in
+        the same order as get_valid_neighbours, and return how many were written.
+
+        out must be an int64 array with room for 8 ids. It is meant to be allocated once by the
+        caller and reused for every call, so nothing is allocated per call.
+        """
+        mask = self.neighbour_mask(col, row)
+        count = 0
+        for k in range(8):
+            if mask & (1 << k):
+                out[count] = (col + NEIGHBOUR_COLS[k]) * self.rows + row + NEIGHBOUR_ROWS[k]
+                count += 1
+        return count
+
+    def build_nearest_map(self) -> None:
+        """
+        Precompute the closest path pixel of every pixel, if it has not been computed yet
+        """
+        if self.nearest.shape[0] == 0:
+            self.nearest = nearest_path_map(self.graph)
+
+    def closest_path(self, point: tuple[int, int]) -> tuple[int, int]:
+        """
+        Return a tuple of ints that represents the closest path to point, at any distance.
+        Points outside of the graph are moved to its closest edge first.
+
+        Raise an IndexError if the graph does not contain any path.
+        """
+        self.build_nearest_map()
+        col = min(max(point[0], 0), self.cols - 1)
+        row = min(max(point[1], 0), self.rows - 1)
+        node = self.nearest[col, row]
+        if node == -1:
+            raise IndexError('The graph does not contain any path')
+        return (node // self.rows, node % self.rows)
+
+    def build_components(self) -> None:
+        """
+        Label the connected components of the path, if they have not been labelled yet
+        """
+        if self.labels.shape[0] == 0:
+            self.labels, self.sizes = label_components(self.graph)
+
+    def same_component(self, node1: tuple[int, int], node2: tuple[int, int]) -> bool:
+        """
+        Return whether node1 and node2 are both on the path and connected to each other
+        """
+        self.build_components()
+        label = self.labels[node1[0], node1[1]]
+        return label != 0 and label == self.labels[node2[0], node2[1]]
+
+    def component_count(self) -> int:
+        """
+        Return the number of connected components of the path
+        """
+        self.build_components()
+        return len(self.sizes) - 1
+
+    def component_sizes(self) -> np.ndarray:
+        """
+        Return an array of the number of pixels in every connected component of the path
+        """
+        self.build_components()
+        return self.sizes[1:].copy()
+
+    def closest_paths(self, points: np.ndarray) -> np.ndarray:
+        """
+        Return an (n, 2) array of the closest path to every (col, row) in the (n, 2) array
+        points, as in closest_path
+        """
+        self.build_nearest_map()
+        closest = np.empty((points.shape[0], 2), dtype=np.int64)
+        for i in range(points.shape[0]):
+            closest[i, 0], closest[i, 1] = self.closest_path((points[i, 0], points[i, 1]))
+        return closest
 
 
 if __name__ == '__main__':
@@ -97,7 +536,7 @@ if __name__ == '__main__':
     import python_ta.contracts
     python_ta.contracts.check_all_contracts()
     python_ta.check_all(config={
-        'extra-imports': ['numba', 'numpy', 'math'],
+        'extra-imports': ['numba', 'numba.extending', 'numpy', 'math', 'typing'],
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'max-line-length': 100,
         'disable': ['E1136']
@@ -0,0 +1,160 @@
+"""
+maze_cache.py:
+Contains the MazeCache class which stores preprocessed mazes on disk
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Optional
+import numpy as np
+from image_processing import MazePreprocessor
+
+# Bump this whenever preprocess_maze changes its output, so old cache entries are not reused
+PIPELINE_VERSION = 1
+
+
+class MazeCache:
+    """
+    A content addressed cache of preprocessed mazes.
+
+    Each entry is a folder named after the hash of the maze image bytes and the preprocessing
+    parameters, and contains the cropped image and the thinned grid as .npy files. Entries are
+    memory mapped when loaded, and the least recently used entries are deleted once the cache
+    grows past max_bytes.
+
+    Instance Attributes:
+        - directory: The folder the cache entries are stored in
+        - max_bytes: The maximum total size of the cache entries in bytes
+
+    Sample Usage:
+    >>> cache = MazeCache('.maze_cache', 256 * 1024 * 1024)
+    >>> cropped, grid = cache.load_or_preprocess('mazes/maze.png')
+    """
+
+    directory: str
+    max_bytes: int
+
+    def __init__(self, directory: str = '.maze_cache', max_bytes: int = 512 * 1024 * 1024) \
+            -> None:
+        """
+        Initialize a MazeCache that stores its entries in directory
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def load_or_preprocess(self, maze_path: str, rectangular: bool = True,
+                           size: tuple[int, int] = (1280, 720),
+                           preprocessor: Optional[MazePreprocessor] = None) \
+            -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the same tuple as preprocess_maze(maze_path, rectangular, size), loading it from
+        the cache if the maze has been preprocessed before and storing it otherwise.
+
+        Mazes that are not in the cache are preprocessed with preprocessor, or a new
+        MazePreprocessor if it is None.
+        """
+        with open(maze_path, 'rb') as file:
+            key = self.key(file.read(), rectangular, size)
+
+        entry = self.load(key)
+        if entry is not None:
+            return entry
+
+        if preprocessor is None:
+            preprocessor = MazePreprocessor()
+        cropped, grid = preprocessor.preprocess(maze_path, rectangular, size)
+        self.store(key, cropped, grid)
+        return cropped, grid
+
+    @staticmethod
+    def key(image_bytes: bytes, rectangular: bool, size: tuple[int, int]) -> str:
+        """
+        Return the cache key of an image with the given bytes preprocessed with the given
+        parameters
+        """
+        digest = hashlib.sha256(image_bytes)
+        digest.update(f'v{PIPELINE_VERSION};rectangular={rectangular};size={size}'.encode())
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        Return the memory mapped (cropped image, grid) stored under key, or None if there is no
+        such entry.
+
+        The arrays are mapped copy-on-write, so they can be modified without changing the cache.
+        """
+        entry = os.path.join(self.directory, key)
+        try:
+            cropped = np.load(os.path.join(entry, 'cropped.npy'), mmap_mode='c')
+            grid = np.load(os.path.join(entry, 'grid.npy'), mmap_mode='c')
+        except (OSError, ValueError):
+            return None
+
+        # The modification time of an entry is used as its last use time for eviction
+        os.utime(entry)
+        return cropped, grid
+
+    def store(self, key: str, cropped: np.ndarray, grid: np.ndarray) -> None:
+        """
+        Store cropped and grid under key, then evict old entries if the cache is too large.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write into a temporary folder first so other processes never see a partial entry
+        temp = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        np.save(os.path.join(temp, 'cropped.npy'), np.ascontiguousarray(cropped))
+        np.save(os.path.join(temp, 'grid.npy'), np.ascontiguousarray(grid))
+        try:
+            os.replace(temp, os.path.join(self.directory, key))
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(temp, ignore_errors=True)
+
+        self.evict(keep=key)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Delete the least recently used entries, other than keep, until the cache is no larger
+        than max_bytes.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('.tmp-') or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path))
+            entries.append((os.stat(path).st_mtime, size, name))
+            total += size
+
+        entries.sort()
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            if name != keep:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+                total -= size
+
+    def clear(self) -> None:
+        """
+        Delete every entry in the cache
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['hashlib', 'os', 'shutil', 'tempfile', 'typing', 'numpy',
+                          'image_processing'],
+        'allowed-io': ['load_or_preprocess'],  # the names (strs) of functions that call
+        # print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
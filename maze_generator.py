@@ -0,0 +1,335 @@
+"""
+maze_generator.py:
+Contains functions that generate random mazes of any size, either as images that go through the
+same preprocessing as the mazes in the mazes folder, or as uint8 grids that can be passed
+directly into MatrixGraph.
+
+A maze of width x height cells is first generated as a block array of shape
+(2 * height + 1, 2 * width + 1), indexed by [row, col], where cell (row, col) is the block
+[2 * row + 1, 2 * col + 1], the blocks between two cells are the walls between them, and 1 marks
+an open block. The block array is then scaled up into pixels. All generators are numba compiled
+and take a seed, so the same arguments always produce the same maze.
+
+Run this module to write a maze to a file, for example:
+
+    python maze_generator.py big_maze.png --width 1000 --height 1000 --algorithm kruskal
+    python maze_generator.py big_maze.npy --width 4000 --height 4000 --braid 0.2
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import argparse
+from typing import Optional
+import cv2
+import numba
+import numpy as np
+
+ALGORITHMS = ('backtracker', 'kruskal', 'prim')
+
+# The (row, col) offsets of the 4 neighbours of a cell
+CELL_ROWS = np.array([-1, 1, 0, 0], dtype=np.int64)
+CELL_COLS = np.array([0, 0, -1, 1], dtype=np.int64)
+
+
+@numba.njit(cache=True)
+def backtracker_kernel(blocks: np.ndarray, seed: int) -> None:
+    """
+    Carve a maze into the closed block array blocks with the recursive backtracker, which makes
+    long winding corridors with few branches.
+
+    The recursion is replaced by an explicit stack of cell ids, so it works for any size.
+    """
+    np.random.seed(seed)
+    height, width = blocks.shape[0] // 2, blocks.shape[1] // 2
+    visited = np.zeros((height, width), dtype=np.bool_)
+    stack = np.empty(height * width, dtype=np.int64)
+    options = np.empty(4, dtype=np.int64)
+    stack[0] = 0
+    size = 1
+    visited[0, 0] = True
+    blocks[1, 1] = 1
+
+    while size > 0:
+        row, col = divmod(stack[size - 1], width)
+        count = 0
+        for k in range(4):
+            n_row = row + CELL_ROWS[k]
+            n_col = col + CELL_COLS[k]
+            if 0 <= n_row < height and 0 <= n_col < width and not visited[n_row, n_col]:
+                options[count] = k
+                count += 1
+        if count == 0:
+            size -= 1
+            continue
+
+        k = options[np.random.randint(count)]
+        n_row = row + CELL_ROWS[k]
+        n_col = col + CELL_COLS[k]
+        blocks[2 * row + 1 + CELL_ROWS[k], 2 * col + 1 + CELL_COLS[k]] = 1
+        blocks[2 * n_row + 1, 2 * n_col + 1] = 1
+        visited[n_row, n_col] = True
+        stack[size] = n_row * width + n_col
+        size += 1
+
+
+@numba.njit(cache=True)
+def kruskal_kernel(blocks: np.ndarray, seed: int) -> None:
+    """
+    Carve a maze into the closed block array blocks with randomized Kruskal's algorithm, which
+    makes many short dead ends.
+
+    Every wall between two cells is visited in a random order, and opened if the cells are not
+    yet connected, which is tracked with a union find over the cell ids.
+    """
+    np.random.seed(seed)
+    height, width = blocks.shape[0] // 2, blocks.shape[1] // 2
+    blocks[1::2, 1::2] = 1
+
+    # Wall 2 * id is east of cell id, and wall 2 * id + 1 is south of it
+    parent = np.arange(height * width)
+    for wall in np.random.permutation(2 * height * width):
+        cell = wall // 2
+        row, col = divmod(cell, width)
+        if wall % 2 == 0:
+            if col == width - 1:
+                continue
+            other = cell + 1
+        else:
+            if row == height - 1:
+                continue
+            other = cell + width
+
+        root = _find(parent, cell)
+        other_root = _find(parent, other)
+        if root != other_root:
+            parent[root] = other_root
+            if wall % 2 == 0:
+                blocks[2 * row + 1, 2 * col + 2] = 1
+            else:
+                blocks[2 * row + 2, 2 * col + 1] = 1
+
+
+@numba.njit(cache=True)
+def prim_kernel(blocks: np.ndarray, seed: int) -> None:
+    """
+    Carve a maze into the closed block array blocks with randomized Prim's algorithm, which
+    grows the maze outwards from a random cell and makes many short branches.
+
+    The frontier holds the walls between the maze and the cells next to it, encoded as
+    4 * cell id + direction, and a random one is removed at each step.
+    """
+    np.random.seed(seed)
+    height, width = blocks.shape[0] // 2, blocks.shape[1] // 2
+    in_maze = np.zeros(height * width, dtype=np.bool_)
+    frontier = np.empty(4 * height * width, dtype=np.int64)
+    size = 0
+
+    cell = np.random.randint(height * width)
+    while True:
+        in_maze[cell] = True
+        row, col = divmod(cell, width)
+        blocks[2 * row + 1, 2 * col + 1] = 1
+        for k in range(4):
+            n_row = row + CELL_ROWS[k]
+            n_col = col + CELL_COLS[k]
+            if 0 <= n_row < height and 0 <= n_col < width and not in_maze[n_row * width + n_col]:
+                frontier[size] = 4 * cell + k
+                size += 1
+
+        # Take random walls out of the frontier until one leads to a cell outside the maze
+        cell = -1
+        while size > 0 and cell == -1:
+            index = np.random.randint(size)
+            wall = frontier[index]
+            size -= 1
+            frontier[index] = frontier[size]
+
+            row, col = divmod(wall // 4, width)
+            k = wall % 4
+            n_row = row + CELL_ROWS[k]
+            n_col = col + CELL_COLS[k]
+            if not in_maze[n_row * width + n_col]:
+                blocks[2 * row + 1 + CELL_ROWS[k], 2 * col + 1 + CELL_COLS[k]] = 1
+                cell = n_row * width + n_col
+        if cell == -1:
+            break
+
+
+@numba.njit(cache=True)
+def braid_kernel(blocks: np.ndarray, fraction: float, seed: int) -> None:
+    """
+    Remove about fraction of the dead ends of the maze in blocks by opening one more of their
+    walls, which adds loops to the maze.
+
+    Where possible, the wall leading to another dead end is opened, so that one opening removes
+    two dead ends.
+    """
+    np.random.seed(seed)
+    height, width = blocks.shape[0] // 2, blocks.shape[1] // 2
+    options = np.empty(4, dtype=np.int64)
+
+    for cell in np.random.permutation(height * width):
+        row, col = divmod(cell, width)
+        if _open_walls(blocks, row, col) != 1 or np.random.random() >= fraction:
+            continue
+
+        count = 0
+        dead_ends = 0
+        for k in range(4):
+            n_row = row + CELL_ROWS[k]
+            n_col = col + CELL_COLS[k]
+            if 0 <= n_row < height and 0 <= n_col < width \
+                    and blocks[2 * row + 1 + CELL_ROWS[k], 2 * col + 1 + CELL_COLS[k]] == 0:
+                # Keep the walls leading to dead ends at the front of options
+                if _open_walls(blocks, n_row, n_col) == 1:
+                    options[count] = options[dead_ends]
+                    options[dead_ends] = k
+                    dead_ends += 1
+                else:
+                    options[count] = k
+                count += 1
+
+        if count > 0:
+            k = options[np.random.randint(dead_ends if dead_ends > 0 else count)]
+            blocks[2 * row + 1 + CELL_ROWS[k], 2 * col + 1 + CELL_COLS[k]] = 1
+
+
+@numba.njit(cache=True)
+def _open_walls(blocks: np.ndarray, row: int, col: int) -> int:
+    """
+    Return the number of open walls around cell (row, col) in blocks
+    """
+    return blocks[2 * row, 2 * col + 1] + blocks[2 * row + 2, 2 * col + 1] \
+        + blocks[2 * row + 1, 2 * col] + blocks[2 * row + 1, 2 * col + 2]
+
+
+@numba.njit(cache=True)
+def _find(parent: np.ndarray, node: int) -> int:
+    """
+    Return the root of node in the union find stored in parent, halving the path on the way
+    """
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
+
+def generate_blocks(width: int, height: int, algorithm: str = 'backtracker',
+                    braid: float = 0.0, seed: int = 0) -> np.ndarray:
+    """
+    Return the uint8 block array of a random maze of width x height cells, generated with
+    algorithm, which must be in ALGORITHMS.
+
+    braid is the fraction of dead ends that are opened up to make loops, where 0 gives a perfect
+    maze with exactly one path between any two cells.
+    """
+    if width < 1 or height < 1:
+        raise ValueError('A maze must be at least 1 x 1 cells')
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f'Unknown maze algorithm {algorithm!r}, expected one of {ALGORITHMS}')
+    if not 0 <= braid <= 1:
+        raise ValueError('braid must be between 0 and 1')
+
+    blocks = np.zeros((2 * height + 1, 2 * width + 1), dtype=np.uint8)
+    if algorithm == 'backtracker':
+        backtracker_kernel(blocks, seed)
+    elif algorithm == 'kruskal':
+        kruskal_kernel(blocks, seed)
+    else:
+        prim_kernel(blocks, seed)
+    if braid > 0:
+        braid_kernel(blocks, braid, seed + 1)
+    return blocks
+
+
+def render_image(blocks: np.ndarray, corridor: int = 4, wall: Optional[int] = None,
+                 margin: Optional[int] = None) -> np.ndarray:
+    """
+    Return a BGR image of the maze in blocks with white corridors corridor pixels wide, black
+    walls wall pixels wide (corridor by default), and a white margin margin pixels wide
+    (2 * corridor by default) around it, like the images in the mazes folder.
+    """
+    wall = corridor if wall is None else wall
+    margin = 2 * corridor if margin is None else margin
+    image = _scale_blocks(blocks, corridor, wall) * np.uint8(255)
+    image = np.pad(image, margin, constant_values=255)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+
+def render_grid(blocks: np.ndarray, spacing: int = 4) -> np.ndarray:
+    """
+    Return the uint8 grid of the maze in blocks, indexed by [col, row], where 1 marks the 1 pixel
+    wide centre line of a corridor, so it can be passed directly into MatrixGraph.
+
+    The centres of neighbouring cells are spacing pixels apart, and cell_to_grid returns the
+    pixel at the centre of a cell.
+    """
+    if spacing < 2:
+        raise ValueError('spacing must be at least 2')
+    grid = _scale_blocks(blocks, 1, spacing - 1)
+    return np.ascontiguousarray(np.swapaxes(grid, 0, 1))
+
+
+def cell_to_grid(cell: tuple[int, int], spacing: int = 4) -> tuple[int, int]:
+    """
+    Return the (col, row) pixel of the grid from render_grid(blocks, spacing) at the centre of
+    the cell (row, col)
+    """
+    return spacing - 1 + cell[1] * spacing, spacing - 1 + cell[0] * spacing
+
+
+def generate_image(width: int, height: int, algorithm: str = 'backtracker', braid: float = 0.0,
+                   seed: int = 0, corridor: int = 4, wall: Optional[int] = None) -> np.ndarray:
+    """
+    Return the BGR image of a random maze of width x height cells, as described in
+    generate_blocks and render_image
+    """
+    return render_image(generate_blocks(width, height, algorithm, braid, seed), corridor, wall)
+
+
+def generate_grid(width: int, height: int, algorithm: str = 'backtracker', braid: float = 0.0,
+                  seed: int = 0, spacing: int = 4) -> np.ndarray:
+    """
+    Return the MatrixGraph grid of a random maze of width x height cells, as described in
+    generate_blocks and render_grid
+    """
+    return render_grid(generate_blocks(width, height, algorithm, braid, seed), spacing)
+
+
+def _scale_blocks(blocks: np.ndarray, cell_size: int, wall_size: int) -> np.ndarray:
+    """
+    Return blocks scaled up so that each cell block is cell_size pixels wide and each wall block
+    is wall_size pixels wide
+    """
+    row_sizes = np.where(np.arange(blocks.shape[0]) % 2 == 1, cell_size, wall_size)
+    col_sizes = np.where(np.arange(blocks.shape[1]) % 2 == 1, cell_size, wall_size)
+    return np.repeat(np.repeat(blocks, row_sizes, axis=0), col_sizes, axis=1)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """
+    Parse the command line arguments in argv, then generate the maze and write it to a file
+    """
+    parser = argparse.ArgumentParser(description='Generate a random maze.')
+    parser.add_argument('output', help='the file to write, a .npy file stores the MatrixGraph '
+                                       'grid and anything else stores an image')
+    parser.add_argument('--width', type=int, default=50, help='the width in cells')
+    parser.add_argument('--height', type=int, default=50, help='the height in cells')
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='backtracker')
+    parser.add_argument('--braid', type=float, default=0.0,
+                        help='the fraction of dead ends to remove')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corridor', type=int, default=4,
+                        help='the corridor width in pixels, or the cell spacing of a grid')
+    parser.add_argument('--wall', type=int, help='the wall width in pixels')
+    args = parser.parse_args(argv)
+
+    blocks = generate_blocks(args.width, args.height, args.algorithm, args.braid, args.seed)
+    if args.output.lower().endswith('.npy'):
+        np.save(args.output, render_grid(blocks, args.corridor))
+    else:
+        cv2.imwrite(args.output, render_image(blocks, args.corridor, args.wall))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+maze_loader.py:
+Contains the MazeLoader class which preprocesses mazes in a background thread, so the GUI keeps
+running while a maze is loaded.
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from matrix_graph import MatrixGraph, nearest_path_map, label_components
+from maze_cache import MazeCache
+
+
+@dataclass
+class LoadedMaze:
+    """
+    A maze that is ready to be shown and searched.
+
+    Instance Attributes:
+        - path: The path of the maze image
+        - cropped: The cropped maze image, indexed by [row, col]
+        - graph: The MatrixGraph of the thinned maze, with its closest path map and connected
+                 components already built
+    """
+    path: str
+    cropped: np.ndarray
+    graph: MatrixGraph
+
+
+def load_maze(maze_path: str, rectangular: bool, cache: MazeCache) -> LoadedMaze:
+    """
+    Return the LoadedMaze of the maze image at maze_path, preprocessing it through cache.
+
+    The closest path map and the connected components are computed by calling nearest_path_map
+    and label_components directly, since they release the GIL when called from Python but not
+    when called from inside MatrixGraph. The grid is passed to MatrixGraph as a C contiguous
+    ndarray whether it was just preprocessed or loaded from the cache, so the constructor is
+    only compiled for one array type, the same one precompile.precompile uses.
+    """
+    cropped, grid = cache.load_or_preprocess(maze_path, rectangular)
+    graph = MatrixGraph(np.ascontiguousarray(grid))
+    graph.nearest = nearest_path_map(graph.graph)
+    graph.labels, graph.sizes = label_components(graph.graph)
+    return LoadedMaze(maze_path, cropped, graph)
+
+
+class MazeLoader:
+    """
+    Loads mazes in a background thread.
+
+    Mazes are loaded one at a time, in the order they were requested. The heavy parts of loading
+    (OpenCV and the numba compiled functions) release the GIL, so the main thread keeps drawing
+    frames while a maze loads. Every loaded maze is kept, so switching back to it, or to a maze
+    that was preloaded, is instant.
+
+    Instance Attributes:
+        - cache: The MazeCache mazes are preprocessed through
+
+    Private Instance Attributes:
+        - _executor: The single worker thread that loads mazes
+        - _futures: Maps (maze path, rectangular) to the future of loading that maze
+        - _wanted: The (maze path, rectangular) the GUI is waiting for, or None
+
+    Sample Usage:
+    >>> loader = MazeLoader(MazeCache())
+    >>> loader.request('mazes/maze.png')
+    >>> maze = loader.wait()
+    >>> maze.path
+    'mazes/maze.png'
+    """
+
+    cache: MazeCache
+    _executor: ThreadPoolExecutor
+    _futures: dict[tuple[str, bool], Future]
+    _wanted: Optional[tuple[str, bool]]
+
+    def __init__(self, cache: MazeCache) -> None:
+        """
+        Initialize a MazeLoader that preprocesses mazes through cache
+        """
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='maze-loader')
+        self._futures = {}
+        self._wanted = None
+
+    def preload(self, maze_path: str, rectangular: bool = True) -> None:
+        """
+        Start loading the maze at maze_path in the background, without waiting for it
+        """
+        key = (maze_path, rectangular)
+        if key not in self._futures:
+            self._futures[key] = self._executor.submit(load_maze, maze_path, rectangular,
+                                                       self.cache)
+
+    def request(self, maze_path: str, rectangular: bool = True) -> None:
+        """
+        Start loading the maze at maze_path if it is not loaded yet, and make it the maze that
+        poll returns once it is ready. This replaces any earlier request that is still loading.
+        """
+        self.preload(maze_path, rectangular)
+        self._wanted = (maze_path, rectangular)
+
+    def loading(self) -> Optional[str]:
+        """
+        Return the path of the requested maze if it is still loading, or None
+        """
+        if self._wanted is None or self._futures[self._wanted].done():
+            return None
+        return self._wanted[0]
+
+    def poll(self) -> Optional[LoadedMaze]:
+        """
+        Return the requested maze if it has finished loading since the last call, or None.
+
+        Raise the exception raised while loading it if it could not be loaded. Failed mazes are
+        forgotten, so requesting them again retries.
+        """
+        if self._wanted is None or not self._futures[self._wanted].done():
+            return None
+        key = self._wanted
+        self._wanted = None
+        future = self._futures[key]
+        if future.exception() is not None:
+            del self._futures[key]
+        return future.result()
+
+    def wait(self) -> LoadedMaze:
+        """
+        Return the requested maze, waiting for it to finish loading
+        """
+        self._futures[self._wanted].result()
+        return self.poll()
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker thread once it finishes the maze it is loading, dropping the mazes that
+        have not started loading yet
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['concurrent.futures', 'dataclasses', 'typing', 'numpy', 'matrix_graph',
+                          'maze_cache'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
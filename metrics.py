@@ -0,0 +1,254 @@
+"""
+metrics.py:
+Contains the sinks that PathfindingAlgorithms reports every search it visualizes to.
+
+A sink is told when a search starts and is given the RunMetrics of the search once its replay
+has finished. PathfindingAlgorithms only measures anything while it has at least one sink, so
+the GUI pays nothing for them by default. For example, to keep the metrics in memory, append
+them to a JSON lines file and profile every search with cProfile:
+
+    algorithms.sinks = [StatsSink(), JsonLinesSink('runs.jsonl'), ProfilerSink()]
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import abc
+import cProfile
+import dataclasses
+import json
+import pstats
+from dataclasses import dataclass
+from typing import Any, Optional
+import numpy as np
+from solver import SearchResult
+
+
+@dataclass
+class RunMetrics:
+    """
+    The metrics of one search that PathfindingAlgorithms ran and replayed.
+
+    Instance Attributes:
+        - algorithm: The name of the search function
+        - found: Whether the target was found
+        - path_length: The number of pixels on the path
+        - counts: Maps 'expanded' and the names in solver.COUNTERS to their values for the
+                  search, as returned by SearchResult.counts
+        - search_s: The seconds spent running the search
+        - render_s: The seconds spent drawing the replay and updating the display
+        - events_s: The seconds spent polling and handling events during the replay
+        - idle_s: The seconds spent waiting for the next frame during the replay
+        - frames: The number of frames the replay drew
+
+    Sample Usage:
+    >>> result = SearchResult([(0, 0)], np.zeros((1, 2), dtype=np.int32))
+    >>> metrics = RunMetrics.from_result('a_star', result, 0.5)
+    >>> metrics.counts
+    {'expanded': 1}
+    """
+
+    algorithm: str
+    found: bool
+    path_length: int
+    counts: dict[str, int]
+    search_s: float
+    render_s: float = 0.0
+    events_s: float = 0.0
+    idle_s: float = 0.0
+    frames: int = 0
+
+    @staticmethod
+    def from_result(algorithm: str, result: SearchResult, search_s: float) -> 'RunMetrics':
+        """
+        Return the RunMetrics of the search named algorithm that returned result after
+        search_s seconds, before it was replayed
+        """
+        return RunMetrics(algorithm, result.found, len(result.path), result.counts(), search_s)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Return a flat dictionary of every metric, with the counts next to the timings
+        """
+        row = dataclasses.asdict(self)
+        row.update(row.pop('counts'))
+        return row
+
+
+class MetricsSink(abc.ABC):
+    """
+    An abstract class for the places the metrics of a search are sent to.
+    """
+
+    def start(self, algorithm: str) -> None:
+        """
+        Called right before the search named algorithm runs. Does nothing by default.
+        """
+
+    @abc.abstractmethod
+    def record(self, metrics: RunMetrics) -> None:
+        """
+        Called with the metrics of a search once its replay has finished
+        """
+
+
+class StatsSink(MetricsSink):
+    """
+    Keeps the metrics of every search in memory.
+
+    Instance Attributes:
+        - runs: The metrics of every search, in the order they ran
+
+    Sample Usage:
+    >>> sink = StatsSink()
+    >>> sink.record(RunMetrics('a_star', True, 10, {'expanded': 40}, 0.25))
+    >>> sink.record(RunMetrics('a_star', True, 12, {'expanded': 60}, 0.75))
+    >>> sink.summary()['a_star']['expanded']
+    50.0
+    """
+
+    runs: list[RunMetrics]
+
+    def __init__(self) -> None:
+        """
+        Initialize a StatsSink without any runs
+        """
+        self.runs = []
+
+    def record(self, metrics: RunMetrics) -> None:
+        """
+        Keep metrics
+        """
+        self.runs.append(metrics)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Return a dictionary mapping every algorithm that ran to the number of times it ran
+        ('runs') and the mean of every numeric metric over those runs
+        """
+        by_algorithm = {}
+        for metrics in self.runs:
+            by_algorithm.setdefault(metrics.algorithm, []).append(metrics.to_dict())
+        summary = {}
+        for algorithm, rows in by_algorithm.items():
+            means = {'runs': len(rows)}
+            for key, value in rows[0].items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                        and all(key in row for row in rows):
+                    means[key] = float(np.mean([row[key] for row in rows]))
+            summary[algorithm] = means
+        return summary
+
+
+class JsonLinesSink(MetricsSink):
+    """
+    Appends the metrics of every search to a file as one JSON object per line.
+
+    Instance Attributes:
+        - path: The path of the file
+    """
+
+    path: str
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize a JsonLinesSink that appends to the file at path
+        """
+        self.path = path
+
+    def record(self, metrics: RunMetrics) -> None:
+        """
+        Append metrics to the file as a line of JSON
+        """
+        with open(self.path, 'a') as file:
+            file.write(json.dumps(metrics.to_dict()) + '\n')
+
+
+class ProfilerSink(MetricsSink):
+    """
+    Profiles every search and its replay with cProfile, or with pyinstrument if it is passed as
+    the profiler and is installed.
+
+    Profiling stops once the replay finishes, and starts again for the next search, so the
+    profile only covers the time spent searching and replaying and not the time the GUI spends
+    waiting for clicks.
+
+    Instance Attributes:
+        - profiler: 'cprofile' or 'pyinstrument'
+        - output_path: Where save writes the profile, or None to print it instead
+
+    Private Instance Attributes:
+        - _profile: The cProfile.Profile or pyinstrument.Profiler collecting the profile
+    """
+
+    profiler: str
+    output_path: Optional[str]
+    _profile: Any
+
+    def __init__(self, profiler: str = 'cprofile', output_path: Optional[str] = None) -> None:
+        """
+        Initialize a ProfilerSink using profiler.
+
+        Raise ImportError if profiler is 'pyinstrument' and pyinstrument is not installed, and
+        ValueError if profiler is neither 'cprofile' nor 'pyinstrument'.
+        """
+        self.profiler = profiler
+        self.output_path = output_path
+        if profiler == 'cprofile':
+            self._profile = cProfile.Profile()
+        elif profiler == 'pyinstrument':
+            # pyinstrument is optional, so it is only imported when it is asked for
+            import pyinstrument
+            self._profile = pyinstrument.Profiler()
+        else:
+            raise ValueError(f'Unknown profiler {profiler}')
+
+    def start(self, algorithm: str) -> None:
+        """
+        Start profiling
+        """
+        if self.profiler == 'cprofile':
+            self._profile.enable()
+        else:
+            self._profile.start()
+
+    def record(self, metrics: RunMetrics) -> None:
+        """
+        Stop profiling
+        """
+        if self.profiler == 'cprofile':
+            self._profile.disable()
+        else:
+            self._profile.stop()
+
+    def save(self) -> None:
+        """
+        Write the profile of every search so far to output_path, or print the functions that
+        took the most time if output_path is None.
+
+        cProfile profiles are written in the pstats format, which pstats.Stats and snakeviz can
+        read, and pyinstrument profiles as HTML.
+        """
+        if self.profiler == 'cprofile':
+            if self.output_path is None:
+                pstats.Stats(self._profile).sort_stats('cumulative').print_stats(20)
+            else:
+                self._profile.dump_stats(self.output_path)
+        elif self.output_path is None:
+            print(self._profile.output_text())
+        else:
+            with open(self.output_path, 'w') as file:
+                file.write(self._profile.output_html())
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['abc', 'cProfile', 'dataclasses', 'json', 'pstats', 'typing', 'numpy',
+                          'solver', 'pyinstrument'],
+        'allowed-io': ['record', 'save'],  # the names (strs) of functions that call
+        # print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
@@ -0,0 +1,277 @@
+"""
+packed_graph.py:
+Contains the PackedGraph class, a MatrixGraph that stores one bit per pixel instead of one byte.
+
+The grid of a MatrixGraph is a uint8 array even though every pixel is either 0 or 1, so the
+packed grid of a PackedGraph takes 8 times less memory for the same maze, as described in
+matrix_graph.PACK_BITS. The kernels in kernels.py read the packed bits directly, so a
+PackedGraph is searched without ever unpacking it, at the cost of a shift and a mask on every
+pixel read. A PackedGraph also has no nearest map, since that takes 4 bytes per pixel, so
+closest_path searches outwards from the point instead. This is what lets batch.py solve full
+resolution scans that would not fit in memory as a MatrixGraph.
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import numba
+import numpy as np
+from matrix_graph import NEIGHBOUR_COLS, NEIGHBOUR_ROWS, PACK_BITS, label_components, \
+    neighbour_masks, jump_table, is_path
+
+# Numba requirements
+spec = [
+    ('graph', numba.uint64[:, :]),
+    ('rows', numba.int64),
+    ('cols', numba.int64),
+    ('labels', numba.int32[:, :]),
+    ('sizes', numba.int64[:]),
+    ('masks', numba.uint8[:, :]),
+    ('jumps', numba.int32[:, :, :])
+]
+
+# The number of columns pack_grid packs at a time, so a memory mapped grid is never read whole.
+# It is a multiple of PACK_BITS, so every chunk fills whole words.
+PACK_CHUNK = 64 * PACK_BITS
+
+
+@numba.njit(cache=True)
+def _pack_columns(grid: np.ndarray, bits: np.ndarray) -> None:
+    """
+    Set the bits in bits of the path pixels of grid, where grid is a chunk of whole words of
+    columns and bits is its part of the packed grid, which must be filled with 0
+    """
+    cols, rows = grid.shape
+    for col in range(cols):
+        bit = numba.uint64(1) << numba.uint64(col % PACK_BITS)
+        for row in range(rows):
+            if grid[col, row] == 1:
+                bits[col // PACK_BITS, row] |= bit
+
+
+def pack_grid(grid: np.ndarray) -> np.ndarray:
+    """
+    Return the uint8 grid of a MatrixGraph packed into a uint64 array of shape
+    (ceil(cols / PACK_BITS), rows), where the pixel (col, row) is bit col % PACK_BITS of the word
+    [col // PACK_BITS, row]. The bits of the columns past cols are 0.
+
+    >>> pack_grid(np.array([[1, 0], [0, 1], [1, 1]], dtype=np.uint8))
+    array([[5, 6]], dtype=uint64)
+    """
+    bits = np.zeros((-(-grid.shape[0] // PACK_BITS), grid.shape[1]), dtype=np.uint64)
+    for col in range(0, grid.shape[0], PACK_CHUNK):
+        _pack_columns(np.asarray(grid[col: col + PACK_CHUNK]),
+                      bits[col // PACK_BITS: (col + PACK_CHUNK) // PACK_BITS])
+    return bits
+
+
+def pack_graph(grid: np.ndarray) -> 'PackedGraph':
+    """
+    Return the PackedGraph of the uint8 grid of a MatrixGraph
+    """
+    return PackedGraph(pack_grid(grid), grid.shape[0])
+
+
+@numba.njit(cache=True)
+def closest_path_pixel(grid: np.ndarray, cols: int, col: int, row: int) -> int:
+    """
+    Return the pixel id of the closest path pixel to (col, row) by euclidean distance in the
+    first cols columns of grid, which is either a uint8 grid or a packed grid, or -1 if there are
+    none.
+
+    The pixels are searched in square rings of growing radius around (col, row), and the search
+    stops once the ring is further away than the closest path pixel found so far. Pixels that
+    are equally close may be picked differently from matrix_graph.nearest_path_map.
+    """
+    rows = grid.shape[1]
+    best = -1
+    best_distance = 0
+    for radius in range(max(cols, rows)):
+        if best != -1 and radius * radius > best_distance:
+            break
+        for d_col in range(-radius, radius + 1):
+            n_col = col + d_col
+            if not 0 <= n_col < cols:
+                continue
+            # Only the first and last columns of the ring are scanned whole
+            step = 1 if abs(d_col) == radius else max(2 * radius, 1)
+            for d_row in range(-radius, radius + 1, step):
+                distance = d_col * d_col + d_row * d_row
+                if is_path(grid, n_col, row + d_row) and (best == -1 or distance < best_distance):
+                    best = n_col * rows + row + d_row
+                    best_distance = distance
+    return best
+
+
+@numba.experimental.jitclass(spec)
+class PackedGraph:
+    """A MatrixGraph whose pixels are stored as single bits, as returned by pack_grid.
+
+    graph is the packed grid, and cols is the number of columns of the grid it was packed from,
+    which does not include the columns that pad graph. Pixel ids are col * rows + row like in a
+    MatrixGraph, so every function in kernels.py accepts a PackedGraph and returns the same
+    result as for the MatrixGraph of the same grid.
+
+    The components, neighbour masks and jump table are built from the packed grid like those of
+    a MatrixGraph, and take as much memory as they do there, so only the ones that are needed
+    should be built.
+
+    Note: This is a jitclass so type of inputs is very sensitive.
+
+    Sample Usage:
+    >>> graph = pack_graph(np.array([[1, 1], [0, 1]], dtype=np.uint8))
+    >>> graph.is_path(0, 1), graph.is_path(1, 0)
+    (True, False)
+    >>> graph.get_valid_neighbours(0, 0)
+    [(0, 1), (1, 1)]
+    >>> graph.closest_path((1, 0))
+    (0, 0)
+    """
+
+    graph: np.ndarray
+    rows: int
+    cols: int
+    labels: np.ndarray
+    sizes: np.ndarray
+    masks: np.ndarray
+    jumps: np.ndarray
+
+    def __init__(self, bits: np.ndarray, cols: int) -> None:
+        """
+        Initialize a PackedGraph of the packed grid bits of a grid with cols columns
+        """
+        self.graph = bits
+        self.cols = cols
+        self.rows = bits.shape[1]
+        self.labels = np.empty((0, 0), dtype=np.int32)
+        self.sizes = np.empty(0, dtype=np.int64)
+        self.masks = np.empty((0, 0), dtype=np.uint8)
+        self.jumps = np.empty((0, 0, 0), dtype=np.int32)
+
+    def is_path(self, col: int, row: int) -> bool:
+        """
+        Return whether (col, row) is inside the graph and on the path
+        """
+        return is_path(self.graph, col, row)
+
+    def get_valid_neighbours(self, col: int, row: int) -> list[tuple]:
+        """
+        Return a list of pixels that are adjacent to (col, row), in the same order as
+        MatrixGraph.get_valid_neighbours
+        """
+        neighbours = []
+        mask = self.neighbour_mask(col, row)
+        for k in range(8):
+            if mask & (1 << k):
+                neighbours.append((col + NEIGHBOUR_COLS[k], row + NEIGHBOUR_ROWS[k]))
+        return neighbours
+
+    def build_neighbour_masks(self) -> None:
+        """
+        Precompute the neighbour mask of every pixel, if it has not been computed yet
+        """
+        if self.masks.shape[0] == 0:
+            self.masks = neighbour_masks(self.graph)
+
+    def neighbour_mask(self, col: int, row: int) -> int:
+        """
+        Return the neighbour mask of (col, row), as in MatrixGraph.neighbour_mask
+        """
+        if self.masks.shape[0] != 0:
+            return self.masks[col, row]
+        mask = 0
+        for k in range(8):
+            if is_path(self.graph, col + NEIGHBOUR_COLS[k], row + NEIGHBOUR_ROWS[k]):
+                mask |= 1 << k
+        return mask
+
+    def fill_neighbours(self, col: int, row: int, out: np.ndarray) -> int:
+        """
+        Write the pixel ids of the pixels adjacent to (col, row) into out and return how many
+        were written, as in MatrixGraph.fill_neighbours
+        """
+        mask = self.neighbour_mask(col, row)
+        count = 0
+        for k in range(8):
+            if mask & (1 << k):
+                out[count] = (col + NEIGHBOUR_COLS[k]) * self.rows + row + NEIGHBOUR_ROWS[k]
+                count += 1
+        return count
+
+    def build_jump_table(self) -> None:
+        """
+        Precompute the straight jumps of every pixel, as in MatrixGraph.build_jump_table
+        """
+        if self.jumps.shape[0] == 0:
+            self.jumps = jump_table(self.graph)
+
+    def closest_path(self, point: tuple[int, int]) -> tuple[int, int]:
+        """
+        Return the closest path to point, as in MatrixGraph.closest_path, with
+        closest_path_pixel.
+
+        Raise an IndexError if the graph does not contain any path.
+        """
+        col = min(max(point[0], 0), self.cols - 1)
+        row = min(max(point[1], 0), self.rows - 1)
+        node = closest_path_pixel(self.graph, self.cols, col, row)
+        if node == -1:
+            raise IndexError('The graph does not contain any path')
+        return (node // self.rows, node % self.rows)
+
+    def build_components(self) -> None:
+        """
+        Label the connected components of the path, if they have not been labelled yet
+        """
+        if self.labels.shape[0] == 0:
+            self.labels, self.sizes = label_components(self.graph)
+
+    def same_component(self, node1: tuple[int, int], node2: tuple[int, int]) -> bool:
+        """
+        Return whether node1 and node2 are both on the path and connected to each other
+        """
+        self.build_components()
+        label = self.labels[node1[0], node1[1]]
+        return label != 0 and label == self.labels[node2[0], node2[1]]
+
+    def component_count(self) -> int:
+        """
+        Return the number of connected components of the path
+        """
+        self.build_components()
+        return len(self.sizes) - 1
+
+    def component_sizes(self) -> np.ndarray:
+        """
+        Return an array of the number of pixels in every connected component of the path
+        """
+        self.build_components()
+        return self.sizes[1:].copy()
+
+    def nbytes(self) -> int:
+        """
+        Return the number of bytes used by the packed grid and everything built from it
+        """
+        return self.graph.nbytes + self.labels.nbytes + self.sizes.nbytes + self.masks.nbytes \
+            + self.jumps.nbytes
+
+    def unpack(self) -> np.ndarray:
+        """
+        Return the uint8 grid this graph was packed from
+        """
+        grid = np.empty((self.cols, self.rows), dtype=np.uint8)
+        for col in range(self.cols):
+            for row in range(self.rows):
+                grid[col, row] = is_path(self.graph, col, row)
+        return grid
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['numba', 'numpy', 'matrix_graph'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
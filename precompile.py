@@ -0,0 +1,125 @@
+"""
+precompile.py:
+Contains precompile, which compiles the numba code used to load and search mazes before it is
+first needed.
+
+Every numba compiled function in the project is compiled with cache=True, so numba saves its
+machine code in __pycache__ and later processes load it from there instead of compiling it
+again. The exception is the jitclasses (MatrixGraph, PackedGraph and IndexedMinHeap), which
+numba cannot cache, so their methods, and functions that take one as an argument like
+landmarks.landmark_a_star_kernel, are compiled again in every process the first time they are
+called from Python. precompile calls each of them once on a tiny grid, which the GUI does in a
+background thread once the first maze is shown and batch.py does when each worker starts, so
+the compilation does not happen during the first click or the first image.
+
+Run this module to fill the cache ahead of time, for example after installing the program, and
+to print how long each step took:
+
+    python precompile.py
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import argparse
+import time
+from typing import Callable, Optional, Union
+import numpy as np
+from matrix_graph import MatrixGraph, nearest_path_map, label_components
+from packed_graph import PackedGraph, pack_graph
+from image_processing import thin_binary
+from landmarks import LandmarkIndex
+import kernels
+
+# The searches in kernels.py, in the order of the algorithm drop down menu of the GUI
+SEARCHES = ['breadth_first_search', 'depth_first_search_iterative', 'a_star',
+            'bidirectional_breadth_first_search', 'bidirectional_a_star', 'jump_point_search',
+            'jump_point_search_plus']
+
+
+def precompile(algorithms: Optional[list[str]] = None, packed: bool = False) -> dict[str, float]:
+    """
+    Compile everything needed to preprocess a maze, build its MatrixGraph, move clicks to the
+    closest path pixel and search it with every algorithm in algorithms, by running each of
+    them once on a tiny grid. algorithms are names from SEARCHES or 'landmark_a_star', and are
+    every name in SEARCHES if algorithms is None. If packed is True, the same is compiled for a
+    PackedGraph too, as batch.py uses for full resolution images, in the steps named
+    'packed/<step>'.
+
+    Return a dictionary mapping each step to the seconds it took, which is how long it took to
+    compile the step or load it from the cache.
+    """
+    if algorithms is None:
+        algorithms = SEARCHES
+    grid = np.ones((3, 3), dtype=np.uint8)
+    begin = time.perf_counter()
+    graph = MatrixGraph(grid)
+    timings = {'MatrixGraph': time.perf_counter() - begin}
+
+    steps = [('thin_binary', lambda: thin_binary(np.zeros((3, 3), dtype=np.uint8))),
+             ('nearest_path_map', lambda: nearest_path_map(grid)),
+             ('label_components', lambda: label_components(grid)),
+             ('build_nearest_map', graph.build_nearest_map)]
+    steps.extend(_graph_steps(graph))
+    for name in algorithms:
+        steps.append((name, _search_step(name, graph)))
+
+    if packed:
+        begin = time.perf_counter()
+        packed_graph = pack_graph(grid)
+        timings['pack_graph'] = time.perf_counter() - begin
+        steps.extend(('packed/' + name, step) for name, step in _graph_steps(packed_graph))
+        # landmarks.LandmarkIndex only takes a MatrixGraph
+        for name in algorithms:
+            if name != 'landmark_a_star':
+                steps.append(('packed/' + name, _search_step(name, packed_graph)))
+
+    for name, step in steps:
+        begin = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - begin
+    return timings
+
+
+def _graph_steps(graph: Union[MatrixGraph, PackedGraph]) -> list[tuple[str, Callable]]:
+    """
+    Return the (name, function) steps that compile the methods of graph used to find the
+    closest path pixel and the components of a 3 by 3 maze
+    """
+    return [('build_components', graph.build_components),
+            ('closest_path', lambda: graph.closest_path((0, 0))),
+            ('same_component', lambda: graph.same_component((0, 0), (2, 2))),
+            ('component_sizes', lambda: (graph.component_count(), graph.component_sizes())),
+            ('get_valid_neighbours', lambda: graph.get_valid_neighbours(1, 1))]
+
+
+def _search_step(name: str, graph: Union[MatrixGraph, PackedGraph]) -> Callable[[], object]:
+    """
+    Return a function that searches graph from corner to corner with the algorithm name, both
+    with and without counters, since the GUI only counts while it has metrics sinks
+    """
+    if name == 'landmark_a_star':
+        return lambda: LandmarkIndex(graph).a_star((0, 0), (2, 2))
+    search = getattr(kernels, name)
+    return lambda: (search(graph, (0, 0), (2, 2), count=False), search(graph, (0, 0), (2, 2)))
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """
+    Parse the command line arguments in argv, then precompile and print how long each step took
+    """
+    parser = argparse.ArgumentParser(description='Compile and cache the numba code.')
+    parser.add_argument('--algorithms', nargs='*', choices=SEARCHES + ['landmark_a_star'],
+                        help='the searches to compile, every kernel by default')
+    parser.add_argument('--packed', action='store_true',
+                        help='also compile them for the packed grids of batch.py --full-resolution')
+    args = parser.parse_args(argv)
+
+    begin = time.perf_counter()
+    timings = precompile(args.algorithms, args.packed)
+    for name, seconds in timings.items():
+        print(f'{name:<44} {seconds:8.3f} s')
+    print(f'{"total":<44} {time.perf_counter() - begin:8.3f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+solver.py:
+Contains the headless search engine used by the pathfinding algorithms. Nothing in this module
+depends on pygame, so mazes can be solved without a display. Each search returns the final path
+along with the order in which pixels were expanded, which the GUI replays as a visualization.
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+import math
+import numpy as np
+from matrix_graph import MatrixGraph
+from indexed_heap import IndexedMinHeap
+
+# The cost of moving to a diagonal neighbour. Straight moves cost 1.
+DIAGONAL_COST = math.sqrt(2)
+
+# The names of the counters the kernels in kernels.py fill in, in the order they are stored in
+# SearchResult.counters: the pixels added to the frontier, the most pixels that were ever in the
+# frontier at once, and the neighbours that were looked at while expanding pixels
+COUNTERS = ['pushed', 'max_frontier', 'neighbour_checks']
+
+
+@dataclass
+class SearchResult:
+    """
+    The result of running a pathfinding algorithm on a MatrixGraph.
+
+    Instance Attributes:
+        - path: A list of (col, row) tuples from start to target, or an empty list if the target
+                was not found
+        - trace: An (n, 2) int32 array of the (col, row) of every expanded pixel, in the order
+                 the algorithm expanded them
+        - sides: For bidirectional algorithms, an int8 array with one entry per row of trace
+                 that is 0 if the forward search expanded the pixel and 1 if the backward search
+                 did. None for every other algorithm.
+        - counters: An int64 array of the value of every counter in COUNTERS, or None if the
+                    algorithm does not count them
+
+    Sample Usage:
+    >>> result = SearchResult([(0, 0), (0, 1)], np.array([[0, 0], [0, 1]], dtype=np.int32))
+    >>> result.found
+    True
+    """
+
+    path: list[tuple[int, int]]
+    trace: np.ndarray
+    sides: Optional[np.ndarray] = None
+    counters: Optional[np.ndarray] = None
+
+    @property
+    def found(self) -> bool:
+        """
+        Return whether the target was found
+        """
+        return self.path != []
+
+    @property
+    def expanded(self) -> int:
+        """
+        Return the number of pixels the algorithm expanded
+        """
+        return len(self.trace)
+
+    def counts(self) -> dict[str, int]:
+        """
+        Return a dictionary mapping 'expanded' and the name of every counter in COUNTERS to its
+        value, leaving out the counters if the algorithm does not count them
+        """
+        counts = {'expanded': self.expanded}
+        if self.counters is not None:
+            counts.update(zip(COUNTERS, self.counters.tolist()))
+        return counts
+
+
+def breadth_first_search(graph: MatrixGraph, start: tuple, target: tuple) -> SearchResult:
+    """
+    Return the SearchResult of running breadth first search from start to target.
+    """
+    if not graph.same_component(start, target):
+        return unreachable_result()
+    if start == target:
+        # The search below starts from the neighbours of start, so it would never expand start
+        return _make_result({}, start, target, True, [start])
+
+    queue = deque()
+    visited = set()
+    paths = {}  # A dictionary that maps new nodes to the previous node
+    trace = []
+    start_neighbours = graph.get_valid_neighbours(start[0], start[1])
+    queue.extend(start_neighbours)
+    visited.update(start_neighbours)
+
+    # Update paths with the original visited set
+    for node in start_neighbours:
+        paths[node] = start
+    found = False
+
+    while queue and not found:
+        # Pop the current node
+        curr = queue.popleft()
+        trace.append(curr)
+
+        if curr == target:
+            found = True
+        for node in graph.get_valid_neighbours(curr[0], curr[1]):
+            if node not in visited:
+                queue.append(node)
+                visited.add(node)
+
+                # Add the node as a key with the current node as the value
+                paths[node] = curr
+
+    return _make_result(paths, start, target, found, trace)
+
+
+def depth_first_search_iterative(graph: MatrixGraph, start: tuple, target: tuple) \
+        -> SearchResult:
+    """
+    Return the SearchResult of running depth first search from start to target.
+
+    This is an iterative version of depth_first_search, since the recursive version exceeds
+    the maximum recursion depth.
+    """
+    if not graph.same_component(start, target):
+        return unreachable_result()
+
+    discovered = set()
+    stack = [start]
+    paths = {}  # A dictionary that maps new nodes to the previous node
+    trace = []
+    found = False
+
+    while stack != [] and not found:
+        vertex = stack.pop()
+        trace.append(vertex)
+
+        if vertex == target:
+            found = True
+        elif vertex not in discovered:
+            discovered.add(vertex)
+            neighbors = graph.get_valid_neighbours(vertex[0], vertex[1])
+            for neighbor in neighbors:
+                if neighbor not in discovered:
+                    # Add the neighbor as a key in the path dictionary with vertex as a parent
+                    stack.append(neighbor)
+                    paths[neighbor] = vertex
+
+    return _make_result(paths, start, target, found, trace)
+
+
+def a_star(graph: MatrixGraph, start: tuple, target: tuple) -> SearchResult:
+    """
+    Return the SearchResult of running A* from start to target.
+
+    Straight moves cost 1 and diagonal moves cost sqrt(2), and the heuristic is the octile
+    distance from the current node to target. The heuristic is consistent with these costs, so
+    the returned path is a shortest path.
+    """
+    if not graph.same_component(start, target):
+        return unreachable_result()
+
+    rows = graph.rows
+    open_heap = IndexedMinHeap(int(graph.cols) * int(rows))
+    open_heap.push(start[0] * rows + start[1], graph.octile_distance(start, target))
+
+    costs = {start: 0.0}  # A dictionary that maps nodes to the cost of the best path so far
+    closed = set()
+
+    paths = {}  # A dictionary that maps new nodes to the previous node
+    trace = []
+    found = False
+
+    while not open_heap.is_empty() and not found:
+        curr = divmod(open_heap.pop(), rows)
+        closed.add(curr)
+        trace.append(curr)
+
+        if curr == target:
+            found = True
+            continue
+
+        for coord in graph.get_valid_neighbours(curr[0], curr[1]):
+            if coord in closed:
+                # If the neighbor has already been computed, do nothing
+                continue
+
+            if coord[0] != curr[0] and coord[1] != curr[1]:
+                cost = costs[curr] + DIAGONAL_COST
+            else:
+                cost = costs[curr] + 1
+
+            if coord not in costs or cost < costs[coord]:
+                # The neighbour is new, or this is a shorter path to it, so add it to the open
+                # heap or lower its key
+                costs[coord] = cost
+                paths[coord] = curr
+                open_heap.push_or_decrease(coord[0] * rows + coord[1],
+                                           cost + graph.octile_distance(coord, target))
+
+    return _make_result(paths, start, target, found, trace)
+
+
+def unreachable_result() -> SearchResult:
+    """
+    Return the SearchResult of a search whose start and target are not connected, which fails
+    without expanding any pixels
+    """
+    return SearchResult([], np.empty((0, 2), dtype=np.int32),
+                        counters=np.zeros(len(COUNTERS), dtype=np.int64))
+
+
+def find_path(paths: dict[tuple[int, int], tuple[int, int]], start: tuple,
+              target: tuple) -> list[tuple[int, int]]:
+    """
+    Return a list of tuples that corresponds to the path from start to target, following the
+    parent pointers stored in paths.
+
+    The path is collected from target back to start and reversed once at the end, so this takes
+    time proportional to the length of the path.
+    """
+    final_path_so_far = []
+    current_node = target
+    while current_node != start:
+        final_path_so_far.append(current_node)
+        current_node = paths[current_node]
+
+    # Add the first node, then put the path in order from start to target
+    final_path_so_far.append(start)
+    final_path_so_far.reverse()
+    return final_path_so_far
+
+
+def path_cost(path: list[tuple[int, int]]) -> float:
+    """
+    Return the length of path, where straight moves cost 1 and diagonal moves cost sqrt(2)
+    """
+    if len(path) < 2:
+        return 0.0
+    steps = np.abs(np.diff(np.array(path), axis=0)).sum(axis=1)
+    return float(np.count_nonzero(steps == 1) + DIAGONAL_COST * np.count_nonzero(steps == 2))
+
+
+def _make_result(paths: dict[tuple[int, int], tuple[int, int]], start: tuple, target: tuple,
+                 found: bool, trace: list[tuple[int, int]]) -> SearchResult:
+    """
+    Return a SearchResult built from the state a search finished with
+    """
+    trace_array = np.array(trace, dtype=np.int32).reshape((-1, 2))
+    if found:
+        return SearchResult(find_path(paths, start, target), trace_array)
+    else:
+        return SearchResult([], trace_array)
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['collections', 'dataclasses', 'typing', 'math', 'numpy', 'matrix_graph',
+                          'indexed_heap'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })
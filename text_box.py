@@ -6,6 +6,7 @@ CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
 """
 from typing import Union
 import pygame
+from text_cache import render_text
 
 
 class TextBox:
@@ -57,8 +58,7 @@ class TextBox:
             current_text = self._text
 
         # Draw the text
-        text_surface = pygame.font.SysFont('Arial', 16).render(current_text, True,
-                                                               (0, 0, 0))
+        text_surface = render_text(current_text, 16)
 
         # Determine what colour to print the background
         if self._clicked:
@@ -68,6 +68,12 @@ class TextBox:
 
         self._surface.blit(text_surface, text_surface.get_rect(center=self._background.center))
 
+    def get_rect(self) -> pygame.Rect:
+        """
+        Return the area of _surface the TextBox is drawn on
+        """
+        return pygame.Rect(self._background)
+
     def update(self, events: list) -> Union[None, str]:
         """
         Return the value of the string inputted into the text box, and update the object
@@ -103,7 +109,7 @@ if __name__ == '__main__':
     import python_ta.contracts
     python_ta.contracts.check_all_contracts()
     python_ta.check_all(config={
-        'extra-imports': ['pygame', 'typing'],
+        'extra-imports': ['pygame', 'typing', 'text_cache'],
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'max-line-length': 100,
         'disable': ['E1136']
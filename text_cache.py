@@ -0,0 +1,78 @@
+"""
+text_cache.py:
+Contains the functions the GUI uses to draw text. Fonts and rendered text are cached, so the
+system font lookup happens once per font size, and text that changes every frame, such as the
+iteration counter and the timer, is drawn from cached surfaces of its individual characters.
+
+CSC111 Final Project by Tony He, Austin Blackman, Ifaz Alam
+"""
+
+import functools
+import pygame
+
+FONT_NAME = 'Arial'
+TEXT_COLOUR = (0, 0, 0)
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(size: int = 20) -> pygame.font.Font:
+    """
+    Return the font of the GUI with the given size
+    """
+    return pygame.font.SysFont(FONT_NAME, size)
+
+
+@functools.lru_cache(maxsize=256)
+def render_text(text: str, size: int = 20,
+                colour: tuple[int, int, int] = TEXT_COLOUR) -> pygame.Surface:
+    """
+    Return a surface with text rendered in the font of the given size.
+
+    The returned surface is shared between callers, so it must not be drawn on.
+    """
+    return get_font(size).render(text, True, colour)
+
+
+@functools.lru_cache(maxsize=None)
+def render_glyph(char: str, size: int = 20,
+                 colour: tuple[int, int, int] = TEXT_COLOUR) -> pygame.Surface:
+    """
+    Return a surface with the single character char rendered in the font of the given size.
+
+    The returned surface is shared between callers, so it must not be drawn on.
+    """
+    return get_font(size).render(char, True, colour)
+
+
+def draw_glyphs(surface: pygame.Surface, text: str, pos: tuple[int, int], size: int = 20,
+                colour: tuple[int, int, int] = TEXT_COLOUR) -> pygame.Rect:
+    """
+    Draw text onto surface with its top left corner at pos, one cached character at a time.
+
+    Return the rectangle of surface that the text covers.
+    """
+    x, y = pos
+    for char in text:
+        glyph = render_glyph(char, size, colour)
+        surface.blit(glyph, (x, y))
+        x += glyph.get_width()
+    return pygame.Rect(pos[0], y, x - pos[0], get_font(size).get_height())
+
+
+def glyphs_width(text: str, size: int = 20) -> int:
+    """
+    Return the width in pixels of text when it is drawn with draw_glyphs
+    """
+    return sum(render_glyph(char, size).get_width() for char in text)
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+    python_ta.contracts.check_all_contracts()
+    python_ta.check_all(config={
+        'extra-imports': ['functools', 'pygame'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 100,
+        'disable': ['E1136']
+    })